@@ -7,9 +7,12 @@ from .wikipedia_agent import WikipediaAgent
 from .duckduckgo_agent import DuckDuckGoAgent
 from .executor_agent import ExecutorAgent
 from .explanation_agent import ExplanationAgent
+from .speculative_agent import SpeculativeLLMAgent
+from .web_search_agent import WebSearchAgent
 
 __all__ = [
     'MemoryAgent', 'PlannerAgent', 'LLMAgent', 
     'RetrieverAgent', 'WikipediaAgent', 'DuckDuckGoAgent',
-    'ExecutorAgent', 'ExplanationAgent'
+    'ExecutorAgent', 'ExplanationAgent', 'SpeculativeLLMAgent',
+    'WebSearchAgent'
 ]
\ No newline at end of file
@@ -1,25 +1,57 @@
 # agents/duckduckgo_agent.py
-from langchain_community.tools.ddg_search.tool import DuckDuckGoSearchRun
-from core.state import AgentState
+import asyncio
+from core.state import AgentState, conversation_log
+from core.resources import registry
+from core.resilience import dependency
+from tools.search_cache import cached_search, acached_search
 from langchain.schema import Document
 
+
+def _create_ddg_search():
+    from langchain_community.tools.ddg_search.tool import DuckDuckGoSearchRun
+    from tools.replay import wrap_tool
+    return wrap_tool("duckduckgo", DuckDuckGoSearchRun())
+
+
+registry.register("duckduckgo", _create_ddg_search)
+
+
 class DuckDuckGoAgent:
-    ddg_search = DuckDuckGoSearchRun()
-    
+    @staticmethod
+    def _apply_content(state: AgentState, content) -> AgentState:
+        if content:
+            state["documents"] = [Document(page_content=content)]
+            state["ddg_success"] = True
+            conversation_log(state).status("Retrieved information from DuckDuckGo.")
+        else:
+            state["documents"] = []
+            state["ddg_success"] = False
+        return state
+
     @classmethod
     def process(cls, state: AgentState) -> AgentState:
         try:
-            content = cls.ddg_search.run(state["question"])
-            if content:
-                state["documents"] = [Document(page_content=content)]
-                state["ddg_success"] = True
-                state["conversation_history"].append("AI: Retrieved information from DuckDuckGo.")
-            else:
-                state["documents"] = []
-                state["ddg_success"] = False
+            content = cached_search("duckduckgo", state["question"],
+                                    lambda q: dependency("duckduckgo").call(registry.get("duckduckgo").run, q))
+            cls._apply_content(state, content)
+        except Exception:
+            state["documents"] = []
+            state["ddg_success"] = False
+
+        state["ddg_attempted"] = True
+        return state
+
+    @classmethod
+    async def aprocess(cls, state: AgentState) -> AgentState:
+        try:
+            # The search wrappers are blocking HTTP clients; run them off the event loop
+            content = await acached_search(
+                "duckduckgo", state["question"],
+                lambda q: dependency("duckduckgo").acall(asyncio.to_thread, registry.get("duckduckgo").run, q))
+            cls._apply_content(state, content)
         except Exception:
             state["documents"] = []
             state["ddg_success"] = False
 
         state["ddg_attempted"] = True
-        return state
\ No newline at end of file
+        return state
@@ -1,40 +1,70 @@
 # agents/executor_agent.py
+from typing import Optional
 from tools.llm_client import get_llm
-from tools.language_utils import get_language_prompts, format_prompt
-from core.state import AgentState
+from tools.language_utils import get_language_prompts, build_prompt
+from tools.prompt_budget import PackedPrompt
+from core.state import AgentState, conversation_log
+from core.resilience import dependency
+from .memory_agent import MemoryAgent
 
 class ExecutorAgent:
-    llm = get_llm()
-    
-    @classmethod
-    def process(cls, state: AgentState) -> AgentState:
-        context = state.get("conversation_history", [])
-        question = state["question"]
-        current_language = state.get("language", "en")
-        prompts = get_language_prompts(current_language)
-
-        # Use docs if available
-        if state.get("documents") and len(state["documents"]) > 0:
-            content = "\n".join([doc.page_content for doc in state["documents"]])
-            
-            # Format prompt with medical information in the selected language
-            prompt = format_prompt(current_language, "\n".join(context[-6:]), question, content)
-
-            response = cls.llm.invoke(prompt)
+    @staticmethod
+    def _build_prompt(state: AgentState) -> Optional[PackedPrompt]:
+        """Return the RAG prompt, or None when there are no documents to answer from."""
+        if not state.get("documents"):
+            return None
+
+        # Documents stay in retrieval order, so the budget drops the least relevant first
+        content = [doc.page_content for doc in state["documents"]]
+
+        # Format prompt with medical information in the selected language
+        packed = build_prompt(state.get("language", "en"), MemoryAgent.context(state, 6), state["question"], content)
+        state["prompt_tokens"] = packed.tokens
+        return packed
+
+    @staticmethod
+    def _finish(state: AgentState, response=None) -> AgentState:
+        # Answer generated from retrieved docs
+        if response is not None:
             answer = response.content.strip()
             state["generation"] = answer
             state["source"] = "retrieved_docs"
-            state["conversation_history"].append(f"Doctor: {answer}")
+            conversation_log(state).doctor(answer)
             return state
 
         # If no docs but LLM succeeded earlier, use that generation
         if state.get("llm_success", False) and state.get("generation"):
-            state["conversation_history"].append(f"Doctor: {state['generation']}")
+            conversation_log(state).doctor(state["generation"])
             state["source"] = "llm_knowledge"
             return state
 
         # Otherwise fallback response in the selected language
+        prompts = get_language_prompts(state.get("language", "en"))
         state["generation"] = prompts["fallback"]
         state["source"] = "none"
-        state["conversation_history"].append(state["generation"])
-        return state
\ No newline at end of file
+        conversation_log(state).doctor(state["generation"])
+        return state
+
+    @classmethod
+    def process(cls, state: AgentState, config=None) -> AgentState:
+        packed = cls._build_prompt(state)
+        response = None
+        if packed is not None:
+            try:
+                response = dependency("groq").call(get_llm().invoke, packed.text, config=config,
+                                                   max_tokens=packed.answer_tokens)
+            except Exception:
+                pass  # LLM unavailable: answer from earlier generation or the fallback text
+        return cls._finish(state, response)
+
+    @classmethod
+    async def aprocess(cls, state: AgentState, config=None) -> AgentState:
+        packed = cls._build_prompt(state)
+        response = None
+        if packed is not None:
+            try:
+                response = await dependency("groq").acall(get_llm().ainvoke, packed.text, config=config,
+                                                          max_tokens=packed.answer_tokens)
+            except Exception:
+                pass  # LLM unavailable: answer from earlier generation or the fallback text
+        return cls._finish(state, response)
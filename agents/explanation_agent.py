@@ -1,6 +1,6 @@
 # agents/explanation_agent.py
 from tools.language_utils import get_language_prompts
-from core.state import AgentState
+from core.state import AgentState, Role, conversation_log
 
 class ExplanationAgent:
     @staticmethod
@@ -8,5 +8,5 @@ class ExplanationAgent:
         current_language = state.get("language", "en")
         prompts = get_language_prompts(current_language)
         explanation = prompts["explanation"]
-        state["conversation_history"].append(f"AI Explanation: {explanation}")
+        conversation_log(state).add(Role.EXPLANATION, explanation)
         return state
\ No newline at end of file
@@ -1,42 +1,65 @@
 # agents/llm_agent.py
 from tools.llm_client import get_llm
-from tools.language_utils import get_language_prompts, detect_language_change, format_prompt
+from tools.language_utils import get_language_prompts, detect_language_change, build_prompt
+from tools.prompt_budget import PackedPrompt
 from core.state import AgentState
+from core.resilience import dependency
+from .memory_agent import MemoryAgent
 
 class LLMAgent:
-    llm = get_llm()
-    
+    @staticmethod
+    def _build_prompt(state: AgentState) -> PackedPrompt:
+        # Detect language change from user input
+        current_language = state.get("language", "en")
+        detected_language = detect_language_change(state["question"], current_language)
+        
+        # Update language if changed
+        if detected_language != current_language:
+            state["language"] = detected_language
+            current_language = detected_language
+        
+        # Get language-specific prompts
+        prompts = get_language_prompts(current_language)
+        
+        # Format prompt in the selected language, within the token budget
+        packed = build_prompt(current_language, MemoryAgent.context(state, 10), state['question'])
+        state["prompt_tokens"] = packed.tokens
+        return packed
+
+    @staticmethod
+    def _apply_response(state: AgentState, response) -> AgentState:
+        answer = response.content.strip()
+
+        if answer:
+            state["generation"] = answer
+            state["llm_success"] = True
+        else:
+            state["llm_success"] = False
+        return state
+
     @classmethod
-    def process(cls, state: AgentState) -> AgentState:
+    def process(cls, state: AgentState, config=None) -> AgentState:
         try:
-            # Detect language change from user input
-            current_language = state.get("language", "en")
-            detected_language = detect_language_change(state["question"], current_language)
-            
-            # Update language if changed
-            if detected_language != current_language:
-                state["language"] = detected_language
-                current_language = detected_language
-            
-            # Get language-specific prompts
-            prompts = get_language_prompts(current_language)
-            
-            # Prepare context
-            ctx = "\n".join(state.get("conversation_history", [])[-10:])
-            
-            # Format prompt in the selected language
-            prompt = format_prompt(current_language, ctx, state['question'])
+            packed = cls._build_prompt(state)
+            # Forward the node config so streamed tokens reach the graph's callbacks
+            response = dependency("groq").call(get_llm().invoke, packed.text, config=config,
+                                               max_tokens=packed.answer_tokens)
+            cls._apply_response(state, response)
+        except Exception:
+            state["llm_success"] = False
 
-            response = cls.llm.invoke(prompt)
-            answer = response.content.strip()
+        state["llm_attempted"] = True
+        return state
 
-            if answer:
-                state["generation"] = answer
-                state["llm_success"] = True
-            else:
-                state["llm_success"] = False
+    @classmethod
+    async def aprocess(cls, state: AgentState, config=None) -> AgentState:
+        try:
+            packed = cls._build_prompt(state)
+            response = await dependency("groq").acall(get_llm().ainvoke, packed.text, config=config,
+                                                      max_tokens=packed.answer_tokens)
+            cls._apply_response(state, response)
         except Exception:
             state["llm_success"] = False
 
         state["llm_attempted"] = True
-        return state
\ No newline at end of file
+        return state
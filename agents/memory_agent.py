@@ -1,11 +1,136 @@
 # agents/memory_agent.py
-from core.state import AgentState
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+from core.state import AgentState, conversation_log
+from core.resilience import dependency
+from tools.llm_client import get_llm
+from tools.prompt_budget import count_tokens, truncate_tokens
+from tools.session_store import get_session_store
+
+# window: keep the last 20 history lines; summary: fold older turns into a running clinical summary
+MEMORY_MODE = os.getenv("MEMORY_MODE", "window")
+# Raw lines kept next to the summary
+MEMORY_RECENT_LINES = int(os.getenv("MEMORY_RECENT_LINES", "6"))
+# Older lines that accumulate before a fold, so the summarizer runs every few turns, not every turn
+MEMORY_FOLD_LINES = int(os.getenv("MEMORY_FOLD_LINES", "6"))
+MEMORY_SUMMARY_TOKENS = int(os.getenv("MEMORY_SUMMARY_TOKENS", "250"))
+# Summary plus recent lines handed to the prompt
+MEMORY_TOKEN_CAP = int(os.getenv("MEMORY_TOKEN_CAP", "800"))
+
+SUMMARY_PREFIX = "Summary of earlier consultation:"
+
+SUMMARY_PROMPT = """You maintain a concise clinical summary of a patient consultation.
+Merge the earlier summary with the new conversation lines into one updated summary.
+Keep symptoms and their duration, existing conditions, medications, allergies, test results and the advice already given.
+Drop greetings and small talk. Write plain sentences, at most {words} words, in the language of the conversation.
+
+Earlier summary:
+{summary}
+
+New conversation lines:
+{lines}
+
+Updated summary:"""
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="memory-compaction")
+_in_progress = set()
+_in_progress_lock = threading.Lock()
+
 
 class MemoryAgent:
     @staticmethod
     def process(state: AgentState) -> AgentState:
-        history = state.get("conversation_history", [])
-        if len(history) > 20:
-            history = history[-20:]  # keep last 20 messages
-        state["conversation_history"] = history
-        return state
\ No newline at end of file
+        # The log's deque keeps the last CONVERSATION_LOG_SIZE turns
+        log = conversation_log(state)
+        if MEMORY_MODE != "summary":
+            return state
+
+        # Stored lines are exactly those the summary doesn't cover yet (compact() removes the rest),
+        # so all of them stay, newest first, as long as they fit under the cap next to the summary
+        summary = truncate_tokens(state.get("conversation_summary") or "", MEMORY_SUMMARY_TOKENS)
+        budget = MEMORY_TOKEN_CAP - count_tokens(summary)
+        keep = len(log)
+        while keep and log.tokens(keep) > budget:
+            keep -= 1
+        log.keep_last(keep)
+        state["conversation_summary"] = summary
+        return state
+
+    @staticmethod
+    def context(state: AgentState, lines: int) -> List[str]:
+        """
+        History for a prompt: the running summary (if any) and the last `lines`
+        patient-visible turns. In summary mode every turn process() kept is
+        included, so nothing falls between the summary and the prompt.
+        """
+        log = conversation_log(state)
+        history = log.window(len(log) if MEMORY_MODE == "summary" else lines)
+        summary = state.get("conversation_summary")
+        return [f"{SUMMARY_PREFIX} {summary}", *history] if summary else list(history)
+
+    @staticmethod
+    def needs_compaction(data: dict) -> bool:
+        return len(data.get("history", [])) >= MEMORY_RECENT_LINES + MEMORY_FOLD_LINES
+
+    @staticmethod
+    def summarize(summary: str, lines: List[str]) -> str:
+        prompt = SUMMARY_PROMPT.format(words=int(MEMORY_SUMMARY_TOKENS * 0.7), summary=summary or "(none)",
+                                       lines="\n".join(lines))
+        response = dependency("groq").call(get_llm().invoke, prompt)
+        return truncate_tokens(response.content.strip(), MEMORY_SUMMARY_TOKENS)
+
+    @staticmethod
+    def _trimmed(before: List[str], after: List[str]) -> int:
+        """How many lines the store dropped off the front of `before`, given after = before[n:] + new lines."""
+        for n in range(len(before) + 1):
+            if after[:len(before) - n] == before[n:]:
+                return n
+        return len(before)
+
+    @classmethod
+    def compact(cls, key: str) -> bool:
+        """Fold a stored conversation's older lines into its summary. Returns True if it did."""
+        store = get_session_store()
+        data = store.get(key)
+        if not data or not cls.needs_compaction(data):
+            return False
+        snapshot = data["history"]
+        folded = len(snapshot) - MEMORY_RECENT_LINES
+        summary = cls.summarize(data.get("summary", ""), snapshot[:folded])
+
+        # Turns may have been added (and old ones trimmed) while the summarizer ran
+        while True:
+            latest = store.get(key) or data
+            history = latest.get("history", [])
+            trimmed = cls._trimmed(snapshot, history)
+            if trimmed <= folded:
+                history = history[folded - trimmed:]  # drop only the lines the summary covers
+                break
+            # The store trimmed lines the summary doesn't cover yet: fold them in too, then re-check
+            summary = cls.summarize(summary, snapshot[folded:trimmed])
+            folded = trimmed
+        store.save(key, dict(latest, history=history, summary=summary))
+        return True
+
+    @classmethod
+    def schedule_compaction(cls, key: str, data: dict):
+        """Run compact(key) in the background if the conversation has grown enough."""
+        if MEMORY_MODE != "summary" or not cls.needs_compaction(data):
+            return
+        with _in_progress_lock:
+            if key in _in_progress:
+                return
+            _in_progress.add(key)
+
+        def run():
+            try:
+                cls.compact(key)
+            except Exception as e:
+                print(f"Conversation summary failed, keeping raw history: {e}")
+            finally:
+                with _in_progress_lock:
+                    _in_progress.discard(key)
+
+        _executor.submit(run)
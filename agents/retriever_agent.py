@@ -1,28 +1,84 @@
 # agents/retriever_agent.py
-from tools.vector_store import get_retriever
-from core.state import AgentState
+import asyncio
+from core.resources import registry
+from tools.vector_store import get_retriever, get_embeddings
+from tools.query_builder import build_retrieval_query
+from core.state import AgentState, conversation_log
 
 class RetrieverAgent:
-    retriever = get_retriever()
-    
+    @staticmethod
+    def build_query(state: AgentState) -> str:
+        return build_retrieval_query(state["question"], conversation_log(state).window())
+
+    @classmethod
+    def prime_queries(cls, states) -> int:
+        """
+        Embed the retrieval queries (and questions, for the answer cache) of
+        many requests in one model call, so their later lookups are cache hits.
+        Returns the number of texts embedded; 0 when query embeddings are not cached.
+        """
+        embeddings = get_embeddings()
+        if not hasattr(embeddings, "embed_queries"):
+            return 0
+        texts = {}
+        for state in states:
+            query = cls.build_query(state)
+            for text in (state["question"], str(query), *getattr(query, "turns", ())):
+                texts[text] = None
+        embeddings.embed_queries(list(texts))
+        return len(texts)
+
+    @staticmethod
+    def retrieve(query: str):
+        return get_retriever().invoke(query)
+
+    @staticmethod
+    async def aretrieve(query: str):
+        # First use may build the index; keep that off the event loop
+        if registry.is_loaded("retriever"):
+            retriever = get_retriever()
+        else:
+            retriever = await asyncio.to_thread(get_retriever)
+        return await retriever.ainvoke(query)
+
+    @staticmethod
+    def _apply_docs(state: AgentState, docs) -> AgentState:
+        if docs and len(docs) > 0:
+            state["documents"] = docs
+            state["rag_success"] = True
+            conversation_log(state).status("Retrieved documents from medical PDF database.")
+        else:
+            state["documents"] = []
+            state["rag_success"] = False
+        return state
+
     @classmethod
     def process(cls, state: AgentState) -> AgentState:
-        query = state["question"]
-        context = "\n".join(state.get("conversation_history", [])[-6:])
-        combined_query = f"Context: {context}\nQuestion: {query}"
+        # Documents fetched speculatively while the LLM was answering
+        docs = state.get("prefetched_documents")
+        state["prefetched_documents"] = None
+        try:
+            if docs is None:
+                docs = cls.retrieve(cls.build_query(state))
+            cls._apply_docs(state, docs)
+        except Exception:
+            state["documents"] = []
+            state["rag_success"] = False
 
+        state["rag_attempted"] = True
+        return state
+
+    @classmethod
+    async def aprocess(cls, state: AgentState) -> AgentState:
+        docs = state.get("prefetched_documents")
+        state["prefetched_documents"] = None
         try:
-            docs = cls.retriever.invoke(combined_query)
-            if docs and len(docs) > 0:
-                state["documents"] = docs
-                state["rag_success"] = True
-                state["conversation_history"].append("AI: Retrieved documents from medical PDF database.")
-            else:
-                state["documents"] = []
-                state["rag_success"] = False
+            if docs is None:
+                docs = await cls.aretrieve(cls.build_query(state))
+            cls._apply_docs(state, docs)
         except Exception:
             state["documents"] = []
             state["rag_success"] = False
 
         state["rag_attempted"] = True
-        return state
\ No newline at end of file
+        return state
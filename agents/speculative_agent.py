@@ -0,0 +1,60 @@
+# agents/speculative_agent.py
+import os
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from core.state import AgentState
+from .llm_agent import LLMAgent
+from .retriever_agent import RetrieverAgent
+
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="speculative-retrieval")
+
+# How long the fallback path waits for the speculative lookup before RetrieverAgent tries again itself
+SPECULATIVE_RETRIEVAL_TIMEOUT = float(os.getenv("SPECULATIVE_RETRIEVAL_TIMEOUT", "10"))
+
+
+class SpeculativeLLMAgent:
+    """
+    LLMAgent with the vector store lookup started in parallel.
+    If the LLM answers, the retrieval is cancelled (or its result dropped);
+    if it fails, the documents are handed to RetrieverAgent via
+    state["prefetched_documents"] so the fallback path skips the lookup.
+    """
+
+    @staticmethod
+    def _keep_if_needed(state: AgentState, docs) -> AgentState:
+        state["prefetched_documents"] = None if state.get("llm_success") else docs
+        return state
+
+    @classmethod
+    def process(cls, state: AgentState, config=None) -> AgentState:
+        future = _executor.submit(RetrieverAgent.retrieve, RetrieverAgent.build_query(state))
+        LLMAgent.process(state, config)
+
+        if state.get("llm_success"):
+            future.cancel()
+            return cls._keep_if_needed(state, None)
+        try:
+            docs = future.result(timeout=SPECULATIVE_RETRIEVAL_TIMEOUT)
+        except Exception:
+            future.cancel()
+            docs = None  # RetrieverAgent retries and handles the error (or the timeout)
+        return cls._keep_if_needed(state, docs)
+
+    @classmethod
+    async def aprocess(cls, state: AgentState, config=None) -> AgentState:
+        task = asyncio.create_task(RetrieverAgent.aretrieve(RetrieverAgent.build_query(state)))
+        await LLMAgent.aprocess(state, config)
+
+        if state.get("llm_success"):
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass  # the answer doesn't need the documents
+            return cls._keep_if_needed(state, None)
+        try:
+            # wait_for cancels the lookup if it times out
+            docs = await asyncio.wait_for(task, timeout=SPECULATIVE_RETRIEVAL_TIMEOUT)
+        except Exception:
+            docs = None  # RetrieverAgent retries and handles the error
+        return cls._keep_if_needed(state, docs)
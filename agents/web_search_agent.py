@@ -0,0 +1,145 @@
+# agents/web_search_agent.py
+import os
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, List, Tuple
+from core.state import AgentState, conversation_log
+from core.resources import registry
+from core.resilience import dependency
+from tools.search_cache import cached_search, is_usable
+from .wikipedia_agent import WIKIPEDIA_CACHE_SOURCE
+from langchain_core.documents import Document
+
+# After the first usable answer, wait this long for the other source to merge it in
+WEB_SEARCH_GRACE = float(os.getenv("WEB_SEARCH_GRACE", "0.3"))
+
+_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="web-search")
+
+
+class WebSource:
+    """One web lookup: a blocking fetch(query) -> str with its own deadline."""
+
+    def __init__(self, name: str, flag: str, label: str, fetch: Callable[[str], str], timeout: float):
+        self.name = name
+        self.flag = flag  # state key prefix, e.g. "wiki" -> wiki_attempted / wiki_success
+        self.label = label
+        self.fetch = fetch
+        self.timeout = timeout
+
+
+def _guarded_source(name: str, flag: str, label: str, cache_source: str = None) -> WebSource:
+    # Cache hits skip the breaker; with the circuit open a miss fails fast instead of calling out.
+    # One attempt only: the hedge's deadline is a single attempt's timeout, and a retry it has
+    # stopped waiting for would keep holding threads in both pools
+    dep = dependency(name)
+    fetch = lambda query: cached_search(cache_source or name, query,
+                                        lambda q: dep.call_once(registry.get(name).run, q))
+    return WebSource(name, flag, label, fetch, dep.timeout)
+
+
+def default_sources() -> List[WebSource]:
+    return [
+        _guarded_source("wikipedia", "wiki", "Wikipedia", WIKIPEDIA_CACHE_SOURCE),
+        _guarded_source("duckduckgo", "ddg", "DuckDuckGo"),
+    ]
+
+
+def _next_wait(pending_deadlines, first_at, grace, now) -> float:
+    wakeups = list(pending_deadlines)
+    if first_at is not None:
+        wakeups.append(first_at + grace)
+    return max(min(wakeups) - now, 0.0)
+
+
+def hedged_fetch(sources: List[WebSource], query: str, grace: float = WEB_SEARCH_GRACE) -> List[Tuple[WebSource, str]]:
+    """
+    Query all sources concurrently and return [(source, content)] in source order.
+    Returns as soon as one source has a usable result and the grace window has
+    passed (or every source finished/timed out); the rest are abandoned.
+    """
+    started = time.monotonic()
+    futures = {_executor.submit(source.fetch, query): source for source in sources}
+    deadlines = {future: started + source.timeout for future, source in futures.items()}
+    results = {}
+    first_at = None
+    pending = set(futures)
+
+    while pending:
+        now = time.monotonic()
+        if first_at is not None and now >= first_at + grace:
+            break
+        done, pending = wait(pending, timeout=_next_wait([deadlines[f] for f in pending], first_at, grace, now),
+                             return_when=FIRST_COMPLETED)
+        for future in done:
+            try:
+                content = future.result()
+            except Exception:
+                continue
+            if is_usable(content):
+                results[futures[future]] = content
+                first_at = first_at if first_at is not None else time.monotonic()
+        now = time.monotonic()
+        pending = {f for f in pending if deadlines[f] > now}
+
+    for future in futures:
+        if not future.done():
+            future.cancel()  # a thread already running its HTTP call finishes in the background
+    return [(source, results[source]) for source in sources if source in results]
+
+
+async def ahedged_fetch(sources: List[WebSource], query: str, grace: float = WEB_SEARCH_GRACE) -> List[Tuple[WebSource, str]]:
+    """Async variant of hedged_fetch; losing lookups are cancelled and no longer awaited."""
+    loop = asyncio.get_running_loop()
+    started = time.monotonic()
+    tasks = {asyncio.ensure_future(loop.run_in_executor(_executor, source.fetch, query)): source
+             for source in sources}
+    deadlines = {task: started + source.timeout for task, source in tasks.items()}
+    results = {}
+    first_at = None
+    pending = set(tasks)
+
+    while pending:
+        now = time.monotonic()
+        if first_at is not None and now >= first_at + grace:
+            break
+        done, pending = await asyncio.wait(pending, timeout=_next_wait([deadlines[t] for t in pending], first_at, grace, now),
+                                           return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            if task.exception() is None and is_usable(task.result()):
+                results[tasks[task]] = task.result()
+                first_at = first_at if first_at is not None else time.monotonic()
+        now = time.monotonic()
+        pending = {t for t in pending if deadlines[t] > now}
+
+    for task in tasks:
+        if not task.done():
+            task.cancel()
+    return [(source, results[source]) for source in sources if source in results]
+
+
+class WebSearchAgent:
+    """Combined Wikipedia + DuckDuckGo fallback: both queried at once, first usable answer wins."""
+
+    sources = staticmethod(default_sources)
+
+    @classmethod
+    def _apply_results(cls, state: AgentState, results) -> AgentState:
+        succeeded = {source.name for source, _ in results}
+        for source in cls.sources():
+            state[f"{source.flag}_attempted"] = True
+            state[f"{source.flag}_success"] = source.name in succeeded
+
+        state["documents"] = [Document(page_content=content, metadata={"source": source.name})
+                              for source, content in results]
+        for source, _ in results:
+            conversation_log(state).status(f"Retrieved information from {source.label}.")
+        return state
+
+    @classmethod
+    def process(cls, state: AgentState) -> AgentState:
+        return cls._apply_results(state, hedged_fetch(cls.sources(), state["question"]))
+
+    @classmethod
+    async def aprocess(cls, state: AgentState) -> AgentState:
+        return cls._apply_results(state, await ahedged_fetch(cls.sources(), state["question"]))
@@ -1,29 +1,72 @@
 # agents/wikipedia_agent.py
-from langchain_community.utilities.wikipedia import WikipediaAPIWrapper
-from core.state import AgentState
+import os
+import asyncio
+from core.state import AgentState, conversation_log
+from core.resources import registry
+from core.resilience import dependency
+from tools.search_cache import cached_search, acached_search
 from langchain.schema import Document
 
+# live: query wikipedia.org; local: answer from the offline index built by tools.local_encyclopedia
+WIKIPEDIA_MODE = os.getenv("WIKIPEDIA_MODE", "live")
+# Search cache key: live and local answers differ, so they are cached apart
+WIKIPEDIA_CACHE_SOURCE = f"wikipedia-{WIKIPEDIA_MODE}"
+
+
+def _create_wiki():
+    if WIKIPEDIA_MODE == "local":
+        from tools.local_encyclopedia import LocalEncyclopedia
+        return LocalEncyclopedia()
+
+    from langchain_community.utilities.wikipedia import WikipediaAPIWrapper
+    from tools.replay import wrap_tool
+    params = {
+        "top_k_results": 2,
+        "doc_content_chars_max": 2000,
+        "load_all_available_meta": True
+    }
+    return wrap_tool("wikipedia", WikipediaAPIWrapper(**params), params)
+
+
+registry.register("wikipedia", _create_wiki)
+
+
 class WikipediaAgent:
-    wiki = WikipediaAPIWrapper(
-        top_k_results=2,
-        doc_content_chars_max=2000,
-        load_all_available_meta=True
-    )
-    
+    @staticmethod
+    def _apply_content(state: AgentState, content) -> AgentState:
+        if content:
+            state["documents"] = [Document(page_content=content)]
+            state["wiki_success"] = True
+            conversation_log(state).status("Retrieved information from Wikipedia.")
+        else:
+            state["documents"] = []
+            state["wiki_success"] = False
+        return state
+
     @classmethod
     def process(cls, state: AgentState) -> AgentState:
         try:
-            content = cls.wiki.run(state["question"])
-            if content:
-                state["documents"] = [Document(page_content=content)]
-                state["wiki_success"] = True
-                state["conversation_history"].append("AI: Retrieved information from Wikipedia.")
-            else:
-                state["documents"] = []
-                state["wiki_success"] = False
+            content = cached_search(WIKIPEDIA_CACHE_SOURCE, state["question"],
+                                    lambda q: dependency("wikipedia").call(registry.get("wikipedia").run, q))
+            cls._apply_content(state, content)
+        except Exception:
+            state["documents"] = []
+            state["wiki_success"] = False
+
+        state["wiki_attempted"] = True
+        return state
+
+    @classmethod
+    async def aprocess(cls, state: AgentState) -> AgentState:
+        try:
+            # The search wrappers are blocking HTTP clients; run them off the event loop
+            content = await acached_search(
+                WIKIPEDIA_CACHE_SOURCE, state["question"],
+                lambda q: dependency("wikipedia").acall(asyncio.to_thread, registry.get("wikipedia").run, q))
+            cls._apply_content(state, content)
         except Exception:
             state["documents"] = []
             state["wiki_success"] = False
 
         state["wiki_attempted"] = True
-        return state
\ No newline at end of file
+        return state
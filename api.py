@@ -1,11 +1,21 @@
 # api.py
-from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from datetime import datetime
 import os
+import time
+import asyncio
+from typing import List
 from core.langgraph_workflow import setup_workflow
 from core.state import initialize_state
+from core.resources import registry
+from core.streaming import astream_workflow, format_sse
+from core.resilience import breaker_stats
+from tools.semantic_cache import lookup_answer, cache_answer, get_answer_cache
+from tools.search_cache import get_search_cache
+from tools.session_store import get_session_store, new_session_id, append_history
+from agents import MemoryAgent, RetrieverAgent
 from pydantic import BaseModel
 
 app = FastAPI(title="Medical AI Assistant API")
@@ -21,61 +31,231 @@ app.add_middleware(
 # Initialize workflow
 workflow = setup_workflow()
 
-# Session storage (in production, use Redis or database)
-sessions = {}
+# Batch items running through the workflow at once; size it to the LLM provider's rate limit
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "1000"))
 
 class ChatRequest(BaseModel):
     message: str
     conversation_id: str = None
     language: str = "en"  # Add language support
 
+class BatchItem(BaseModel):
+    message: str
+    language: str = "en"
+
+class BatchChatRequest(BaseModel):
+    items: List[BatchItem]
+
 class ChatResponse(BaseModel):
     response: str
     timestamp: str
     conversation_id: str
     language: str  # Add language to response
 
+def prepare_conversation(chat_request: ChatRequest) -> dict:
+    """Load (or start) the conversation from the session store and build this turn's state."""
+    store = get_session_store()
+    data = store.get(chat_request.conversation_id) if chat_request.conversation_id else None
+    if data is None:
+        # Unknown or expired ids start a new conversation under a fresh id
+        chat_request.conversation_id = new_session_id()
+        data = {"history": []}
+
+    # Update conversation history
+    append_history(data, f"User: {chat_request.message}", limit=store.history_limit)
+
+    # Fresh state per turn; agents build their own log from the stored lines
+    state = initialize_state()
+    state.update({
+        "question": chat_request.message,
+        "language": chat_request.language,
+        "conversation_history": data["history"],
+        "conversation_summary": data.get("summary", "")
+    })
+    return {"data": data, "history": data["history"], "state": state}
+
+def finish_conversation(chat_request: ChatRequest, conversation_data: dict, result: dict) -> dict:
+    """Record the reply in the history, save the conversation and build the response payload."""
+    # Update history with response
+    store = get_session_store()
+    data = conversation_data["data"]
+    append_history(data, f"Doctor: {result.get('generation', '')}", limit=store.history_limit)
+    store.save(chat_request.conversation_id, data)
+    # Summarizing older turns (MEMORY_MODE=summary) happens after the response, in the background
+    MemoryAgent.schedule_compaction(chat_request.conversation_id, data)
+    
+    return {
+        "response": result.get("generation", "I couldn't generate a response."),
+        "timestamp": datetime.now().strftime("%H:%M"),
+        "conversation_id": chat_request.conversation_id,
+        "language": result.get("language", chat_request.language),
+        "source": result.get("source", ""),
+        "prompt_tokens": result.get("prompt_tokens", 0)
+    }
+
+def prior_history(conversation_data: dict) -> list:
+    # Everything before this turn's question
+    return conversation_data["history"][:-1]
+
+async def lookup_cached(chat_request: ChatRequest, conversation_data: dict):
+    """Semantic cache lookup (embedding runs off the event loop); only fresh conversations qualify."""
+    return await asyncio.to_thread(lookup_answer, chat_request.message, chat_request.language,
+                                   prior_history(conversation_data))
+
+async def store_cached(chat_request: ChatRequest, conversation_data: dict, result: dict):
+    """Cache a workflow answer; follow-ups in an ongoing conversation are not stored."""
+    await asyncio.to_thread(cache_answer, chat_request.message, chat_request.language, result,
+                            prior_history(conversation_data))
+
+async def answer_events(chat_request: ChatRequest, conversation_data: dict):
+    """Yield ("token", text) / ("reset", None) events and a final ("done", response payload)."""
+    cached = await lookup_cached(chat_request, conversation_data)
+    if cached:
+        yield "done", await asyncio.to_thread(finish_conversation, chat_request, conversation_data, cached)
+        return
+
+    async for event, data in astream_workflow(workflow, conversation_data["state"]):
+        if event == "done":
+            await store_cached(chat_request, conversation_data, data or {})
+            data = await asyncio.to_thread(finish_conversation, chat_request, conversation_data, data or {})
+        yield event, data
+
 @app.post("/chat")
 async def chat_handler(chat_request: ChatRequest):
     try:
-        # Get or create conversation
-        if chat_request.conversation_id and chat_request.conversation_id in sessions:
-            conversation_data = sessions[chat_request.conversation_id]
-        else:
-            conversation_id = datetime.now().strftime("%Y%m%d%H%M%S")
-            conversation_data = {
-                "history": [],
-                "state": initialize_state()
-            }
-            sessions[conversation_id] = conversation_data
-            chat_request.conversation_id = conversation_id
+        conversation_data = await asyncio.to_thread(prepare_conversation, chat_request)
 
-        # Update conversation history
-        conversation_data["history"].append(f"User: {chat_request.message}")
-        
-        # Prepare state
-        conversation_data["state"].update({
-            "question": chat_request.message,
-            "language": chat_request.language,
-            "conversation_history": conversation_data["history"]
-        })
-
-        # Process through workflow
-        result = workflow.invoke(conversation_data["state"])
-        
-        # Update history with response
-        conversation_data["history"].append(f"Doctor: {result.get('generation', '')}")
+        result = await lookup_cached(chat_request, conversation_data)
+        if result is None:
+            # Process through workflow without blocking the event loop
+            result = await workflow.ainvoke(conversation_data["state"])
+            await store_cached(chat_request, conversation_data, result)
         
-        return JSONResponse({
-            "response": result.get("generation", "I couldn't generate a response."),
-            "timestamp": datetime.now().strftime("%H:%M"),
-            "conversation_id": chat_request.conversation_id,
-            "language": result.get("language", chat_request.language)
-        })
+        return JSONResponse(await asyncio.to_thread(finish_conversation, chat_request, conversation_data, result))
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/chat/stream")
+async def chat_stream_handler(chat_request: ChatRequest):
+    """Server-sent events: one "token" event per LLM token, then a trailing "done" event with metadata."""
+    conversation_data = await asyncio.to_thread(prepare_conversation, chat_request)
+
+    async def event_stream():
+        try:
+            async for event, data in answer_events(chat_request, conversation_data):
+                yield format_sse(event, data)
+        except Exception as e:
+            yield format_sse("error", {"detail": str(e)})
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.websocket("/chat/ws")
+async def chat_websocket(websocket: WebSocket):
+    """WebSocket variant of /chat/stream; accepts one ChatRequest JSON message per turn."""
+    await websocket.accept()
+    try:
+        while True:
+            chat_request = ChatRequest(**await websocket.receive_json())
+            conversation_data = await asyncio.to_thread(prepare_conversation, chat_request)
+            try:
+                async for event, data in answer_events(chat_request, conversation_data):
+                    await websocket.send_json({"event": event, "data": data})
+            except Exception as e:
+                await websocket.send_json({"event": "error", "data": {"detail": str(e)}})
+    except WebSocketDisconnect:
+        pass
+
+def prepare_batch_item(item: BatchItem) -> dict:
+    """State for one independent batch question: no stored conversation behind it."""
+    state = initialize_state()
+    state.update({
+        "question": item.message,
+        "language": item.language,
+        "conversation_history": [f"User: {item.message}"]
+    })
+    return state
+
+async def answer_batch_item(index: int, item: BatchItem, state: dict, semaphore: asyncio.Semaphore) -> dict:
+    queued = time.perf_counter()
+    async with semaphore:
+        started = time.perf_counter()
+        try:
+            result = await asyncio.to_thread(lookup_answer, item.message, item.language, [])
+            cached = result is not None
+            if result is None:
+                result = await workflow.ainvoke(state)
+                await asyncio.to_thread(cache_answer, item.message, item.language, result)
+            payload = {
+                "response": result.get("generation", "I couldn't generate a response."),
+                "language": result.get("language", item.language),
+                "source": result.get("source", ""),
+                "prompt_tokens": result.get("prompt_tokens", 0),
+                "cached": cached,
+                "error": None
+            }
+        except Exception as e:
+            # One failed question must not fail the rest of the batch
+            payload = {"response": None, "language": item.language, "error": str(e)}
+        finished = time.perf_counter()
+    return dict(payload, index=index,
+                queued_ms=round((started - queued) * 1000, 1),
+                elapsed_ms=round((finished - started) * 1000, 1))
+
+@app.post("/chat/batch")
+async def chat_batch_handler(batch_request: BatchChatRequest):
+    """Answer many independent questions; results come back in request order with per-item timings."""
+    items = batch_request.items
+    if len(items) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {BATCH_MAX_ITEMS} items per batch")
+    started = time.perf_counter()
+    states = [prepare_batch_item(item) for item in items]
+
+    # One embedding call for every retrieval query, instead of one per item inside the workflow
+    try:
+        await asyncio.to_thread(RetrieverAgent.prime_queries, states)
+    except Exception as e:
+        print(f"Batch query embedding failed, items will embed individually: {e}")
+    embedded = time.perf_counter()
+
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+    results = await asyncio.gather(*(answer_batch_item(i, item, state, semaphore)
+                                     for i, (item, state) in enumerate(zip(items, states))))
+    return JSONResponse({
+        "results": results,
+        "count": len(results),
+        "errors": sum(1 for result in results if result["error"]),
+        "embedding_ms": round((embedded - started) * 1000, 1),
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        "timestamp": datetime.now().strftime("%H:%M")
+    })
+
+@app.get("/ready")
+async def ready_handler():
+    """Readiness probe: answers immediately and starts model warmup in the background."""
+    registry.start_warmup()
+    status = registry.status()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+@app.get("/stats")
+async def stats_handler():
+    """Cache and resource statistics for monitoring."""
+    answer_cache = get_answer_cache() if registry.is_loaded("answer_cache") else None
+    search_cache = get_search_cache() if registry.is_loaded("search_cache") else None
+    retriever = registry.get("retriever") if registry.is_loaded("retriever") else None
+    embeddings = registry.get("embeddings") if registry.is_loaded("embeddings") else None
+    session_store = get_session_store() if registry.is_loaded("session_store") else None
+    return JSONResponse({
+        "answer_cache": answer_cache.stats() if answer_cache else None,
+        "search_cache": search_cache.stats() if search_cache else None,
+        "retrieval": retriever.stats() if hasattr(retriever, "stats") else None,
+        "query_embeddings": embeddings.stats() if hasattr(embeddings, "stats") else None,
+        "sessions": await asyncio.to_thread(session_store.stats) if session_store else None,
+        "circuit_breakers": breaker_stats()
+    })
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
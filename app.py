@@ -1,19 +1,48 @@
-from flask import Flask, render_template, request, jsonify, session
+from flask import Flask, render_template, request, jsonify, session, Response, stream_with_context
 from core.langgraph_workflow import setup_workflow
 from core.state import initialize_state
+from core.resources import registry
+from core.streaming import stream_workflow, format_sse
+from core.resilience import breaker_stats
+from tools.semantic_cache import lookup_answer, cache_answer, get_answer_cache
+from tools.search_cache import get_search_cache
+from tools.session_store import get_session_store, new_session_id, append_history
+from agents import MemoryAgent
 from twilio.twiml.messaging_response import MessagingResponse
 from datetime import datetime
 import os
 import json
 
 app = Flask(__name__)
-app.secret_key = os.urandom(24)
+# Set FLASK_SECRET_KEY when running several workers so they accept each other's cookies
+app.secret_key = os.getenv("FLASK_SECRET_KEY") or os.urandom(24)
 
 workflow = setup_workflow()
 
+# Conversation history lives in the server-side session store (tools/session_store.py);
+# the cookie only carries the opaque conversation id.
+
+
+def _conversation_id() -> str:
+    if 'conversation_id' not in session:
+        session['conversation_id'] = new_session_id()
+    return session['conversation_id']
+
+
+def _load_conversation(key: str) -> dict:
+    return get_session_store().get(key) or {"history": []}
+
+
+def _save_conversation(key: str, data: dict, *lines: str):
+    store = get_session_store()
+    store.save(key, append_history(data, *lines, limit=store.history_limit))
+    # Summarizing older turns (MEMORY_MODE=summary) happens after the response, in the background
+    MemoryAgent.schedule_compaction(key, data)
+
+
 @app.route('/')
 def home():
-    session['conversation_id'] = datetime.now().strftime("%Y%m%d%H%M%S")
+    session['conversation_id'] = new_session_id()
     return render_template('index.html')
 
 @app.route('/chat', methods=['POST'])
@@ -21,27 +50,29 @@ def chat():
     user_input = request.json['message']
     language = request.json.get('language', 'en')  # Get selected language, default to English
     conversation_state = initialize_state()
-    
-    if 'history' not in session:
-        session['history'] = []
-    
-    session['history'].append(f"User: {user_input}")
+
+    conversation_id = _conversation_id()
+    conversation = _load_conversation(conversation_id)
+    history = conversation["history"] + [f"User: {user_input}"]
     
     # Include language in the conversation state
     conversation_state.update({
         "question": user_input,
         "language": language,  # Pass language to LLM
-        "conversation_history": session['history']
+        "conversation_history": history,
+        "conversation_summary": conversation.get("summary", "")
     })
     
-    # LLM workflow invocation
-    result = workflow.invoke(conversation_state)
+    # Reuse a cached answer for fresh conversations, otherwise run the workflow
+    result = lookup_answer(user_input, language, history[:-1])
+    if result is None:
+        result = workflow.invoke(conversation_state)
+        cache_answer(user_input, language, result, history[:-1])
     bot_response = result.get('generation', "I couldn't generate a response.")
     
-    # Update session with the current language (in case it changed)
-    session['current_language'] = result.get('language', language)
-    
-    session['history'].append(f"Doctor: {bot_response}")
+    # Remember the current language (in case it changed)
+    conversation["language"] = result.get('language', language)
+    _save_conversation(conversation_id, conversation, f"User: {user_input}", f"Doctor: {bot_response}")
     
     return jsonify({
         'response': bot_response,
@@ -50,32 +81,80 @@ def chat():
     })
 
 
+@app.route('/chat/stream', methods=['POST'])
+def chat_stream():
+    """Stream the answer as server-sent events: "token" events, then a "done" event with metadata."""
+    user_input = request.json['message']
+    language = request.json.get('language', 'en')
+
+    conversation_id = _conversation_id()
+    conversation = _load_conversation(conversation_id)
+    history = conversation["history"] + [f"User: {user_input}"]
+
+    conversation_state = initialize_state()
+    conversation_state.update({
+        "question": user_input,
+        "language": language,
+        "conversation_history": history,
+        "conversation_summary": conversation.get("summary", "")
+    })
+
+    cached = lookup_answer(user_input, language, history[:-1])
+
+    def generate():
+        try:
+            events = [("done", cached)] if cached else stream_workflow(workflow, conversation_state)
+            for event, data in events:
+                if event == "done":
+                    result = data or {}
+                    if not cached:
+                        cache_answer(user_input, language, result, history[:-1])
+                    bot_response = result.get('generation', "I couldn't generate a response.")
+                    # Saved server-side, so it doesn't matter that the cookie has already been sent
+                    conversation["language"] = result.get('language', language)
+                    _save_conversation(conversation_id, conversation,
+                                       f"User: {user_input}", f"Doctor: {bot_response}")
+                    data = {
+                        'response': bot_response,
+                        'timestamp': datetime.now().strftime("%H:%M"),
+                        'language': result.get('language', language),
+                        'source': result.get('source', ''),
+                        'conversation_id': conversation_id
+                    }
+                yield format_sse(event, data)
+        except Exception as e:
+            yield format_sse('error', {'detail': str(e)})
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
 @app.route("/whatsapp", methods=["POST"])
 def whatsapp_reply():
     """Respond to WhatsApp messages via Twilio."""
     incoming_msg = request.values.get("Body", "").strip()
     sender = request.values.get("From", "")
 
-    # Create a unique session per sender
-    if 'wa_history' not in session:
-        session['wa_history'] = {}
-
-    if sender not in session['wa_history']:
-        session['wa_history'][sender] = []
+    # Twilio webhooks carry no cookie: history is keyed by the sender's number
+    key = f"wa:{sender}"
+    conversation = _load_conversation(key)
 
     conversation_state = initialize_state()
     conversation_state.update({
         "question": incoming_msg,
         "language": "auto",
-        "conversation_history": session['wa_history'][sender]
+        "conversation_history": conversation["history"],
+        "conversation_summary": conversation.get("summary", "")
     })
 
+    # The language is only known once the workflow has detected it, so there is nothing to look up;
+    # cache_answer files the answer under the detected language (never under "auto")
     result = workflow.invoke(conversation_state)
+    cache_answer(incoming_msg, "auto", result, conversation["history"])
     bot_response = result.get("generation", "Sorry, I couldn't understand that.")
 
     # Update conversation history for this sender
-    session['wa_history'][sender].append(f"User: {incoming_msg}")
-    session['wa_history'][sender].append(f"Doctor: {bot_response}")
+    _save_conversation(key, conversation, f"User: {incoming_msg}", f"Doctor: {bot_response}")
 
     # Create Twilio response
     resp = MessagingResponse()
@@ -120,6 +199,32 @@ def accuracy_dashboard():
     return render_template('accuracy_dashboard.html')
 
 
+@app.route('/ready', methods=['GET'])
+def ready():
+    """Readiness probe: answers immediately and starts model warmup in the background."""
+    registry.start_warmup()
+    status = registry.status()
+    return jsonify(status), 200 if status['ready'] else 503
+
+
+@app.route('/stats', methods=['GET'])
+def stats():
+    """Cache and resource statistics for monitoring."""
+    answer_cache = get_answer_cache() if registry.is_loaded('answer_cache') else None
+    search_cache = get_search_cache() if registry.is_loaded('search_cache') else None
+    retriever = registry.get('retriever') if registry.is_loaded('retriever') else None
+    embeddings = registry.get('embeddings') if registry.is_loaded('embeddings') else None
+    session_store = get_session_store() if registry.is_loaded('session_store') else None
+    return jsonify({
+        'answer_cache': answer_cache.stats() if answer_cache else None,
+        'search_cache': search_cache.stats() if search_cache else None,
+        'retrieval': retriever.stats() if hasattr(retriever, 'stats') else None,
+        'query_embeddings': embeddings.stats() if hasattr(embeddings, 'stats') else None,
+        'sessions': session_store.stats() if session_store else None,
+        'circuit_breakers': breaker_stats()
+    })
+
+
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 5000))
     app.run(host="0.0.0.0", port=port)
@@ -1,6 +1,8 @@
 # core/langgraph_workflow.py
+import os
 from langgraph.graph import StateGraph
 from langgraph.graph import END
+from langchain_core.runnables import RunnableLambda
 from agents import MemoryAgent
 from agents import PlannerAgent
 from agents import LLMAgent
@@ -9,20 +11,42 @@ from agents import WikipediaAgent
 from agents import DuckDuckGoAgent
 from agents import ExecutorAgent
 from agents import ExplanationAgent
+from agents import SpeculativeLLMAgent
+from agents import WebSearchAgent
 
 from core.state import AgentState
+from core.resilience import dependency
 
-def setup_workflow():
+# Query the vector store in parallel with the LLM call so the fallback path
+# starts with documents in hand (costs one retrieval per request)
+SPECULATIVE_RETRIEVAL = os.getenv("SPECULATIVE_RETRIEVAL", "0") == "1"
+
+# Query Wikipedia and DuckDuckGo concurrently (first usable answer wins)
+# instead of trying them one after the other
+HEDGED_WEB_FALLBACK = os.getenv("HEDGED_WEB_FALLBACK", "1") == "1"
+
+def _node(agent):
+    """Wrap an agent so the graph calls process() under invoke() and aprocess() under ainvoke()."""
+    return RunnableLambda(agent.process, afunc=agent.aprocess, name=agent.__name__)
+
+def setup_workflow(speculative_retrieval: bool = None, hedged_web_fallback: bool = None):
     workflow = StateGraph(AgentState)
     
     # Add all agent nodes
     workflow.add_node("memory", MemoryAgent.process)
     workflow.add_node("planner", PlannerAgent.process)
-    workflow.add_node("llm_agent", LLMAgent.process)
-    workflow.add_node("retriever", RetrieverAgent.process)
-    workflow.add_node("wikipedia", WikipediaAgent.process)
-    workflow.add_node("duckduckgo", DuckDuckGoAgent.process)
-    workflow.add_node("executor", ExecutorAgent.process)
+    if speculative_retrieval is None:
+        speculative_retrieval = SPECULATIVE_RETRIEVAL
+    if hedged_web_fallback is None:
+        hedged_web_fallback = HEDGED_WEB_FALLBACK
+    workflow.add_node("llm_agent", _node(SpeculativeLLMAgent if speculative_retrieval else LLMAgent))
+    workflow.add_node("retriever", _node(RetrieverAgent))
+    if hedged_web_fallback:
+        workflow.add_node("web_search", _node(WebSearchAgent))
+    else:
+        workflow.add_node("wikipedia", _node(WikipediaAgent))
+        workflow.add_node("duckduckgo", _node(DuckDuckGoAgent))
+    workflow.add_node("executor", _node(ExecutorAgent))
     workflow.add_node("explanation", ExplanationAgent.process)
     
     # Set entry point
@@ -30,7 +54,18 @@ def setup_workflow():
     
     # Define edges and conditional routing
     workflow.add_edge("memory", "planner")
-    workflow.add_edge("planner", "llm_agent")
+    
+    # Stages whose dependency has an open circuit breaker are skipped outright
+    def route_after_planner(state: AgentState):
+        if dependency("groq").available():
+            return "llm_agent"
+        return "retriever"
+    
+    workflow.add_conditional_edges(
+        "planner",
+        route_after_planner,
+        {"llm_agent": "llm_agent", "retriever": "retriever"}
+    )
     
     def route_after_llm(state: AgentState):
         if state.get("llm_success", False):
@@ -46,33 +81,49 @@ def setup_workflow():
     def route_after_rag(state: AgentState):
         if state.get("rag_success", False):
             return "executor"
-        return "wikipedia"
+        if hedged_web_fallback:
+            web_up = dependency("wikipedia").available() or dependency("duckduckgo").available()
+            return "web_search" if web_up else "executor"
+        if dependency("wikipedia").available():
+            return "wikipedia"
+        if dependency("duckduckgo").available():
+            return "duckduckgo"
+        return "executor"
+    
+    rag_targets = {"executor": "executor"}
+    if hedged_web_fallback:
+        rag_targets["web_search"] = "web_search"
+    else:
+        rag_targets.update({"wikipedia": "wikipedia", "duckduckgo": "duckduckgo"})
     
     workflow.add_conditional_edges(
         "retriever",
         route_after_rag,
-        {"executor": "executor", "wikipedia": "wikipedia"}
+        rag_targets
     )
     
-    def route_after_wiki(state: AgentState):
-        if state.get("wiki_success", False):
+    if hedged_web_fallback:
+        workflow.add_edge("web_search", "executor")
+    else:
+        def route_after_wiki(state: AgentState):
+            if state.get("wiki_success", False) or not dependency("duckduckgo").available():
+                return "executor"
+            return "duckduckgo"
+        
+        workflow.add_conditional_edges(
+            "wikipedia",
+            route_after_wiki,
+            {"executor": "executor", "duckduckgo": "duckduckgo"}
+        )
+        
+        def route_after_ddg(state: AgentState):
             return "executor"
-        return "duckduckgo"
-    
-    workflow.add_conditional_edges(
-        "wikipedia",
-        route_after_wiki,
-        {"executor": "executor", "duckduckgo": "duckduckgo"}
-    )
-    
-    def route_after_ddg(state: AgentState):
-        return "executor"
-    
-    workflow.add_conditional_edges(
-        "duckduckgo",
-        route_after_ddg,
-        {"executor": "executor"}
-    )
+        
+        workflow.add_conditional_edges(
+            "duckduckgo",
+            route_after_ddg,
+            {"executor": "executor"}
+        )
     
     workflow.add_edge("executor", "explanation")
     workflow.add_edge("explanation", END)
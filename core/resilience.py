@@ -0,0 +1,204 @@
+# core/resilience.py
+import os
+import time
+import random
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Dict
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+_timeout_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="dependency-call")
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a dependency whose breaker is open."""
+
+
+class DependencyTimeoutError(TimeoutError):
+    """Raised when a dependency call exceeds its deadline."""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+    closed -> open after failure_threshold failures in a row; open -> half_open
+    once reset_timeout has passed, letting a single probe call through;
+    the probe's outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = CLOSED
+        self._lock = threading.Lock()
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self.trips = 0
+        self.rejected = 0
+        self.successes = 0
+        self.failures = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._state = HALF_OPEN
+                self._probe_in_flight = False
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.successes += 1
+            self._consecutive_failures = 0
+            self._probe_in_flight = False
+            self._state = CLOSED
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._consecutive_failures += 1
+            self._probe_in_flight = False
+            if self._state == HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    self.trips += 1
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+
+    def release(self):
+        """The call ended without a verdict (cancelled): free the half-open probe slot, count nothing."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "trips": self.trips,
+            "rejected": self.rejected,
+            "successes": self.successes,
+            "failures": self.failures,
+            "consecutive_failures": self._consecutive_failures
+        }
+
+
+class Dependency:
+    """
+    An external service with a deadline, bounded retries (exponential backoff
+    with full jitter) and a circuit breaker.
+    sync_timeout=False leaves the deadline of blocking calls to the client
+    itself (e.g. the Groq client's own request timeout).
+    """
+
+    def __init__(self, name: str, timeout: float, retries: int = 1, backoff: float = 0.2,
+                 max_backoff: float = 2.0, sync_timeout: bool = True, breaker: CircuitBreaker = None):
+        self.name = name
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.sync_timeout = sync_timeout
+        self.breaker = breaker or CircuitBreaker(name)
+
+    def available(self) -> bool:
+        """False while the breaker is open, so callers can skip this stage outright."""
+        return self.breaker.state != OPEN
+
+    def _delay(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_backoff, self.backoff * (2 ** attempt)))
+
+    def _call_once(self, fn, args, kwargs):
+        if not self.sync_timeout:
+            return fn(*args, **kwargs)
+        future = _timeout_executor.submit(fn, *args, **kwargs)
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise DependencyTimeoutError(f"{self.name} did not answer within {self.timeout}s")
+
+    def call_once(self, fn, *args, **kwargs):
+        """A single attempt within one deadline, for callers that bound the total time themselves."""
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"{self.name} circuit is open")
+        try:
+            result = self._call_once(fn, args, kwargs)
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        except BaseException:
+            self.breaker.release()
+            raise
+        self.breaker.record_success()
+        return result
+
+    def call(self, fn, *args, **kwargs):
+        for attempt in range(self.retries + 1):
+            try:
+                return self.call_once(fn, *args, **kwargs)
+            except CircuitOpenError:
+                raise
+            except Exception:
+                if attempt == self.retries:
+                    raise
+                time.sleep(self._delay(attempt))
+
+    async def acall(self, afn, *args, **kwargs):
+        for attempt in range(self.retries + 1):
+            if not self.breaker.allow():
+                raise CircuitOpenError(f"{self.name} circuit is open")
+            try:
+                result = await asyncio.wait_for(afn(*args, **kwargs), timeout=self.timeout)
+            except asyncio.TimeoutError:
+                self.breaker.record_failure()
+                if attempt == self.retries:
+                    raise DependencyTimeoutError(f"{self.name} did not answer within {self.timeout}s")
+                await asyncio.sleep(self._delay(attempt))
+            except Exception:
+                self.breaker.record_failure()
+                if attempt == self.retries:
+                    raise
+                await asyncio.sleep(self._delay(attempt))
+            except BaseException:
+                # Cancelled (client disconnected, speculation dropped): say nothing about the
+                # dependency, but never leave a half-open probe marked in flight
+                self.breaker.release()
+                raise
+            else:
+                self.breaker.record_success()
+                return result
+
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.getenv(name, str(default)))
+
+
+_dependencies: Dict[str, Dependency] = {
+    "groq": Dependency("groq", timeout=_env_float("LLM_TIMEOUT", 30), retries=1, sync_timeout=False),
+    "wikipedia": Dependency("wikipedia", timeout=_env_float("WIKIPEDIA_TIMEOUT", 6), retries=1),
+    "duckduckgo": Dependency("duckduckgo", timeout=_env_float("DUCKDUCKGO_TIMEOUT", 6), retries=1),
+}
+
+
+def dependency(name: str) -> Dependency:
+    return _dependencies[name]
+
+
+def breaker_stats() -> Dict[str, dict]:
+    return {name: dep.breaker.stats() for name, dep in _dependencies.items()}
@@ -0,0 +1,158 @@
+# core/resources.py
+import time
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Set
+
+
+class ResourceRegistry:
+    """
+    Lazily created heavy resources (LLM clients, embedding model, vector store,
+    search wrappers). Modules register a factory at import time; nothing is
+    built until the first get() or a warmup, and each load is timed.
+    Resources the config turns off (enabled=False) are skipped by warmup;
+    only required ones that fail to load make the instance not ready.
+    """
+
+    def __init__(self):
+        self._factories: Dict[str, Callable[[], Any]] = {}
+        self._instances: Dict[str, Any] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._load_times: Dict[str, float] = {}
+        self._errors: Dict[str, str] = {}
+        self._disabled: Set[str] = set()
+        self._optional: Set[str] = set()
+        self._warmup_lock = threading.Lock()
+        self._warmup_thread = None
+
+    def register(self, name: str, factory: Callable[[], Any], enabled: bool = True, required: bool = True):
+        """
+        enabled=False: the config doesn't use it, so warmup skips it (get() still builds it on demand).
+        required=False: the app degrades without it (e.g. a cache), so its load errors don't block readiness.
+        """
+        self._factories[name] = factory
+        self._locks.setdefault(name, threading.Lock())
+        self._disabled.discard(name)
+        self._optional.discard(name)
+        if not enabled:
+            self._disabled.add(name)
+        if not required:
+            self._optional.add(name)
+
+    def _enabled(self):
+        return [name for name in self._factories if name not in self._disabled]
+
+    def _blocking_errors(self):
+        return [name for name in self._errors if name not in self._disabled and name not in self._optional]
+
+    def get(self, name: str) -> Any:
+        if name in self._instances:
+            return self._instances[name]
+
+        with self._locks[name]:
+            if name not in self._instances:
+                started = time.perf_counter()
+                try:
+                    instance = self._factories[name]()
+                except Exception as e:
+                    # Not cached: the next get() retries
+                    self._errors[name] = str(e)
+                    raise
+                self._load_times[name] = time.perf_counter() - started
+                self._errors.pop(name, None)
+                self._instances[name] = instance
+                print(f"Loaded {name} in {self._load_times[name]:.2f}s")
+
+        return self._instances[name]
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._instances
+
+    def reset(self, name: str = None):
+        """Drop one (or every) built instance so it is recreated on next use."""
+        names = [name] if name else list(self._instances)
+        for key in names:
+            self._instances.pop(key, None)
+            self._load_times.pop(key, None)
+            self._errors.pop(key, None)
+
+    @contextmanager
+    def override(self, name: str, factory: Callable[[], Any]):
+        """Use another factory for `name` inside the block (tests, benchmarks), then restore the original."""
+        original = self._factories.get(name)
+        self._factories[name] = factory
+        self._locks.setdefault(name, threading.Lock())
+        self.reset(name)
+        try:
+            yield
+        finally:
+            if original is None:
+                self._factories.pop(name, None)
+            else:
+                self._factories[name] = original
+            self.reset(name)
+
+    def warmup(self):
+        """Build every enabled resource, recording failures instead of raising."""
+        for name in self._enabled():
+            try:
+                self.get(name)
+            except Exception:
+                pass
+        print(self.report())
+
+    def start_warmup(self) -> bool:
+        """
+        Start warmup in a background thread; returns False if it is running or
+        already succeeded. A warmup that ended with failures is started again.
+        """
+        with self._warmup_lock:
+            thread = self._warmup_thread
+            if thread is not None and (thread.is_alive() or not self._blocking_errors()):
+                return False
+            self._warmup_thread = threading.Thread(target=self.warmup, name="resource-warmup", daemon=True)
+            self._warmup_thread.start()
+            return True
+
+    def is_ready(self) -> bool:
+        # A required resource that failed to load (and hasn't loaded since) means this instance can't serve
+        if self._blocking_errors():
+            return False
+        if all(name in self._instances for name in self._enabled() if name not in self._optional):
+            return True
+        thread = self._warmup_thread
+        return thread is not None and not thread.is_alive()
+
+    def status(self) -> dict:
+        return {
+            "ready": self.is_ready(),
+            "warmup_started": self._warmup_thread is not None,
+            "resources": {
+                name: {
+                    "loaded": name in self._instances,
+                    "enabled": name not in self._disabled,
+                    "required": name not in self._optional,
+                    "load_seconds": round(self._load_times[name], 3) if name in self._load_times else None,
+                    "error": self._errors.get(name)
+                }
+                for name in self._factories
+            }
+        }
+
+    def report(self) -> str:
+        """Human-readable startup timing report, one line per component."""
+        lines = ["Startup timing report:"]
+        for name in self._factories:
+            if name in self._load_times:
+                lines.append(f"  {name:<12} {self._load_times[name]:8.2f}s")
+            elif name in self._errors:
+                lines.append(f"  {name:<12}   failed: {self._errors[name]}")
+            elif name in self._disabled:
+                lines.append(f"  {name:<12}   disabled")
+            else:
+                lines.append(f"  {name:<12}   not loaded")
+        lines.append(f"  {'total':<12} {sum(self._load_times.values()):8.2f}s")
+        return "\n".join(lines)
+
+
+registry = ResourceRegistry()
@@ -1,17 +1,157 @@
 # core/state.py
+import os
+from collections import deque
+from enum import Enum
 from typing import TypedDict
+from typing import Iterable, Tuple
 from typing import List
 from typing import Optional
 # from langchain.schema import Document
 from langchain_core.documents import Document
 
+# Patient-visible turns kept in a conversation log (older ones fall off the front)
+CONVERSATION_LOG_SIZE = int(os.getenv("CONVERSATION_LOG_SIZE", "20"))
+# Internal tool-status events kept per request, for debugging only
+CONVERSATION_EVENTS_SIZE = int(os.getenv("CONVERSATION_EVENTS_SIZE", "20"))
+
+
+class Role(Enum):
+    # Values are the line prefixes used in stored histories
+    USER = "User"
+    DOCTOR = "Doctor"
+    STATUS = "AI"
+    EXPLANATION = "AI Explanation"
+
+
+# Longest prefix first, so "AI Explanation:" is not read as "AI:"
+_PREFIXES = sorted(Role, key=lambda role: len(role.value), reverse=True)
+_VISIBLE = (Role.USER, Role.DOCTOR)
+
+
+class Message:
+    """One conversation line; the rendered text and its token count are computed once."""
+    __slots__ = ("role", "text", "_line", "_tokens")
+
+    def __init__(self, role: Role, text: str):
+        self.role = role
+        self.text = text
+        self._line = None
+        self._tokens = None
+
+    @classmethod
+    def parse(cls, line: str) -> "Message":
+        for role in _PREFIXES:
+            prefix = role.value + ":"
+            if line.startswith(prefix):
+                return cls(role, line[len(prefix):].strip())
+        return cls(Role.DOCTOR, line)  # unprefixed lines are fallback answers
+
+    @property
+    def line(self) -> str:
+        if self._line is None:
+            self._line = f"{self.role.value}: {self.text}"
+        return self._line
+
+    @property
+    def tokens(self) -> int:
+        if self._tokens is None:
+            from tools.prompt_budget import count_tokens
+            self._tokens = count_tokens(self.line)
+        return self._tokens
+
+    def __repr__(self):
+        return f"Message({self.role.name}, {self.text!r})"
+
+
+class ConversationLog:
+    """
+    Bounded log of a conversation shared by the agents of one request.
+    Patient-visible turns (User/Doctor) go in `turns`, which is what
+    prompts and retrieval queries see; tool-status lines go in `events`.
+    Rendered windows are cached until the next turn is added.
+    """
+    __slots__ = ("turns", "events", "_version", "_windows")
+
+    def __init__(self, messages: Iterable[Message] = (), maxlen: int = CONVERSATION_LOG_SIZE):
+        self.turns = deque(maxlen=maxlen)
+        self.events = deque(maxlen=CONVERSATION_EVENTS_SIZE)
+        self._version = 0
+        self._windows = {}
+        for message in messages:
+            self._add(message)
+
+    @classmethod
+    def from_lines(cls, lines: Iterable[str], maxlen: int = CONVERSATION_LOG_SIZE) -> "ConversationLog":
+        return cls((Message.parse(line) for line in lines), maxlen=maxlen)
+
+    def _add(self, message: Message):
+        if message.role in _VISIBLE:
+            self.turns.append(message)
+            self._version += 1
+            self._windows.clear()
+        else:
+            self.events.append(message)
+
+    def add(self, role: Role, text: str):
+        self._add(Message(role, text))
+
+    def user(self, text: str):
+        self.add(Role.USER, text)
+
+    def doctor(self, text: str):
+        self.add(Role.DOCTOR, text)
+
+    def status(self, text: str):
+        self.add(Role.STATUS, text)
+
+    def keep_last(self, n: int):
+        """Drop all but the newest n turns."""
+        if n < len(self.turns):
+            for _ in range(len(self.turns) - n):
+                self.turns.popleft()
+            self._version += 1
+            self._windows.clear()
+
+    def window(self, n: Optional[int] = None) -> Tuple[str, ...]:
+        """Rendered lines of the newest n turns (all when n is None)."""
+        n = len(self.turns) if n is None else min(n, len(self.turns))
+        lines = self._windows.get(n)
+        if lines is None:
+            start = len(self.turns) - n
+            lines = tuple(self.turns[i].line for i in range(start, len(self.turns)))
+            self._windows[n] = lines
+        return lines
+
+    def tokens(self, n: Optional[int] = None) -> int:
+        """Token count of window(n), one separator token per line included."""
+        n = len(self.turns) if n is None else min(n, len(self.turns))
+        return sum(self.turns[i].tokens + 1 for i in range(len(self.turns) - n, len(self.turns)))
+
+    def __len__(self):
+        return len(self.turns)
+
+    def __iter__(self):
+        return iter(self.turns)
+
+
+def conversation_log(state) -> ConversationLog:
+    """The state's log, built once from `conversation_history` lines on first use."""
+    log = state.get("conversation_log")
+    if log is None:
+        log = ConversationLog.from_lines(state.get("conversation_history") or ())
+        state["conversation_log"] = log
+    return log
+
+
 class AgentState(TypedDict):
     question: str
     documents: List[Document]
     generation: str
     source: str
     search_query: Optional[str]
-    conversation_history: List[str]
+    conversation_history: List[str]  # stored history lines the request starts from
+    conversation_log: Optional[ConversationLog]  # what the agents read and write during the request
+    conversation_summary: str  # running summary of turns folded out of the history
     language: str  # Added language support
     llm_attempted: bool
     llm_success: bool
@@ -23,6 +163,8 @@ class AgentState(TypedDict):
     ddg_success: bool
     current_tool: Optional[str]
     retry_count: int
+    prefetched_documents: Optional[List[Document]]  # speculative retrieval result
+    prompt_tokens: int  # size of the last prompt sent to the LLM
 
 def initialize_state() -> AgentState:
     return {
@@ -32,6 +174,8 @@ def initialize_state() -> AgentState:
         "source": "",
         "search_query": None,
         "conversation_history": [],
+        "conversation_log": None,
+        "conversation_summary": "",
         "language": "en",  # Default to English
         "llm_attempted": False,
         "llm_success": False,
@@ -42,5 +186,7 @@ def initialize_state() -> AgentState:
         "ddg_attempted": False,
         "ddg_success": False,
         "current_tool": None,
-        "retry_count": 0
-    }
\ No newline at end of file
+        "retry_count": 0,
+        "prefetched_documents": None,
+        "prompt_tokens": 0
+    }
@@ -0,0 +1,65 @@
+# core/streaming.py
+import json
+
+# Graph nodes whose LLM output is the patient-facing answer
+ANSWER_NODES = ("llm_agent", "executor")
+
+STREAM_MODES = ["messages", "values"]
+
+
+class TokenRelay:
+    """
+    Turn LangGraph stream chunks (stream_mode=["messages", "values"]) into
+    ("token", text) / ("reset", None) events and remember the final state.
+    A "reset" is emitted when tokens start arriving from a different LLM
+    call: another node (the direct LLM answer failed part-way and the
+    executor takes over) or a retry of the same node's call.
+    """
+
+    def __init__(self):
+        self.node = None
+        self.run = None
+        self.final_state = None
+
+    def handle(self, mode, payload):
+        if mode == "values":
+            self.final_state = payload
+            return []
+
+        chunk, metadata = payload
+        node = metadata.get("langgraph_node")
+        text = chunk.content if isinstance(chunk.content, str) else ""
+        if node not in ANSWER_NODES or not text:
+            return []
+
+        # Chunks of one LLM call share the message id; a retry gets a new one
+        run = getattr(chunk, "id", None)
+        events = []
+        if self.node is not None and (node != self.node or run != self.run):
+            events.append(("reset", None))
+        self.node = node
+        self.run = run
+        events.append(("token", text))
+        return events
+
+
+def stream_workflow(workflow, state):
+    """Run the workflow, yielding token events and finally ("done", final_state)."""
+    relay = TokenRelay()
+    for mode, payload in workflow.stream(state, stream_mode=STREAM_MODES):
+        yield from relay.handle(mode, payload)
+    yield "done", relay.final_state
+
+
+async def astream_workflow(workflow, state):
+    """Async variant of stream_workflow for the FastAPI handlers."""
+    relay = TokenRelay()
+    async for mode, payload in workflow.astream(state, stream_mode=STREAM_MODES):
+        for event in relay.handle(mode, payload):
+            yield event
+    yield "done", relay.final_state
+
+
+def format_sse(event: str, data) -> str:
+    """Serialize one server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
@@ -0,0 +1,100 @@
+# evaluation/benchmark_concurrency.py
+"""
+Concurrency benchmark for the /chat execution path.
+Compares the old blocking handler (workflow.invoke inside an async handler)
+with the non-blocking one (await workflow.ainvoke) on a single event loop,
+using a stubbed LLM with fixed latency so no API key or network is needed.
+
+Usage: python evaluation/benchmark_concurrency.py --requests 100 --concurrency 100 --latency 0.2
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.langgraph_workflow import setup_workflow
+from core.state import initialize_state
+from core.resources import registry
+
+
+class StubResponse:
+    def __init__(self, content: str):
+        self.content = content
+
+
+class StubLLM:
+    """Stands in for ChatGroq: answers every prompt after a fixed delay."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def invoke(self, prompt, config=None, **kwargs):
+        time.sleep(self.latency)
+        return StubResponse("Stubbed doctor answer.")
+
+    async def ainvoke(self, prompt, config=None, **kwargs):
+        await asyncio.sleep(self.latency)
+        return StubResponse("Stubbed doctor answer.")
+
+
+def make_state(question: str):
+    state = initialize_state()
+    state.update({
+        "question": question,
+        "language": "en",
+        "conversation_history": [f"User: {question}"]
+    })
+    return state
+
+
+async def blocking_handler(workflow, question: str):
+    # What api.py did before: a sync call inside an async handler
+    return workflow.invoke(make_state(question))
+
+
+async def async_handler(workflow, question: str):
+    return await workflow.ainvoke(make_state(question))
+
+
+async def measure(handler, workflow, total: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        async with semaphore:
+            await handler(workflow, f"What are the symptoms of condition {i}?")
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    return total / (time.perf_counter() - started)
+
+
+def run_benchmark(total: int, concurrency: int, latency: float):
+    workflow = setup_workflow()
+    registry.register("llm", lambda: StubLLM(latency))
+    registry.reset("llm")
+
+    print(f"Requests: {total}, concurrency: {concurrency}, stub LLM latency: {latency:.2f}s")
+    print("-" * 60)
+    results = {}
+    for label, handler in [("blocking invoke()", blocking_handler), ("async ainvoke()", async_handler)]:
+        results[label] = asyncio.run(measure(handler, workflow, total, concurrency))
+        print(f"{label:<20} {results[label]:10.1f} req/s")
+
+    speedup = results["async ainvoke()"] / results["blocking invoke()"]
+    print("-" * 60)
+    print(f"Speedup: {speedup:.1f}x")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.2)
+    args = parser.parse_args()
+    run_benchmark(args.requests, args.concurrency, args.latency)
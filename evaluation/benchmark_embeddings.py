@@ -0,0 +1,185 @@
+# evaluation/benchmark_embeddings.py
+"""
+Embedding backend benchmark: PyTorch (sentence-transformers) vs ONNX Runtime
+(fp32 and dynamic int8) on chunks of the indexed PDFs.
+Each backend runs in its own subprocess so peak RSS and imported modules are
+measured in isolation. Reports load time, document throughput, per-query
+latency, peak RSS, whether torch was imported, and retrieval agreement with
+the PyTorch backend (overlap of exact top-k results over the same chunks).
+
+Export the ONNX model first: python -m tools.onnx_embeddings export
+Usage: python evaluation/benchmark_embeddings.py --docs 1000 --k 5
+"""
+
+import os
+import sys
+import json
+import time
+import resource
+import argparse
+import tempfile
+import subprocess
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+BACKENDS = ("torch", "onnx-fp32", "onnx-int8")
+
+
+def load_chunks(limit: int):
+    """First `limit` chunks of the PDFs under data/, split exactly as for indexing."""
+    from tools.pdf_loader import iter_pdf_chunks
+    from tools.vector_store import list_pdf_files
+
+    texts = []
+    for path in list_pdf_files().values():
+        for _, _, chunks in iter_pdf_chunks(str(path)):
+            texts.extend(doc.page_content for doc in chunks)
+            if len(texts) >= limit:
+                return texts[:limit]
+    if not texts:
+        raise SystemExit("No PDF chunks found under data/; add the indexed book first.")
+    return texts
+
+
+def load_queries():
+    from evaluation.test_dataset import TEST_DATASET
+    return [case["question"] for case in TEST_DATASET]
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def make_backend(name: str, model: str, onnx_dir: str):
+    if name == "torch":
+        from langchain_huggingface.embeddings import HuggingFaceEmbeddings
+        return HuggingFaceEmbeddings(model_name=model)
+    from tools.onnx_embeddings import OnnxEmbeddings
+    return OnnxEmbeddings(onnx_dir, quantized=name == "onnx-int8")
+
+
+def run_worker(backend: str, input_path: str, output_path: str):
+    """Benchmark one backend; runs in a fresh interpreter."""
+    with open(input_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    baseline_rss = peak_rss_mb()
+
+    started = time.perf_counter()
+    embeddings = make_backend(backend, data["model"], data["onnx_dir"])
+    embeddings.embed_query("warmup")
+    load_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    doc_vectors = np.asarray(embeddings.embed_documents(data["docs"]), dtype=np.float32)
+    docs_seconds = time.perf_counter() - started
+
+    latencies = []
+    query_vectors = []
+    for query in data["queries"]:
+        started = time.perf_counter()
+        query_vectors.append(embeddings.embed_query(query))
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    np.savez(output_path, docs=doc_vectors, queries=np.asarray(query_vectors, dtype=np.float32))
+    stats = {
+        "load_seconds": load_seconds,
+        "docs_per_second": len(data["docs"]) / docs_seconds,
+        "query_p50_ms": float(np.percentile(latencies, 50)),
+        "query_p95_ms": float(np.percentile(latencies, 95)),
+        "peak_rss_mb": peak_rss_mb(),
+        "baseline_rss_mb": baseline_rss,
+        "torch_imported": "torch" in sys.modules
+    }
+    with open(output_path + ".json", "w", encoding="utf-8") as f:
+        json.dump(stats, f)
+
+
+def top_k(doc_vectors: np.ndarray, query_vectors: np.ndarray, k: int) -> np.ndarray:
+    docs = doc_vectors / np.linalg.norm(doc_vectors, axis=1, keepdims=True)
+    queries = query_vectors / np.linalg.norm(query_vectors, axis=1, keepdims=True)
+    return np.argsort(-(queries @ docs.T), axis=1)[:, :k]
+
+
+def agreement(reference: dict, candidate: dict, k: int) -> dict:
+    """How closely a backend reproduces the reference's vectors and top-k results."""
+    ref_top = top_k(reference["docs"], reference["queries"], k)
+    cand_top = top_k(candidate["docs"], candidate["queries"], k)
+    overlap = np.mean([len(set(a) & set(b)) / k for a, b in zip(ref_top, cand_top)])
+    top1 = np.mean(ref_top[:, 0] == cand_top[:, 0])
+
+    ref_q = reference["queries"] / np.linalg.norm(reference["queries"], axis=1, keepdims=True)
+    cand_q = candidate["queries"] / np.linalg.norm(candidate["queries"], axis=1, keepdims=True)
+    return {
+        f"overlap@{k}": float(overlap),
+        "top1_match": float(top1),
+        "query_cosine": float(np.mean(np.sum(ref_q * cand_q, axis=1)))
+    }
+
+
+def run_benchmark(backends, n_docs: int, k: int, model: str, onnx_dir: str):
+    docs = load_chunks(n_docs)
+    queries = load_queries()
+    print(f"Benchmarking {len(docs)} chunks, {len(queries)} queries, k={k}\n")
+
+    results = {}
+    vectors = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        input_path = os.path.join(tmp, "input.json")
+        with open(input_path, "w", encoding="utf-8") as f:
+            json.dump({"docs": docs, "queries": queries, "model": model, "onnx_dir": onnx_dir}, f)
+
+        for backend in backends:
+            output_path = os.path.join(tmp, f"{backend}.npz")
+            completed = subprocess.run([sys.executable, os.path.abspath(__file__), "--worker", backend,
+                                        "--input", input_path, "--output", output_path])
+            if completed.returncode != 0:
+                print(f"{backend}: failed (exit code {completed.returncode})")
+                continue
+            with open(output_path + ".json", "r", encoding="utf-8") as f:
+                results[backend] = json.load(f)
+            with np.load(output_path) as data:
+                vectors[backend] = {"docs": data["docs"], "queries": data["queries"]}
+
+    header = f"{'backend':<10} {'load s':>7} {'docs/s':>8} {'q p50 ms':>9} {'q p95 ms':>9} {'peak RSS MB':>12} {'torch':>6}"
+    print(header)
+    print("-" * len(header))
+    for backend, stats in results.items():
+        print(f"{backend:<10} {stats['load_seconds']:>7.2f} {stats['docs_per_second']:>8.1f} "
+              f"{stats['query_p50_ms']:>9.2f} {stats['query_p95_ms']:>9.2f} {stats['peak_rss_mb']:>12.0f} "
+              f"{'yes' if stats['torch_imported'] else 'no':>6}")
+
+    if "torch" in vectors:
+        print("\nRetrieval agreement with the torch backend:")
+        for backend in vectors:
+            if backend != "torch":
+                scores = agreement(vectors["torch"], vectors[backend], k)
+                print(f"  {backend:<10} " + ", ".join(f"{name}={value:.3f}" for name, value in scores.items()))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare embedding backends")
+    parser.add_argument("--docs", type=int, default=1000, help="Number of PDF chunks to embed")
+    parser.add_argument("--k", type=int, default=5, help="Top-k used for retrieval agreement")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=BACKENDS)
+    parser.add_argument("--model", default=None, help="Model for the torch backend (default: the indexed model)")
+    parser.add_argument("--onnx-dir", default=None, help="Exported ONNX model directory (default: ONNX_MODEL_DIR)")
+    parser.add_argument("--worker", choices=BACKENDS, help=argparse.SUPPRESS)
+    parser.add_argument("--input", help=argparse.SUPPRESS)
+    parser.add_argument("--output", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.input, args.output)
+    else:
+        from tools.vector_store import EMBEDDING_MODEL_NAME
+        from tools.onnx_embeddings import ONNX_MODEL_DIR
+        run_benchmark(args.backends, args.docs, args.k, args.model or EMBEDDING_MODEL_NAME,
+                      args.onnx_dir or str(ONNX_MODEL_DIR))
+
+
+if __name__ == "__main__":
+    main()
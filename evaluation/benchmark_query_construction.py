@@ -0,0 +1,121 @@
+# evaluation/benchmark_query_construction.py
+"""
+Retrieval query construction benchmark on multi-turn follow-up questions.
+Compares the old "Context: <last 6 history lines>\\nQuestion: ..." string
+(concat), the question alone (question), and the question mixed with recent
+user turns by recency weight (weighted).
+
+Quality is the overlap of each method's top-k chunks with the top-k of a
+hand-written standalone version of the follow-up (the reference), plus how
+often the reference's first chunk is found. Latency is the query embedding
+time with a cold query cache (first request of a conversation) and a warm one
+(earlier turns already embedded, as on every later request).
+
+Usage: python evaluation/benchmark_query_construction.py --k 3
+"""
+
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.query_builder import build_retrieval_query, query_vector
+
+METHODS = ("concat", "question", "weighted")
+
+
+def doctor_reply(topic: str) -> str:
+    # Replies are long, as real answers are; they push the question out of a 128-token window
+    return ("Doctor: " + f"Thank you for sharing that about {topic}. " +
+            "It is important to follow up with your doctor, keep a record of your symptoms, "
+            "stay hydrated, rest well and seek urgent care if anything gets worse. " * 3)
+
+
+# history (the current question is appended as the last user turn), follow-up, standalone reference
+CONVERSATIONS = [
+    (["User: I was diagnosed with type 2 diabetes last month.", doctor_reply("your diabetes")],
+     "What foods should I avoid?", "What foods should a person with type 2 diabetes avoid?"),
+    (["User: My son has asthma and uses an inhaler.", doctor_reply("asthma")],
+     "What can trigger an attack?", "What can trigger an asthma attack?"),
+    (["User: My blood pressure reading was 160 over 100.", doctor_reply("high blood pressure")],
+     "Which medicines are used for it?", "Which medicines are used to treat high blood pressure?"),
+    (["User: I think I have the flu.", doctor_reply("the flu"),
+      "User: I have a fever of 39 degrees.", doctor_reply("your fever")],
+     "How long does it usually last?", "How long does the flu usually last?"),
+    (["User: I get migraines a few times a month.", doctor_reply("migraines")],
+     "Are there ways to prevent them?", "How can migraines be prevented?"),
+    (["User: My mother was told she has anemia.", doctor_reply("anemia")],
+     "What should she eat?", "What should a person with anemia eat?"),
+    (["User: I have had heartburn after most meals.", doctor_reply("heartburn")],
+     "Is it dangerous long term?", "Is chronic heartburn (acid reflux) dangerous long term?"),
+    (["User: I was bitten by a dog yesterday.", doctor_reply("the bite"),
+      "User: The wound is red and swollen.", doctor_reply("the wound")],
+     "Do I need antibiotics?", "Does an infected dog bite wound need antibiotics?"),
+]
+
+
+def method_query(method: str, history, question):
+    if method == "question":
+        return question
+    return build_retrieval_query(question, history, mode=method)
+
+
+def run_benchmark(k: int):
+    from core.resources import registry
+    from tools.vector_store import create_embeddings, EMBEDDING_MODEL_NAME
+    from tools.embedding_cache import CachedEmbeddings
+
+    vectorstore = registry.get("vectorstore")
+    model = create_embeddings()
+    search = lambda vector: [doc.page_content for doc in vectorstore.similarity_search_by_vector(vector, k=k)]
+
+    references = [search(model.embed_query(reference)) for _, _, reference in CONVERSATIONS]
+    print(f"{len(CONVERSATIONS)} follow-up conversations, k={k}\n")
+
+    header = f"{'method':<10} {f'overlap@{k}':>10} {'top1 found':>11} {'cold ms':>8} {'warm ms':>8} {'chars':>6}"
+    print(header)
+    print("-" * len(header))
+    results = {}
+    for method in METHODS:
+        embeddings = CachedEmbeddings(model, EMBEDDING_MODEL_NAME)
+        overlaps, top1, cold, warm, chars = [], [], [], [], []
+        for (history, question, _), reference in zip(CONVERSATIONS, references):
+            history = history + [f"User: {question}"]
+            query = method_query(method, history, question)
+            chars.append(len(query) + sum(len(turn) for turn in getattr(query, "turns", ())))
+
+            for timings in (cold, warm):
+                if timings is warm:
+                    # Next request: earlier turns are cached, but the question (and any concat string) is new
+                    embeddings._vectors.pop(embeddings._key(str(query)), None)
+                started = time.perf_counter()
+                vector = query_vector(embeddings, query)
+                timings.append((time.perf_counter() - started) * 1000)
+
+            found = search(vector)
+            overlaps.append(len(set(found) & set(reference)) / k)
+            top1.append(reference[0] in found)
+
+        results[method] = {
+            "overlap": float(np.mean(overlaps)), "top1_found": float(np.mean(top1)),
+            "cold_ms": float(np.mean(cold)), "warm_ms": float(np.mean(warm)), "chars": float(np.mean(chars))
+        }
+        r = results[method]
+        print(f"{method:<10} {r['overlap']:>10.3f} {r['top1_found']:>11.3f} {r['cold_ms']:>8.2f} "
+              f"{r['warm_ms']:>8.2f} {r['chars']:>6.0f}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare retrieval query construction methods")
+    parser.add_argument("--k", type=int, default=3, help="Top-k chunks compared against the reference")
+    args = parser.parse_args()
+    run_benchmark(args.k)
+
+
+if __name__ == "__main__":
+    main()
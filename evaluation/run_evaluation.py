@@ -1,6 +1,11 @@
 # evaluation/run_evaluation.py
 """
 Main evaluation script to test chatbot accuracy
+
+LLM and search calls can be recorded once and replayed for fast, offline,
+reproducible reruns (see tools/replay.py):
+    REPLAY_MODE=record python evaluation/run_evaluation.py   # reuse recordings, record misses
+    REPLAY_MODE=replay python evaluation/run_evaluation.py   # recordings only, fails on a miss
 """
 
 import os
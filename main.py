@@ -38,7 +38,8 @@ def main():
             "ddg_attempted": False,
             "ddg_success": False,
             "current_tool": None,
-            "retry_count": 0
+            "retry_count": 0,
+            "prefetched_documents": None
         })
         
         # Run the workflow
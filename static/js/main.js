@@ -136,25 +136,77 @@ document.addEventListener('DOMContentLoaded', function() {
     // Show typing indicator
     typingIndicator.classList.add('active');
 
-    // Send to server with language info
-    fetch('/chat', {
+    // Stream the answer from the server, rendering tokens as they arrive
+    let botText = null;
+    let answer = '';
+
+    function renderToken(token) {
+        if (!botText) {
+            typingIndicator.classList.remove('active');
+            botText = addMessage('', false);
+        }
+        answer += token;
+        botText.textContent = answer;
+        chatContainer.scrollTop = chatContainer.scrollHeight;
+    }
+
+    function handleEvent(event, data) {
+        if (event === 'token') {
+            renderToken(data);
+        } else if (event === 'reset') {
+            answer = '';
+            if (botText) botText.textContent = '';
+        } else if (event === 'done') {
+            // The final event carries the complete answer and its metadata
+            answer = '';
+            renderToken(data.response);
+            const timeSpan = document.createElement('span');
+            timeSpan.className = 'message-time';
+            timeSpan.textContent = data.timestamp;
+            botText.parentNode.appendChild(timeSpan);
+
+            // Update language selector if language changed
+            if (data.language && data.language !== selectedLanguage) {
+                languageSelect.value = data.language;
+                showToast(`Language switched to ${getLanguageName(data.language)}`);
+            }
+
+            // Show toast notification
+            showToast('Message received');
+        } else if (event === 'error') {
+            throw new Error(data.detail);
+        }
+    }
+
+    fetch('/chat/stream', {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify({ message: message, language: selectedLanguage })
     })
-    .then(response => response.json())
-    .then(data => {
-        // Add bot response
-        addMessage(data.response, false, data.timestamp);
+    .then(async response => {
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
 
-        // Update language selector if language changed
-        if (data.language && data.language !== selectedLanguage) {
-            languageSelect.value = data.language;
-            showToast(`Language switched to ${getLanguageName(data.language)}`);
-        }
+        while (true) {
+            const { done, value } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
 
-        // Show toast notification
-        showToast('Message received');
+            // Server-sent events are separated by a blank line
+            let boundary;
+            while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                const raw = buffer.slice(0, boundary);
+                buffer = buffer.slice(boundary + 2);
+                let event = 'message';
+                let data = '';
+                raw.split('\n').forEach(line => {
+                    if (line.startsWith('event: ')) event = line.slice(7);
+                    else if (line.startsWith('data: ')) data += line.slice(6);
+                });
+                handleEvent(event, JSON.parse(data));
+            }
+        }
     })
     .catch(error => {
         console.error('Error:', error);
@@ -202,6 +254,8 @@ document.addEventListener('DOMContentLoaded', function() {
             top: chatContainer.scrollHeight,
             behavior: 'smooth'
         });
+
+        return contentDiv.querySelector('p');
     }
     
     function handleInputKeydown(e) {
@@ -1,6 +1,7 @@
 # test_multilingual.py
 """
 Test script for multilingual functionality
+Set REPLAY_MODE=record or REPLAY_MODE=replay to reuse recorded LLM/search responses.
 """
 from dotenv import load_dotenv
 from core.langgraph_workflow import setup_workflow
@@ -0,0 +1,10 @@
+from contextlib import ExitStack
+import pytest
+from core.resources import registry
+
+
+@pytest.fixture
+def swap_resource():
+    """swap_resource(name, factory): build `name` from `factory` for this test only."""
+    with ExitStack() as stack:
+        yield lambda name, factory: stack.enter_context(registry.override(name, factory))
@@ -0,0 +1,75 @@
+import asyncio
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+api = pytest.importorskip("api")
+from fastapi.testclient import TestClient
+from tools.embedding_cache import CachedEmbeddings
+
+
+class FakeWorkflow:
+    def __init__(self):
+        self.running = 0
+        self.max_running = 0
+
+    async def ainvoke(self, state):
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        await asyncio.sleep(0.01)
+        self.running -= 1
+        if "fail" in state["question"]:
+            raise RuntimeError("upstream rate limited")
+        return {"generation": f"Answer to {state['question']}", "language": state["language"],
+                "source": "llm_knowledge", "prompt_tokens": 42}
+
+
+class BatchEmbeddings:
+    def __init__(self):
+        self.batches = []
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+    def embed_documents(self, texts):
+        self.batches.append(list(texts))
+        return [[float(len(text)), 1.0] for text in texts]
+
+
+@pytest.fixture
+def client(monkeypatch, swap_resource):
+    inner = BatchEmbeddings()
+    swap_resource("embeddings", lambda: CachedEmbeddings(inner, "test-model"))
+    workflow = FakeWorkflow()
+    monkeypatch.setattr(api, "workflow", workflow)
+    monkeypatch.setattr(api, "lookup_answer", lambda *args: None)
+    monkeypatch.setattr(api, "cache_answer", lambda *args: None)
+    monkeypatch.setattr(api, "BATCH_CONCURRENCY", 3)
+    return TestClient(api.app), workflow, inner
+
+
+def test_batch_answers_in_order_with_bounded_concurrency(client):
+    http, workflow, embeddings = client
+    items = [{"message": f"question {i}", "language": "hi" if i % 2 else "en"} for i in range(10)]
+    items[4]["message"] = "please fail"
+
+    body = http.post("/chat/batch", json={"items": items}).json()
+
+    assert body["count"] == 10 and body["errors"] == 1
+    results = body["results"]
+    assert [r["index"] for r in results] == list(range(10))
+    assert results[0]["response"] == "Answer to question 0"
+    assert results[1]["language"] == "hi"
+    assert results[4]["error"] == "upstream rate limited" and results[4]["response"] is None
+    assert all(r["elapsed_ms"] >= 0 and r["queued_ms"] >= 0 for r in results)
+    assert workflow.max_running == 3
+
+    # Every question was embedded up front, in one model call
+    assert embeddings.batches == [[item["message"] for item in items]]
+
+
+def test_batch_size_is_capped(client, monkeypatch):
+    http, _, _ = client
+    monkeypatch.setattr(api, "BATCH_MAX_ITEMS", 2)
+    response = http.post("/chat/batch", json={"items": [{"message": "q"}] * 3})
+    assert response.status_code == 413
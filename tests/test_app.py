@@ -1,2 +1,54 @@
+import pytest
+
+
 def test_example():
-    assert 1 == 1
\ No newline at end of file
+    assert 1 == 1
+
+
+class FakeWorkflow:
+    def __init__(self):
+        self.histories = []
+
+    def invoke(self, state):
+        self.histories.append(list(state["conversation_history"]))
+        return {"generation": "Answer " + "x" * 200, "language": state["language"], "source": "llm_knowledge"}
+
+
+@pytest.fixture
+def client(monkeypatch, swap_resource):
+    pytest.importorskip("flask")
+    pytest.importorskip("twilio")
+    app_module = pytest.importorskip("app")
+    from tools.session_store import MemorySessionStore
+
+    swap_resource("session_store", MemorySessionStore)
+    workflow = FakeWorkflow()
+    monkeypatch.setattr(app_module, "workflow", workflow)
+    monkeypatch.setattr(app_module, "lookup_answer", lambda *args: None)
+    monkeypatch.setattr(app_module, "cache_answer", lambda *args: None)
+    return app_module.app.test_client(), workflow
+
+
+def test_chat_history_is_server_side_and_cookie_stays_small(client):
+    client, workflow = client
+    cookie_sizes = []
+    for i in range(5):
+        response = client.post("/chat", json={"message": f"question {i}"})
+        assert response.status_code == 200
+        cookie = client.get_cookie("session")
+        cookie_sizes.append(len(cookie.value))
+
+    assert len(set(cookie_sizes)) == 1  # only the conversation id is in the cookie
+    assert workflow.histories[-1][-1] == "User: question 4"
+    assert "User: question 3" in workflow.histories[-1]
+
+
+def test_whatsapp_history_persists_without_cookies(client):
+    client, workflow = client
+    for message in ("I have a fever", "What should I take?"):
+        client.post("/whatsapp", data={"Body": message, "From": "whatsapp:+15550001"})
+        client.delete_cookie("session")  # Twilio sends no cookies
+    client.post("/whatsapp", data={"Body": "Hello", "From": "whatsapp:+15550002"})
+
+    assert workflow.histories[1][0] == "User: I have a fever"
+    assert workflow.histories[2] == []  # other senders have their own history
@@ -0,0 +1,59 @@
+import pytest
+
+pytest.importorskip("langchain_core")
+from core.state import ConversationLog, Message, Role, conversation_log, initialize_state
+
+
+def test_lines_are_parsed_into_turns_and_events():
+    log = ConversationLog.from_lines([
+        "User: I have a cough",
+        "AI: Retrieved documents from medical PDF database.",
+        "AI Explanation: Here is why.",
+        "Doctor: Drink fluids.",
+        "Sorry, I could not find an answer.",
+    ])
+    assert [m.role for m in log] == [Role.USER, Role.DOCTOR, Role.DOCTOR]
+    assert [m.role for m in log.events] == [Role.STATUS, Role.EXPLANATION]
+    assert log.window() == ("User: I have a cough", "Doctor: Drink fluids.",
+                            "Doctor: Sorry, I could not find an answer.")
+
+
+def test_status_events_stay_out_of_the_window():
+    log = ConversationLog.from_lines(["User: hi"])
+    log.status("Retrieved information from Wikipedia.")
+    assert log.window() == ("User: hi",)
+    assert len(log.events) == 1
+
+
+def test_log_is_bounded_and_windows_are_cached_until_a_turn_is_added():
+    log = ConversationLog.from_lines([f"User: message {i}" for i in range(30)], maxlen=5)
+    assert len(log) == 5 and log.window(1) == ("User: message 29",)
+
+    window = log.window(3)
+    assert log.window(3) is window
+    log.status("not a turn")
+    assert log.window(3) is window
+    log.doctor("reply")
+    assert log.window(3) == ("User: message 28", "User: message 29", "Doctor: reply")
+
+    log.keep_last(2)
+    assert log.window() == ("User: message 29", "Doctor: reply")
+
+
+def test_token_counts_are_computed_once_per_message(monkeypatch):
+    import tools.prompt_budget as prompt_budget
+    calls = []
+    monkeypatch.setattr(prompt_budget, "count_tokens", lambda text: calls.append(text) or len(text.split()))
+
+    log = ConversationLog([Message(Role.USER, "one two"), Message(Role.DOCTOR, "three")])
+    assert log.tokens() == (3 + 1) + (2 + 1)
+    assert log.tokens(1) == 3
+    assert len(calls) == 2
+
+
+def test_state_log_is_built_once_from_history():
+    state = initialize_state()
+    state["conversation_history"] = ["User: a", "Doctor: b"]
+    log = conversation_log(state)
+    assert conversation_log(state) is log
+    assert log.window() == ("User: a", "Doctor: b")
@@ -0,0 +1,60 @@
+import asyncio
+import pytest
+
+pytest.importorskip("langchain_core")
+embedding_cache = pytest.importorskip("tools.embedding_cache")
+
+
+class CountingEmbeddings:
+    def __init__(self):
+        self.queries = []
+
+    def embed_query(self, text):
+        self.queries.append(text)
+        return [float(len(text)), 0.1, 0.2]
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+
+def test_repeated_queries_hit_cache():
+    inner = CountingEmbeddings()
+    cached = embedding_cache.CachedEmbeddings(inner, "test-model", max_entries=10)
+
+    first = cached.embed_query("How is asthma treated?")
+    assert cached.embed_query("  How is   asthma treated? ") == first
+    assert asyncio.run(cached.aembed_query("How is asthma treated?")) == first
+    assert inner.queries == ["How is asthma treated?"]
+
+    stats = cached.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (2, 1, 1)
+    assert stats["bytes"] == 3 * 4  # float32
+
+
+def test_lru_bound_and_documents_bypass_cache():
+    inner = CountingEmbeddings()
+    cached = embedding_cache.CachedEmbeddings(inner, "test-model", max_entries=2)
+    for text in ("a", "b", "a", "c"):
+        cached.embed_query(text)
+    cached.embed_query("a")
+    cached.embed_query("b")  # evicted by "c"
+    assert inner.queries == ["a", "b", "c", "b"]
+    assert cached.stats()["evictions"] == 2
+
+    cached.embed_documents(["a", "a"])
+    assert cached.stats()["entries"] == 2
+    assert inner.queries[-2:] == ["a", "a"]
+
+
+def test_batched_queries_fill_cache_in_one_call():
+    inner = CountingEmbeddings()
+    inner.batches = []
+    embed_documents = inner.embed_documents
+    inner.embed_documents = lambda texts: inner.batches.append(list(texts)) or embed_documents(texts)
+    cached = embedding_cache.CachedEmbeddings(inner, "test-model", max_entries=10)
+    cached.embed_query("a")
+
+    vectors = cached.embed_queries(["a", "bb", "bb ", "ccc"])
+    assert inner.batches == [["bb", "ccc"]]
+    assert vectors[1] == vectors[2] == cached.embed_query("bb")
+    assert len(inner.queries) == 3  # "a" once, then the batch; the last lookup is a hit
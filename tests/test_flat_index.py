@@ -0,0 +1,115 @@
+import asyncio
+import zlib
+import numpy as np
+import pytest
+
+pytest.importorskip("langchain_core")
+flat_index = pytest.importorskip("tools.flat_index")
+
+VOCAB = 64
+
+
+class BagOfWordsEmbeddings:
+    """Deterministic hashed bag-of-words vectors."""
+
+    def embed_query(self, text):
+        vector = np.zeros(VOCAB, dtype=np.float32)
+        for word in text.lower().split():
+            vector[zlib.crc32(word.encode()) % VOCAB] += 1.0
+        return vector.tolist()
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+
+TEXTS = {
+    "a": "asthma is treated with inhaled corticosteroids",
+    "b": "insulin lowers blood glucose in diabetes",
+    "c": "paracetamol reduces fever and mild pain",
+    "d": "hypertension is managed with diet and medication",
+}
+
+
+def _store(tmp_path, **kwargs):
+    store = flat_index.FlatVectorStore(tmp_path / "flat", BagOfWordsEmbeddings(), **kwargs)
+    store.add_texts(list(TEXTS.values()), [{"chunk_id": cid} for cid in TEXTS], ids=list(TEXTS))
+    store.commit()
+    return store
+
+
+@pytest.mark.parametrize("dtype", ["float16", "int8"])
+def test_search_matches_exact_cosine(tmp_path, dtype):
+    store = _store(tmp_path, dtype=dtype)
+    results = store.similarity_search_with_score("how is asthma treated", k=2)
+    assert results[0][0].metadata["chunk_id"] == "a"
+
+    embeddings = BagOfWordsEmbeddings()
+    docs = np.asarray(embeddings.embed_documents(list(TEXTS.values())))
+    query = np.asarray(embeddings.embed_query("how is asthma treated"))
+    exact = docs @ query / (np.linalg.norm(docs, axis=1) * np.linalg.norm(query))
+    assert results[0][1] == pytest.approx(exact.max(), abs=0.02)
+
+
+@pytest.mark.parametrize("k", [0, -1, -3])
+def test_non_positive_k_returns_nothing(tmp_path, k):
+    assert _store(tmp_path).similarity_search_with_score("asthma", k=k) == []
+
+
+@pytest.mark.parametrize("k", [4, 10])
+def test_k_beyond_the_row_count_returns_every_row(tmp_path, k):
+    results = _store(tmp_path).similarity_search_with_score("how is asthma treated", k=k)
+    assert sorted(doc.metadata["chunk_id"] for doc, _ in results) == sorted(TEXTS)
+    assert results[0][0].metadata["chunk_id"] == "a"
+    assert [score for _, score in results] == sorted((score for _, score in results), reverse=True)
+
+
+def test_changes_visible_after_commit_and_reopen(tmp_path):
+    store = _store(tmp_path)
+    store.delete(ids=["a"])
+    store.add_texts(["asthma inhalers open the airways"], [{"chunk_id": "e"}], ids=["e"])
+    assert len(store) == 4  # pending until commit
+    store.commit()
+
+    reopened = flat_index.FlatVectorStore(tmp_path / "flat", BagOfWordsEmbeddings())
+    assert sorted(reopened.get()["ids"]) == ["b", "c", "d", "e"]
+    assert reopened.similarity_search("asthma airways", k=1)[0].metadata["chunk_id"] == "e"
+    # The previous generation stays for readers that have just read CURRENT
+    assert sorted(path.name for path in (tmp_path / "flat").glob("gen-*")) == ["gen-000001", "gen-000002"]
+
+
+def test_open_readers_follow_commits_from_other_stores(tmp_path):
+    writer = _store(tmp_path)
+    reader = flat_index.FlatVectorStore(tmp_path / "flat", BagOfWordsEmbeddings())
+    writer.add_texts(["asthma inhalers open the airways"], [{"chunk_id": "e"}], ids=["e"])
+    writer.commit()
+    assert len(reader) == 5
+    assert reader.similarity_search("asthma airways", k=1)[0].metadata["chunk_id"] == "e"
+
+
+def test_old_generations_are_removed_after_the_grace_period(tmp_path, monkeypatch):
+    store = _store(tmp_path)
+    store.add_texts(["x"], ids=["x"])
+    store.commit()
+    assert len(list((tmp_path / "flat").glob("gen-*"))) == 2  # still within the grace period
+
+    monkeypatch.setattr(flat_index, "FLAT_INDEX_GRACE", 0)
+    store.add_texts(["y"], ids=["y"])
+    store.commit()
+    assert sorted(path.name for path in (tmp_path / "flat").glob("gen-*")) == ["gen-000002", "gen-000003"]
+
+
+def test_default_ids_are_stable_content_hashes(tmp_path):
+    store = flat_index.FlatVectorStore(tmp_path / "flat", BagOfWordsEmbeddings())
+    ids = store.add_texts(["fever"], [{"source": "a.pdf"}])
+    assert ids == store.add_texts(["fever"], [{"source": "a.pdf"}])
+    assert len(ids[0]) == 64
+    store.commit()
+    assert len(store) == 1
+
+
+def test_retriever_interface_and_dimension_reduction(tmp_path):
+    store = _store(tmp_path, dims=3)
+    assert store._generation.vectors.shape == (4, 3)
+    retriever = store.as_retriever(search_kwargs={"k": 2})
+    assert len(retriever.invoke("fever pain")) == 2
+    assert len(asyncio.run(retriever.ainvoke("fever pain"))) == 2
@@ -0,0 +1,73 @@
+import asyncio
+import pytest
+
+pytest.importorskip("langchain_core")
+hybrid = pytest.importorskip("tools.hybrid_retriever")
+from langchain_core.documents import Document
+
+
+def doc(cid, text):
+    return Document(page_content=text, metadata={"chunk_id": cid})
+
+
+CHUNKS = [
+    doc("a", "Metformin 500 mg twice daily is first-line therapy for type 2 diabetes."),
+    doc("b", "Diabetes causes high blood sugar, thirst and frequent urination."),
+    doc("c", "Asthma is treated with inhaled corticosteroids and salbutamol."),
+    doc("d", "Blood sugar should be checked regularly in people with diabetes."),
+]
+
+
+class FakeVectorStore:
+    """Dense leg stand-in: always ranks by a fixed order, ignoring exact terms."""
+
+    def __init__(self, order):
+        self.order = order
+        self.calls = 0
+
+    def similarity_search(self, query, k):
+        self.calls += 1
+        by_id = {d.metadata["chunk_id"]: d for d in CHUNKS}
+        return [by_id[cid] for cid in self.order][:k]
+
+
+def test_bm25_prefers_rare_exact_terms():
+    index = hybrid.BM25Index(CHUNKS)
+    results = index.search("metformin dose for diabetes", k=3)
+    assert results[0][0].metadata["chunk_id"] == "a"
+    assert {d.metadata["chunk_id"] for d, _ in results} == {"a", "b", "d"}
+    assert index.search("xylophone", k=3) == []
+
+
+def test_reciprocal_rank_fusion_weights():
+    dense = [CHUNKS[1], CHUNKS[3], CHUNKS[0]]
+    lexical = [CHUNKS[0], CHUNKS[3]]
+    fused = hybrid.reciprocal_rank_fusion({"vector": dense, "lexical": lexical}, {"vector": 1.0, "lexical": 1.0})
+    # Documents found by both legs outrank b, which only one leg returned; duplicates are merged
+    assert [d.metadata["chunk_id"] for d in fused] == ["a", "d", "b"]
+
+    fused = hybrid.reciprocal_rank_fusion({"vector": dense, "lexical": lexical}, {"vector": 1.0, "lexical": 0.0})
+    assert [d.metadata["chunk_id"] for d in fused] == ["b", "d", "a"]
+
+
+def test_hybrid_retriever_recovers_exact_match_and_reports_timings():
+    vectorstore = FakeVectorStore(["b", "d", "c"])
+    retriever = hybrid.HybridRetriever(vectorstore, hybrid.BM25Index(CHUNKS), k=2, candidates=3)
+
+    docs, timings = retriever.search("metformin 500 mg")
+    assert "a" in [d.metadata["chunk_id"] for d in docs]
+    assert len(docs) == 2
+    assert set(timings) == {"vector_ms", "lexical_ms", "fusion_ms", "total_ms"}
+
+    docs = asyncio.run(retriever.ainvoke("metformin 500 mg"))
+    assert len(docs) == 2
+    assert retriever.stats()["latency"]["lexical_ms"]["count"] == 2
+
+
+def test_zero_weight_leg_is_skipped():
+    vectorstore = FakeVectorStore(["b", "d", "c"])
+    retriever = hybrid.HybridRetriever(vectorstore, hybrid.BM25Index(CHUNKS), k=3, vector_weight=0)
+    docs, timings = retriever.search("salbutamol")
+    assert vectorstore.calls == 0
+    assert [d.metadata["chunk_id"] for d in docs] == ["c"]
+    assert "vector_ms" not in timings
@@ -0,0 +1,68 @@
+import gzip
+import json
+import pytest
+
+encyclopedia = pytest.importorskip("tools.local_encyclopedia")
+
+
+@pytest.fixture(scope="module")
+def index_path(tmp_path_factory):
+    path = tmp_path_factory.mktemp("encyclopedia") / "index.sqlite3"
+    # The redirect and the talk page in the sample are skipped
+    assert encyclopedia.build_index(encyclopedia.SAMPLE_DUMP, path) == 6
+    return path
+
+
+def test_clean_wikitext_keeps_lead_section_as_plain_text():
+    text = ("{{Infobox|name=X}}'''Gout''' is a form of [[arthritis|inflammatory arthritis]]."
+            "<ref>{{cite}}</ref>\n\n== Causes ==\nUric acid.")
+    assert encyclopedia.clean_wikitext(text) == "Gout is a form of inflammatory arthritis."
+
+
+def test_bm25_ranks_matching_article_first(index_path):
+    wiki = encyclopedia.LocalEncyclopedia(index_path)
+    assert wiki.search("How is an asthma attack treated with an inhaler?")[0]["title"] == "Asthma"
+    assert wiki.search("flu vaccine")[0]["title"] == "Influenza"
+    assert wiki.search("low red blood cells and iron")[0]["title"] == "Anemia"
+
+
+def test_run_matches_wikipedia_wrapper_format(index_path):
+    wiki = encyclopedia.LocalEncyclopedia(index_path, doc_content_chars_max=300)
+    content = wiki.run("migraine headache")
+    assert content.startswith("Page: Migraine\nSummary: Migraine is a primary headache disorder")
+    assert len(content) <= 300
+    assert wiki.run("xylophone quartz") == encyclopedia.NO_RESULT
+    assert wiki.run("?!") == encyclopedia.NO_RESULT
+
+
+def test_jsonl_dump(tmp_path):
+    dump = tmp_path / "articles.jsonl.gz"
+    with gzip.open(dump, "wt", encoding="utf-8") as f:
+        f.write(json.dumps({"title": "Gout", "text": "Gout is inflammatory arthritis caused by uric acid."}) + "\n")
+        f.write(json.dumps({"title": "Empty", "text": ""}) + "\n")
+    assert encyclopedia.build_index(dump, tmp_path / "index.sqlite3") == 1
+    assert encyclopedia.LocalEncyclopedia(tmp_path / "index.sqlite3").search("uric acid")[0]["title"] == "Gout"
+
+
+def test_xml_pages_are_released_as_they_are_read(tmp_path, monkeypatch):
+    body = "Lorem ipsum dolor sit amet. " * 20
+    pages = "".join(f"<page><title>Topic {i}</title><ns>0</ns><revision><text>{body}</text></revision></page>"
+                    for i in range(1000))
+    dump = tmp_path / "dump.xml"
+    dump.write_text(f'<mediawiki xmlns="http://www.mediawiki.org/xml/export-0.10/">{pages}</mediawiki>')
+
+    roots = []
+    iterparse = encyclopedia.ET.iterparse
+
+    def recording_iterparse(source, events=("end",)):
+        for event, elem in iterparse(source, events=("start", "end")):
+            if not roots:
+                roots.append(elem)
+            if event in events:
+                yield event, elem
+
+    monkeypatch.setattr(encyclopedia.ET, "iterparse", recording_iterparse)
+    retained = [len(roots[0]) for _ in encyclopedia.iter_xml_articles(dump)]
+    assert len(retained) == 1000
+    # Only the pages in the parser's read-ahead buffer are still attached to <mediawiki>
+    assert max(retained) < 100
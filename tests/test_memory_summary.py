@@ -0,0 +1,133 @@
+import time
+import pytest
+
+pytest.importorskip("langchain_core")
+memory_agent = pytest.importorskip("agents.memory_agent")
+from core.state import initialize_state
+from tools.session_store import MemorySessionStore
+from agents import MemoryAgent
+
+
+class FakeResponse:
+    def __init__(self, content):
+        self.content = content
+
+
+class FakeLLM:
+    def __init__(self):
+        self.prompts = []
+
+    def invoke(self, prompt, config=None):
+        self.prompts.append(prompt)
+        return FakeResponse("Patient has had a fever for 3 days and is taking paracetamol.")
+
+
+@pytest.fixture
+def fakes(monkeypatch, swap_resource):
+    llm = FakeLLM()
+    store = MemorySessionStore()
+    swap_resource("llm", lambda: llm)
+    swap_resource("session_store", lambda: store)
+    monkeypatch.setattr(memory_agent, "MEMORY_MODE", "summary")
+    return llm, store
+
+
+def conversation(turns):
+    lines = []
+    for i in range(turns):
+        lines += [f"User: message {i}", f"Doctor: reply {i}"]
+    return lines
+
+
+def test_compaction_folds_older_lines_and_keeps_new_ones(fakes):
+    llm, store = fakes
+    store.save("c1", {"history": conversation(8)})
+
+    MemoryAgent.schedule_compaction("c1", store.get("c1"))
+    for _ in range(100):
+        if "summary" in (store.get("c1") or {}):
+            break
+        time.sleep(0.01)
+
+    data = store.get("c1")
+    assert data["summary"].startswith("Patient has had a fever")
+    assert data["history"] == conversation(8)[-memory_agent.MEMORY_RECENT_LINES:]
+    assert "User: message 0" in llm.prompts[0]
+
+
+def test_compaction_keeps_turns_added_meanwhile(fakes):
+    llm, store = fakes
+    store.save("c1", {"history": conversation(8)})
+    original = memory_agent.MemoryAgent.summarize
+
+    def summarize_while_user_writes(summary, lines):
+        data = store.get("c1")
+        store.save("c1", dict(data, history=data["history"] + ["User: new question"]))
+        return original(summary, lines)
+
+    memory_agent.MemoryAgent.summarize = staticmethod(summarize_while_user_writes)
+    try:
+        assert MemoryAgent.compact("c1")
+    finally:
+        memory_agent.MemoryAgent.summarize = original
+    assert store.get("c1")["history"][-1] == "User: new question"
+
+
+def test_lines_trimmed_meanwhile_are_folded_not_lost(fakes):
+    llm, store = fakes
+    lines = conversation(8)  # 16 lines: 10 to fold, 6 recent
+    store.save("c1", {"history": lines})
+    original = memory_agent.MemoryAgent.summarize
+    calls = []
+
+    def summarize_while_store_trims(summary, folded):
+        calls.append(folded)
+        if len(calls) == 1:
+            # Two new turns arrive and the store keeps only its last 4 lines
+            data = store.get("c1")
+            store.save("c1", dict(data, history=(data["history"] + ["User: new 1", "User: new 2"])[-4:]))
+        return original(summary, folded)
+
+    memory_agent.MemoryAgent.summarize = staticmethod(summarize_while_store_trims)
+    try:
+        assert MemoryAgent.compact("c1")
+    finally:
+        memory_agent.MemoryAgent.summarize = original
+
+    # The 4 unsummarized lines the store dropped go through a second pass; nothing is lost
+    assert calls == [lines[:10], lines[10:14]]
+    assert store.get("c1")["history"] == lines[14:] + ["User: new 1", "User: new 2"]
+
+
+def test_prompt_context_keeps_every_unsummarized_line(fakes):
+    # 10 lines: more than MEMORY_RECENT_LINES, not yet enough to trigger compaction
+    lines = conversation(5)
+    assert not MemoryAgent.needs_compaction({"history": lines})
+    state = initialize_state()
+    state["conversation_history"] = lines
+    state["conversation_summary"] = "Fever for 3 days."
+    MemoryAgent.process(state)
+
+    context = MemoryAgent.context(state, 6)
+    assert context == [f"{memory_agent.SUMMARY_PREFIX} Fever for 3 days.", *lines]
+
+
+def test_prompt_context_is_capped_newest_first(fakes, monkeypatch):
+    monkeypatch.setattr(memory_agent, "MEMORY_TOKEN_CAP", 40)
+    state = initialize_state()
+    state["conversation_history"] = conversation(50)
+    state["conversation_summary"] = "Fever for 3 days."
+    MemoryAgent.process(state)
+
+    context = MemoryAgent.context(state, 10)
+    assert context[0] == f"{memory_agent.SUMMARY_PREFIX} Fever for 3 days."
+    assert context[-1] == "Doctor: reply 49"
+    assert 1 < len(context) < 20
+    assert state["conversation_log"].tokens() <= 40
+
+
+def test_short_conversations_are_not_compacted(fakes):
+    llm, store = fakes
+    store.save("c1", {"history": conversation(2)})
+    assert not MemoryAgent.compact("c1")
+    assert llm.prompts == []
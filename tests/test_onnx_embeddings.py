@@ -0,0 +1,63 @@
+import sys
+import subprocess
+import numpy as np
+import pytest
+
+onnx_embeddings = pytest.importorskip("tools.onnx_embeddings")
+
+WORDS = ["[PAD]", "[UNK]", "asthma", "diabetes", "insulin", "inhaler"]
+
+
+def test_mean_pool_ignores_padding():
+    hidden = np.array([[[1.0, 1.0], [3.0, 3.0], [100.0, 100.0]]], dtype=np.float32)
+    mask = np.array([[1, 1, 0]])
+    assert onnx_embeddings.mean_pool(hidden, mask).tolist() == [[2.0, 2.0]]
+
+
+def test_backend_import_does_not_import_torch():
+    code = "import sys, tools.onnx_embeddings; sys.exit('torch' in sys.modules)"
+    assert subprocess.run([sys.executable, "-c", code]).returncode == 0
+
+
+@pytest.fixture
+def model_dir(tmp_path):
+    """A lookup-table 'encoder' (token id -> vector) exported as ONNX, with a word-level tokenizer."""
+    onnx = pytest.importorskip("onnx")
+    pytest.importorskip("onnxruntime")
+    tokenizers = pytest.importorskip("tokenizers")
+    from onnx import helper, TensorProto
+
+    table = np.arange(len(WORDS) * 4, dtype=np.float32).reshape(len(WORDS), 4)
+    graph = helper.make_graph(
+        [helper.make_node("Gather", ["table", "input_ids"], ["last_hidden_state"])],
+        "lookup",
+        [helper.make_tensor_value_info("input_ids", TensorProto.INT64, ["batch", "sequence"]),
+         helper.make_tensor_value_info("attention_mask", TensorProto.INT64, ["batch", "sequence"])],
+        [helper.make_tensor_value_info("last_hidden_state", TensorProto.FLOAT, ["batch", "sequence", 4])],
+        [helper.make_tensor("table", TensorProto.FLOAT, table.shape, table.flatten())])
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 14)])
+    model.ir_version = 8
+    onnx.save(model, str(tmp_path / onnx_embeddings.FP32_FILE))
+
+    tokenizer = tokenizers.Tokenizer(tokenizers.models.WordLevel({w: i for i, w in enumerate(WORDS)}, unk_token="[UNK]"))
+    tokenizer.pre_tokenizer = tokenizers.pre_tokenizers.Whitespace()
+    tokenizer.save(str(tmp_path / "tokenizer.json"))
+    return tmp_path, table
+
+
+def test_onnx_embeddings_batches_in_input_order(model_dir):
+    path, table = model_dir
+    embeddings = onnx_embeddings.OnnxEmbeddings(path, quantized=False, batch_size=2)
+    vectors = embeddings.embed_documents(["asthma inhaler", "diabetes", "diabetes insulin asthma"])
+
+    assert np.allclose(vectors[0], (table[2] + table[5]) / 2)
+    assert np.allclose(vectors[1], table[3])
+    assert np.allclose(vectors[2], (table[3] + table[4] + table[2]) / 3)
+    assert np.allclose(embeddings.embed_query("diabetes"), table[3])
+
+
+def test_missing_export_is_reported(tmp_path):
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("tokenizers")
+    with pytest.raises(FileNotFoundError, match="export"):
+        onnx_embeddings.OnnxEmbeddings(tmp_path)
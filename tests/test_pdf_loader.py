@@ -0,0 +1,64 @@
+import multiprocessing
+import pytest
+
+pytest.importorskip("pypdf")
+pytest.importorskip("langchain_text_splitters")
+pdf_loader = pytest.importorskip("tools.pdf_loader")
+
+PAGES = [
+    f"Page {i} covers topic {i}. " + " ".join(f"word{i}x{j}" for j in range(40))
+    for i in range(7)
+]
+
+
+def _write_pdf(path, pages):
+    """Minimal text-only PDF: one Helvetica line per page."""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None,
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for text in pages:
+        stream = f"BT /F1 8 Tf 10 700 Td ({text}) Tj ET".encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % len(objects))
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(pages)} >>".encode()
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    path.write_bytes(bytes(out))
+
+
+@pytest.fixture
+def small_splitter(monkeypatch):
+    # The tiktoken encoding may not be downloadable here; a character splitter
+    # exercises the same page-range logic. Forked workers inherit it.
+    if multiprocessing.get_start_method() != "fork":
+        pytest.skip("worker processes only inherit the patched splitter when forked")
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+    monkeypatch.setattr(pdf_loader, "_text_splitter", RecursiveCharacterTextSplitter(
+        chunk_size=80, chunk_overlap=20, separators=pdf_loader.SEPARATORS))
+
+
+def _chunks(ranges):
+    return [(doc.page_content, doc.metadata["page"]) for _, _, chunks in ranges for doc in chunks]
+
+
+def test_parallel_ranges_match_single_worker(tmp_path, small_splitter):
+    path = tmp_path / "book.pdf"
+    _write_pdf(path, PAGES)
+
+    single = list(pdf_loader.iter_pdf_chunks(str(path), max_workers=1, pages_per_task=len(PAGES)))
+    parallel = list(pdf_loader.iter_pdf_chunks(str(path), max_workers=3, pages_per_task=2))
+
+    assert [(start, end) for start, end, _ in parallel] == [(0, 2), (2, 4), (4, 6), (6, 7)]
+    assert len(_chunks(single)) > len(PAGES)
+    assert _chunks(parallel) == _chunks(single)
+    assert "word3x5" in " ".join(text for text, page in _chunks(parallel) if page == 3)
@@ -0,0 +1,65 @@
+import pytest
+
+pytest.importorskip("langchain_core")
+prompt_budget = pytest.importorskip("tools.prompt_budget")
+from tools.language_utils import build_prompt, format_prompt
+
+
+class WordEncoding:
+    """One token per whitespace-separated word, so budgets are easy to reason about."""
+
+    def encode(self, text):
+        return text.split()
+
+    def decode(self, tokens):
+        return " ".join(tokens)
+
+
+@pytest.fixture(autouse=True)
+def word_tokens(swap_resource):
+    swap_resource("token_encoding", WordEncoding)
+
+
+HISTORY = [f"User: old message number {i} " + "word " * 20 for i in range(10)]
+DOCUMENTS = [f"document {rank} " + "evidence " * 200 for rank in range(4)]
+
+
+def test_small_prompt_is_unchanged():
+    text = format_prompt("en", "User: hello", "How is asthma treated?")
+    assert "User: hello" in text and "How is asthma treated?" in text
+    packed = build_prompt("en", ["User: hello"], "How is asthma treated?")
+    assert packed.text == text
+    assert packed.tokens == len(text.split())
+    assert packed.dropped == {"history": 0, "context": 0}
+
+
+def test_budget_drops_oldest_history_and_lowest_ranked_documents():
+    packed = build_prompt("en", HISTORY, "What should I do?", DOCUMENTS, budget=600)
+    assert packed.tokens <= 600
+    assert "old message number 9" in packed.text  # newest history kept
+    assert "old message number 0" not in packed.text
+    assert "document 0" in packed.text  # best-ranked document kept
+    assert "document 3" not in packed.text
+    assert packed.dropped["history"] > 0 and packed.dropped["context"] > 0
+    assert packed.text.index("old message number 8") < packed.text.index("old message number 9")
+
+
+def test_allocation_lends_unused_space():
+    assert prompt_budget.allocate(100, 10, 500, history_share=0.3) == (10, 90)
+    assert prompt_budget.allocate(100, 500, 10, history_share=0.3) == (90, 10)
+    assert prompt_budget.allocate(100, 500, 500, history_share=0.3) == (30, 70)
+
+
+def test_long_question_is_capped():
+    question = "pain " * (prompt_budget.QUESTION_TOKEN_LIMIT + 100)
+    packed = build_prompt("en", [], question, budget=10_000)
+    assert packed.tokens < prompt_budget.QUESTION_TOKEN_LIMIT + 100
+
+
+def test_answer_budget_is_what_the_prompt_leaves():
+    assert prompt_budget.answer_budget(3000, request_budget=4096) == 1096
+    assert prompt_budget.answer_budget(4000, request_budget=4096) == prompt_budget.ANSWER_MIN_TOKENS
+    assert prompt_budget.answer_budget(10, request_budget=4096) == prompt_budget.ANSWER_MAX_TOKENS
+
+    packed = build_prompt("en", HISTORY, "What should I do?", DOCUMENTS, budget=600)
+    assert packed.answer_tokens == prompt_budget.answer_budget(packed.tokens)
@@ -0,0 +1,85 @@
+import asyncio
+import numpy as np
+import pytest
+
+pytest.importorskip("langchain_core")
+query_builder = pytest.importorskip("tools.query_builder")
+hybrid = pytest.importorskip("tools.hybrid_retriever")
+from tools.embedding_cache import CachedEmbeddings
+from langchain_core.documents import Document
+
+HISTORY = [
+    "User: My son has asthma.",
+    "Doctor: " + "Asthma is common in children. " * 20,
+    "AI: Retrieved documents from medical PDF database.",
+    "User: He coughs at night.",
+    "Doctor: Night cough is typical.",
+    "User: What can trigger an attack?",
+]
+
+
+class AxisEmbeddings:
+    """Each known text maps to its own axis so mixing weights are visible."""
+    AXES = {"What can trigger an attack?": 0, "He coughs at night.": 1, "My son has asthma.": 2}
+
+    def __init__(self):
+        self.calls = []
+
+    def embed_query(self, text):
+        self.calls.append(text)
+        vector = np.zeros(4)
+        vector[self.AXES.get(text, 3)] = 2.0
+        return vector.tolist()
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+
+def test_query_keeps_question_and_recent_user_turns():
+    query = query_builder.build_retrieval_query("What can trigger an attack?", HISTORY, mode="weighted")
+    assert query == "What can trigger an attack?"
+    assert query.turns == ("My son has asthma.", "He coughs at night.")
+    assert query_builder.lexical_text(query) == "He coughs at night. What can trigger an attack?"
+
+    legacy = query_builder.build_retrieval_query("What can trigger an attack?", HISTORY, mode="concat")
+    assert legacy.startswith("Context: ") and legacy.endswith("\nQuestion: What can trigger an attack?")
+
+
+def test_recency_weighted_vector_reuses_cached_turns():
+    inner = AxisEmbeddings()
+    embeddings = CachedEmbeddings(inner, "test-model")
+    query = query_builder.build_retrieval_query("What can trigger an attack?", HISTORY, mode="weighted")
+
+    vector = np.asarray(query_builder.query_vector(embeddings, query))
+    expected = np.asarray([1.0, 0.5, 0.25, 0.0])
+    np.testing.assert_allclose(vector, expected / np.linalg.norm(expected), rtol=1e-6)
+
+    follow_up = query_builder.RetrievalQuery("Is it serious?", query.turns)
+    query_builder.query_vector(embeddings, follow_up)
+    # Earlier turns come from the cache; only the new question reaches the model
+    assert inner.calls[3:] == ["Is it serious?"]
+
+
+class VectorOnlyStore:
+    def __init__(self):
+        self.embeddings = AxisEmbeddings()
+        self.by_vector = []
+
+    def similarity_search(self, query, k):
+        return [Document(page_content=f"text:{query}")]
+
+    def similarity_search_by_vector(self, vector, k):
+        self.by_vector.append(vector)
+        return [Document(page_content="by-vector")]
+
+
+def test_vector_retriever_uses_combined_vector_for_follow_ups():
+    store = VectorOnlyStore()
+    retriever = hybrid.VectorRetriever(store, k=2)
+    query = query_builder.build_retrieval_query("What can trigger an attack?", HISTORY, mode="weighted")
+
+    docs, timings = asyncio.run(retriever.asearch(query))
+    assert docs[0].page_content == "by-vector"
+    assert set(timings) == {"vector_ms", "total_ms"}
+    assert retriever.invoke("plain question")[0].page_content == "text:plain question"
+    assert retriever.stats()["mode"] == "vector"
@@ -0,0 +1,71 @@
+import pytest
+
+replay = pytest.importorskip("tools.replay")
+fake_chat_models = pytest.importorskip("langchain_core.language_models.fake_chat_models")
+from langchain_core.messages import AIMessage
+
+
+class CountingSearch:
+    def __init__(self):
+        self.calls = 0
+
+    def run(self, query):
+        self.calls += 1
+        return f"result for {query}"
+
+
+def make_llm(answers):
+    return fake_chat_models.GenericFakeChatModel(messages=iter([AIMessage(a) for a in answers]))
+
+
+def test_tool_records_then_replays(tmp_path):
+    store = replay.ReplayStore(tmp_path)
+    search = CountingSearch()
+    recorded = replay.wrap_tool("wikipedia", search, {"top_k_results": 2}, mode="record", store=store)
+    assert recorded.run("asthma") == "result for asthma"
+    assert recorded.run("asthma") == "result for asthma"
+    assert search.calls == 1
+
+    offline = replay.wrap_tool("wikipedia", CountingSearch(), {"top_k_results": 2}, mode="replay", store=store)
+    assert offline.run("asthma") == "result for asthma"
+    with pytest.raises(replay.ReplayMissError):
+        offline.run("gout")
+
+
+def test_tool_params_are_part_of_the_key(tmp_path):
+    store = replay.ReplayStore(tmp_path)
+    replay.wrap_tool("wikipedia", CountingSearch(), {"top_k_results": 2}, mode="record", store=store).run("asthma")
+    offline = replay.wrap_tool("wikipedia", CountingSearch(), {"top_k_results": 3}, mode="replay", store=store)
+    with pytest.raises(replay.ReplayMissError):
+        offline.run("asthma")
+
+
+def test_llm_records_then_replays(tmp_path):
+    store = replay.ReplayStore(tmp_path)
+    recorded = replay.wrap_llm(make_llm(["Drink fluids."]), mode="record", store=store)
+    assert recorded.invoke("I have a cold").content == "Drink fluids."
+
+    # The inner model has no answers left, so this can only come from the store
+    offline = replay.wrap_llm(make_llm([]), mode="replay", store=store)
+    assert offline.invoke("I have a cold").content == "Drink fluids."
+    assert "".join(c.content for c in offline.stream("I have a cold")) == "Drink fluids."
+    with pytest.raises(replay.ReplayMissError):
+        offline.invoke("I have a fever")
+
+
+def test_passthrough_returns_inner_objects():
+    llm = make_llm(["x"])
+    assert replay.wrap_llm(llm, mode="passthrough") is llm
+
+
+def test_llm_call_arguments_are_part_of_the_key(tmp_path):
+    store = replay.ReplayStore(tmp_path)
+    recorded = replay.wrap_llm(make_llm(["Short answer.", "Long answer."]), mode="record", store=store)
+    assert recorded.invoke("I have a cold", max_tokens=64).content == "Short answer."
+    assert recorded.invoke("I have a cold", max_tokens=1024).content == "Long answer."
+
+    offline = replay.wrap_llm(make_llm([]), mode="replay", store=store)
+    assert offline.invoke("I have a cold", max_tokens=1024).content == "Long answer."
+    assert offline.invoke("I have a cold", max_tokens=64).content == "Short answer."
+    with pytest.raises(replay.ReplayMissError):
+        offline.invoke("I have a cold", max_tokens=512)
@@ -0,0 +1,85 @@
+import time
+import asyncio
+import pytest
+
+pytest.importorskip("langchain_core")
+reranker = pytest.importorskip("tools.reranker")
+from langchain_core.documents import Document
+
+
+def doc(cid, text):
+    return Document(page_content=text, metadata={"chunk_id": cid})
+
+
+CANDIDATES = [
+    doc("a", "Diabetes overview."),
+    doc("b", "Hypertension overview."),
+    doc("c", "Metformin dosing in diabetes."),
+    doc("d", "Asthma overview."),
+]
+
+
+class FakeCrossEncoder:
+    """Scores by keyword overlap; records every batch it receives."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.batches = []
+
+    def __call__(self, pairs):
+        self.batches.append(len(pairs))
+        time.sleep(self.delay)
+        return [sum(word in passage.lower() for word in query.lower().split()) for query, passage in pairs]
+
+
+class FirstStage:
+    def invoke(self, query):
+        return list(CANDIDATES)
+
+    async def ainvoke(self, query):
+        return list(CANDIDATES)
+
+
+def test_rerank_keeps_top_n_in_one_batch_and_caches_scores():
+    model = FakeCrossEncoder()
+    ranker = reranker.CrossEncoderReranker(model, top_n=2, budget_ms=1000)
+
+    docs = ranker.rerank("metformin diabetes", CANDIDATES)
+    assert [d.metadata["chunk_id"] for d in docs] == ["c", "a"]
+    assert model.batches == [4]
+
+    docs = ranker.rerank("Metformin  diabetes", CANDIDATES[:3] + [doc("e", "Diabetes diet.")])
+    assert model.batches == [4, 1]  # only the new chunk is scored
+    assert ranker.stats()["pairs_cached"] == 3
+
+
+def test_budget_exceeded_falls_back_to_first_stage_order():
+    model = FakeCrossEncoder(delay=0.2)
+    ranker = reranker.CrossEncoderReranker(model, top_n=2, budget_ms=20)
+
+    docs = ranker.rerank("metformin diabetes", CANDIDATES)
+    assert [d.metadata["chunk_id"] for d in docs] == ["a", "b"]
+    assert ranker.stats()["fallbacks"] == 1
+
+    time.sleep(0.3)  # the late batch still lands in the cache
+    docs = asyncio.run(ranker.arerank("metformin diabetes", CANDIDATES))
+    assert [d.metadata["chunk_id"] for d in docs] == ["c", "a"]
+    assert model.batches == [4]
+
+
+def test_model_errors_fall_back():
+    def broken(pairs):
+        raise RuntimeError("model failed to load")
+
+    ranker = reranker.CrossEncoderReranker(broken, top_n=3, budget_ms=1000)
+    assert ranker.rerank("asthma", CANDIDATES) == CANDIDATES[:3]
+
+
+def test_reranking_retriever_reports_timings():
+    retriever = reranker.RerankingRetriever(
+        FirstStage(), reranker.CrossEncoderReranker(FakeCrossEncoder(), top_n=1, budget_ms=1000))
+    docs, timings = retriever.search("asthma")
+    assert [d.metadata["chunk_id"] for d in docs] == ["d"]
+    assert set(timings) == {"retrieve_ms", "rerank_ms", "total_ms"}
+    assert asyncio.run(retriever.ainvoke("asthma"))[0].metadata["chunk_id"] == "d"
+    assert retriever.stats()["rerank"]["reranked"] == 2
@@ -0,0 +1,101 @@
+import time
+import asyncio
+import pytest
+from core.resilience import (CircuitBreaker, Dependency, CircuitOpenError, DependencyTimeoutError,
+                             CLOSED, OPEN, HALF_OPEN)
+
+
+def failing():
+    raise ConnectionError("provider down")
+
+
+def test_breaker_trips_and_rejects_instantly():
+    dep = Dependency("groq", timeout=1, retries=0, breaker=CircuitBreaker("groq", failure_threshold=2))
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            dep.call(failing)
+    assert dep.breaker.state == OPEN
+    assert not dep.available()
+
+    started = time.monotonic()
+    with pytest.raises(CircuitOpenError):
+        dep.call(failing)
+    assert time.monotonic() - started < 0.05
+    assert dep.breaker.stats()["trips"] == 1
+    assert dep.breaker.stats()["rejected"] == 1
+
+
+def test_half_open_probe_closes_or_reopens():
+    breaker = CircuitBreaker("wiki", failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    time.sleep(0.06)
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()  # only one probe at a time
+    breaker.record_failure()
+    assert breaker.state == OPEN and breaker.trips == 2
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+
+
+def test_retries_are_bounded():
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) < 2:
+            raise ConnectionError("blip")
+        return "ok"
+
+    dep = Dependency("ddg", timeout=1, retries=1, backoff=0.01)
+    assert dep.call(flaky) == "ok"
+    assert len(calls) == 2
+
+
+def test_sync_and_async_timeouts():
+    dep = Dependency("wikipedia", timeout=0.05, retries=0)
+    with pytest.raises(DependencyTimeoutError):
+        dep.call(time.sleep, 0.5)
+
+    async def slow():
+        await asyncio.sleep(0.5)
+
+    with pytest.raises(DependencyTimeoutError):
+        asyncio.run(dep.acall(slow))
+    assert dep.breaker.stats()["failures"] == 2
+
+
+def test_call_once_never_retries():
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        raise ConnectionError("provider down")
+
+    dep = Dependency("wikipedia", timeout=1, retries=2)
+    with pytest.raises(ConnectionError):
+        dep.call_once(flaky)
+    assert len(calls) == 1 and dep.breaker.stats()["failures"] == 1
+
+
+def test_cancelled_probe_is_released():
+    dep = Dependency("groq", timeout=1, retries=0,
+                     breaker=CircuitBreaker("groq", failure_threshold=1, reset_timeout=0.01))
+    with pytest.raises(ConnectionError):
+        dep.call(failing)
+    time.sleep(0.02)
+    assert dep.breaker.state == HALF_OPEN
+
+    async def cancelled_probe():
+        task = asyncio.create_task(dep.acall(asyncio.sleep, 10))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancelled_probe())
+    assert dep.breaker.allow()  # the next call may probe again
@@ -0,0 +1,90 @@
+import time
+from core.resources import ResourceRegistry
+
+
+def test_resources_are_created_lazily_once():
+    calls = []
+    registry = ResourceRegistry()
+    registry.register("model", lambda: calls.append(1) or object())
+
+    assert calls == []
+    first = registry.get("model")
+    assert registry.get("model") is first
+    assert calls == [1]
+    assert registry.status()["resources"]["model"]["load_seconds"] is not None
+
+
+def test_failed_resource_is_retried_and_reported():
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("model download failed")
+        return "ok"
+
+    registry = ResourceRegistry()
+    registry.register("model", flaky)
+    registry.warmup()
+    assert registry.status()["resources"]["model"]["error"] == "model download failed"
+    assert registry.get("model") == "ok"
+    assert registry.status()["resources"]["model"]["error"] is None
+
+
+def test_background_warmup_reports_ready():
+    registry = ResourceRegistry()
+    registry.register("slow", lambda: time.sleep(0.05) or "done")
+
+    assert not registry.is_ready()
+    assert registry.start_warmup()
+    assert not registry.start_warmup()
+    registry._warmup_thread.join(timeout=5)
+    assert registry.is_ready()
+    assert "slow" in registry.report()
+
+
+def test_failed_warmup_is_not_ready_and_is_retried():
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("vector store unavailable")
+        return "ok"
+
+    registry = ResourceRegistry()
+    registry.register("vectorstore", flaky)
+    registry.register("llm", lambda: "llm")
+    assert registry.start_warmup()
+    registry._warmup_thread.join(timeout=5)
+    assert not registry.is_ready()
+    assert not registry.status()["ready"]
+
+    assert registry.start_warmup()  # the next probe tries again
+    registry._warmup_thread.join(timeout=5)
+    assert registry.is_ready()
+    assert not registry.start_warmup()
+
+
+def test_override_restores_the_original_factory():
+    registry = ResourceRegistry()
+    registry.register("model", lambda: "real")
+    assert registry.get("model") == "real"
+    with registry.override("model", lambda: "fake"):
+        assert registry.get("model") == "fake"
+    assert registry.get("model") == "real"
+
+
+def test_disabled_and_optional_resources_do_not_block_readiness():
+    def broken():
+        raise RuntimeError("model download failed")
+
+    registry = ResourceRegistry()
+    registry.register("llm", lambda: "llm")
+    registry.register("cross_encoder", broken, enabled=False)
+    registry.register("answer_cache", broken, required=False)
+    registry.warmup()
+
+    assert registry.status()["resources"]["cross_encoder"]["error"] is None  # not even tried
+    assert registry.status()["resources"]["answer_cache"]["error"] == "model download failed"
+    assert registry.is_ready()
@@ -0,0 +1,89 @@
+import time
+import asyncio
+import pytest
+
+search_cache = pytest.importorskip("tools.search_cache")
+SearchCache = search_cache.SearchCache
+
+
+def test_hit_after_put_with_normalized_query(tmp_path):
+    cache = SearchCache(tmp_path / "cache.sqlite3")
+    assert cache.get("wikipedia", "Diabetes  Symptoms") == (False, None)
+    cache.put("wikipedia", "Diabetes  Symptoms", "Thirst and fatigue.")
+
+    assert cache.get("wikipedia", "diabetes symptoms") == (True, "Thirst and fatigue.")
+    assert cache.get("duckduckgo", "diabetes symptoms") == (False, None)
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 2, 1)
+
+
+def test_size_is_checked_every_few_inserts(tmp_path):
+    cache = SearchCache(tmp_path / "cache.sqlite3", max_entries=2, evict_every=3)
+    for query in "abcde":
+        cache.put("duckduckgo", query, query.upper())
+        time.sleep(0.01)
+    # The third insert trimmed the table to two rows; the next two only add
+    assert (cache.stats()["entries"], cache.stats()["evictions"]) == (4, 1)
+
+    cache.put("duckduckgo", "f", "F")
+    assert (cache.stats()["entries"], cache.stats()["evictions"]) == (2, 4)
+    assert cache.get("duckduckgo", "e") == (True, "E")
+    assert cache.get("duckduckgo", "f") == (True, "F")
+
+
+def test_negative_results_use_shorter_ttl(tmp_path):
+    cache = SearchCache(tmp_path / "cache.sqlite3", ttl=60, negative_ttl=0.05)
+    cache.put("duckduckgo", "asdfgh", "No good DuckDuckGo Search Result was found")
+    cache.put("duckduckgo", "migraine", "Headache disorder.")
+    assert cache.get("duckduckgo", "asdfgh")[0]
+    assert cache.stats()["negative_hits"] == 1
+
+    time.sleep(0.1)
+    assert cache.get("duckduckgo", "asdfgh") == (False, None)
+    assert cache.get("duckduckgo", "migraine") == (True, "Headache disorder.")
+
+
+def test_lru_eviction_and_persistence(tmp_path):
+    path = tmp_path / "cache.sqlite3"
+    cache = SearchCache(path, max_entries=2, evict_every=1)
+    cache.put("wikipedia", "a", "A")
+    time.sleep(0.01)
+    cache.put("wikipedia", "b", "B")
+    time.sleep(0.01)
+    cache.get("wikipedia", "a")  # b becomes least recently used
+    time.sleep(0.01)
+    cache.put("wikipedia", "c", "C")
+    assert cache.stats()["evictions"] == 1
+
+    # A second instance (another worker, or after a restart) sees the same rows
+    reopened = SearchCache(path, max_entries=2, evict_every=1)
+    assert reopened.get("wikipedia", "a") == (True, "A")
+    assert reopened.get("wikipedia", "b") == (False, None)
+    assert reopened.get("wikipedia", "c") == (True, "C")
+
+
+def test_cached_search_skips_fetch_and_does_not_cache_errors(tmp_path, monkeypatch):
+    cache = SearchCache(tmp_path / "cache.sqlite3")
+    monkeypatch.setattr(search_cache, "get_search_cache", lambda: cache)
+    calls = []
+
+    def fetch(query):
+        calls.append(query)
+        if query == "boom":
+            raise TimeoutError("slow")
+        return f"about {query}"
+
+    assert search_cache.cached_search("wikipedia", "Asthma", fetch) == "about Asthma"
+    assert search_cache.cached_search("wikipedia", "asthma", fetch) == "about Asthma"
+    for _ in range(2):
+        with pytest.raises(TimeoutError):
+            search_cache.cached_search("wikipedia", "boom", fetch)
+    assert calls == ["Asthma", "boom", "boom"]
+
+    async def afetch(query):
+        calls.append(query)
+        return f"async {query}"
+
+    assert asyncio.run(search_cache.acached_search("wikipedia", "asthma", afetch)) == "about Asthma"
+    assert asyncio.run(search_cache.acached_search("duckduckgo", "gout", afetch)) == "async gout"
+    assert calls[-1] == "gout"
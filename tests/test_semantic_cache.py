@@ -0,0 +1,89 @@
+import pytest
+
+semantic_cache = pytest.importorskip("tools.semantic_cache")
+SemanticCache = semantic_cache.SemanticCache
+
+VECTORS = {
+    "symptoms of diabetes": [1.0, 0.0, 0.0],
+    "diabetes symptoms?": [0.99, 0.1, 0.0],
+    "treatment for migraine": [0.0, 1.0, 0.0],
+}
+
+
+def make_cache(**kwargs):
+    return SemanticCache(lambda text: VECTORS[text], threshold=0.95, **kwargs)
+
+
+def test_similar_question_hits_in_same_language_only():
+    cache = make_cache()
+    cache.store("symptoms of diabetes", "en", {"generation": "Thirst and fatigue."})
+
+    assert cache.lookup("diabetes symptoms?", "en")["generation"] == "Thirst and fatigue."
+    assert cache.lookup("diabetes symptoms?", "es") is None
+    assert cache.lookup("treatment for migraine", "en") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+
+
+def test_history_bypasses_cache():
+    cache = make_cache()
+    cache.store("symptoms of diabetes", "en", {"generation": "Thirst."})
+    assert cache.lookup("symptoms of diabetes", "en", history=["User: hi"]) is None
+    assert cache.stats()["bypassed"] == 1
+
+
+def test_lru_eviction_and_ttl():
+    cache = make_cache(max_entries=1)
+    cache.store("symptoms of diabetes", "en", {"generation": "Thirst."})
+    cache.store("treatment for migraine", "en", {"generation": "Rest."})
+    assert cache.lookup("symptoms of diabetes", "en") is None
+    assert cache.stats()["evictions"] == 1
+
+    expired = make_cache(ttl=-1)
+    expired.store("symptoms of diabetes", "en", {"generation": "Thirst."})
+    assert expired.lookup("symptoms of diabetes", "en") is None
+
+
+def test_follow_up_answer_is_never_served_to_a_fresh_conversation(monkeypatch):
+    cache = make_cache()
+    monkeypatch.setattr(semantic_cache, "get_answer_cache", lambda: cache)
+    result = {"generation": "Avoid sugary drinks.", "source": "llm_knowledge", "language": "en"}
+
+    semantic_cache.cache_answer("symptoms of diabetes", "en", result, history=["User: I have diabetes"])
+    assert semantic_cache.lookup_answer("diabetes symptoms?", "en", history=[]) is None
+    assert cache.stats()["entries"] == 0
+
+    semantic_cache.cache_answer("symptoms of diabetes", "en", result, history=[])
+    assert semantic_cache.lookup_answer("diabetes symptoms?", "en")["generation"] == "Avoid sugary drinks."
+
+
+def test_auto_language_is_never_cached(monkeypatch):
+    cache = make_cache()
+    monkeypatch.setattr(semantic_cache, "get_answer_cache", lambda: cache)
+    result = {"generation": "Thirst.", "source": "llm_knowledge", "language": "auto"}
+    semantic_cache.cache_answer("symptoms of diabetes", "auto", result)
+    assert cache.stats()["entries"] == 0
+    assert semantic_cache.lookup_answer("symptoms of diabetes", "auto") is None
+
+
+def test_expired_entries_are_swept_from_the_old_end(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(semantic_cache.time, "time", lambda: clock[0])
+    cache = make_cache(ttl=10)
+    cache.store("symptoms of diabetes", "en", {"generation": "Thirst."})
+    clock[0] += 5
+    cache.store("treatment for migraine", "en", {"generation": "Rest."})
+    clock[0] += 6  # only the first entry has expired
+    cache.store("diabetes symptoms?", "en", {"generation": "Thirst."})
+    assert cache.stats()["entries"] == 2
+    assert cache.lookup("treatment for migraine", "en")["generation"] == "Rest."
+
+
+def test_answers_are_stored_under_the_language_they_were_written_in(monkeypatch):
+    cache = make_cache()
+    monkeypatch.setattr(semantic_cache, "get_answer_cache", lambda: cache)
+    # Requested in English, but the LLM agent switched to Spanish
+    result = {"generation": "Sed y cansancio.", "source": "llm_knowledge", "language": "es"}
+    semantic_cache.cache_answer("symptoms of diabetes", "en", result)
+    assert semantic_cache.lookup_answer("diabetes symptoms?", "en") is None
+    assert semantic_cache.lookup_answer("diabetes symptoms?", "es")["generation"] == "Sed y cansancio."
@@ -0,0 +1,88 @@
+import time
+import pytest
+
+session_store = pytest.importorskip("tools.session_store")
+
+
+def make_memory(tmp_path, **kwargs):
+    return session_store.MemorySessionStore(**kwargs)
+
+
+def make_sqlite(tmp_path, **kwargs):
+    return session_store.SQLiteSessionStore(tmp_path / "sessions.sqlite3", **kwargs)
+
+
+def make_redis(tmp_path, **kwargs):
+    fakeredis = pytest.importorskip("fakeredis")
+    kwargs.pop("max_entries", None)  # Redis bounds memory server-side
+    return session_store.RedisSessionStore(client=fakeredis.FakeRedis(), **kwargs)
+
+
+BACKENDS = [make_memory, make_sqlite, make_redis]
+
+
+@pytest.mark.parametrize("make_store", BACKENDS)
+def test_round_trip_caps_history_and_reports_size(tmp_path, make_store):
+    store = make_store(tmp_path, history_limit=3)
+    sid = session_store.new_session_id()
+    assert store.get(sid) is None
+
+    data = {"history": ["User: a", "Doctor: b"]}
+    store.save(sid, data)
+    data["history"].append("mutated after save")
+    assert store.get(sid) == {"history": ["User: a", "Doctor: b"]}
+
+    store.save(sid, {"history": [f"line {i}" for i in range(10)]})
+    assert store.get(sid)["history"] == ["line 7", "line 8", "line 9"]
+
+    stats = store.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (2, 1, 1)
+    assert stats["bytes"] > 0
+
+    store.delete(sid)
+    assert store.get(sid) is None
+
+
+@pytest.mark.parametrize("make_store", [make_memory, make_sqlite])
+def test_ttl_and_lru_bound(tmp_path, make_store):
+    store = make_store(tmp_path, ttl=0.05, max_entries=2)
+    store.save("old", {"history": []})
+    time.sleep(0.1)
+    assert store.get("old") is None
+
+    store.ttl = 60
+    for sid in ("a", "b"):
+        store.save(sid, {"history": []})
+    store.get("a")  # b is now least recently used
+    store.save("c", {"history": []})
+    assert store.get("b") is None
+    assert store.get("a") is not None and store.get("c") is not None
+    assert store.stats()["evictions"] == 1
+
+
+def test_sqlite_sessions_survive_reopen(tmp_path):
+    make_sqlite(tmp_path).save("sid", {"history": ["User: hi"]})
+    assert make_sqlite(tmp_path).get("sid") == {"history": ["User: hi"]}
+
+
+def test_ids_are_unique_and_history_is_bounded():
+    assert len({session_store.new_session_id() for _ in range(1000)}) == 1000
+    data = session_store.append_history({}, "User: 1", "Doctor: 2", "User: 3", limit=2)
+    assert data == {"history": ["Doctor: 2", "User: 3"]}
+
+
+def test_base_store_is_abstract():
+    with pytest.raises(TypeError):
+        session_store.SessionStore()
+
+
+def test_redis_size_is_measured_in_pipelined_batches(tmp_path, monkeypatch):
+    monkeypatch.setattr(session_store, "REDIS_STATS_BATCH", 2)
+    store = make_redis(tmp_path)
+    blobs = 0
+    for i in range(5):
+        data = {"history": [f"User: question {i}"]}
+        store.save(f"s{i}", data)
+        blobs += len(store._encode(data).encode("utf-8"))
+    stats = store.stats()
+    assert (stats["entries"], stats["bytes"]) == (5, blobs)
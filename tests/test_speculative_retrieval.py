@@ -0,0 +1,83 @@
+import time
+import asyncio
+import pytest
+
+pytest.importorskip("langchain_core")
+pytest.importorskip("tools.vector_store")
+from langchain_core.documents import Document
+from core.state import initialize_state
+from agents import RetrieverAgent, SpeculativeLLMAgent
+
+
+class FakeResponse:
+    def __init__(self, content):
+        self.content = content
+
+
+class FakeLLM:
+    def __init__(self, answer):
+        self.answer = answer
+
+    def invoke(self, prompt, config=None, **kwargs):
+        if self.answer is None:
+            raise TimeoutError("provider down")
+        return FakeResponse(self.answer)
+
+    async def ainvoke(self, prompt, config=None, **kwargs):
+        return self.invoke(prompt, config)
+
+
+class FakeRetriever:
+    calls = 0
+
+    def invoke(self, query):
+        FakeRetriever.calls += 1
+        return [Document(page_content="Asthma is treated with inhalers.")]
+
+    async def ainvoke(self, query):
+        return self.invoke(query)
+
+
+@pytest.fixture
+def fakes(swap_resource):
+    FakeRetriever.calls = 0
+    swap_resource("retriever", FakeRetriever)
+    return lambda answer: swap_resource("llm", lambda: FakeLLM(answer))
+
+
+def make_state():
+    state = initialize_state()
+    state.update({"question": "How is asthma treated?", "conversation_history": []})
+    return state
+
+
+def test_prefetched_documents_are_used_when_llm_fails(fakes):
+    fakes(None)
+    state = SpeculativeLLMAgent.process(make_state())
+    assert state["llm_success"] is False
+    assert state["prefetched_documents"][0].page_content.startswith("Asthma")
+
+    state = RetrieverAgent.process(state)
+    assert state["rag_success"] is True
+    assert state["prefetched_documents"] is None
+    assert FakeRetriever.calls == 1
+
+
+def test_speculation_is_discarded_when_llm_answers(fakes):
+    fakes("Use an inhaler.")
+    state = asyncio.run(SpeculativeLLMAgent.aprocess(make_state()))
+    assert state["llm_success"] is True
+    assert state["generation"] == "Use an inhaler."
+    assert state["prefetched_documents"] is None
+
+
+def test_hung_speculative_lookup_does_not_block_the_fallback(fakes, monkeypatch):
+    import agents.speculative_agent as speculative_agent
+    fakes(None)
+    monkeypatch.setattr(speculative_agent, "SPECULATIVE_RETRIEVAL_TIMEOUT", 0.05)
+    monkeypatch.setattr(RetrieverAgent, "retrieve", staticmethod(lambda query: time.sleep(1)))
+
+    started = time.monotonic()
+    state = SpeculativeLLMAgent.process(make_state())
+    assert time.monotonic() - started < 0.5
+    assert state["prefetched_documents"] is None
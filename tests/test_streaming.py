@@ -0,0 +1,40 @@
+from core.streaming import TokenRelay, format_sse
+
+
+class Chunk:
+    def __init__(self, content, id=None):
+        self.content = content
+        self.id = id
+
+
+def test_relay_forwards_answer_tokens_only():
+    relay = TokenRelay()
+    assert relay.handle("messages", (Chunk("Hel"), {"langgraph_node": "llm_agent"})) == [("token", "Hel")]
+    assert relay.handle("messages", (Chunk("ignored"), {"langgraph_node": "planner"})) == []
+    assert relay.handle("messages", (Chunk(""), {"langgraph_node": "llm_agent"})) == []
+
+
+def test_relay_resets_when_answer_node_changes():
+    relay = TokenRelay()
+    relay.handle("messages", (Chunk("partial"), {"langgraph_node": "llm_agent"}))
+    events = relay.handle("messages", (Chunk("Rest"), {"langgraph_node": "executor"}))
+    assert events == [("reset", None), ("token", "Rest")]
+
+
+def test_relay_keeps_last_state_snapshot():
+    relay = TokenRelay()
+    relay.handle("values", {"generation": ""})
+    relay.handle("values", {"generation": "done"})
+    assert relay.final_state == {"generation": "done"}
+
+
+def test_format_sse():
+    assert format_sse("token", "héllo") == 'event: token\ndata: "héllo"\n\n'
+
+
+def test_relay_resets_when_the_same_node_retries_its_call():
+    relay = TokenRelay()
+    relay.handle("messages", (Chunk("Part", id="run-1"), {"langgraph_node": "llm_agent"}))
+    assert relay.handle("messages", (Chunk("ial", id="run-1"), {"langgraph_node": "llm_agent"})) == [("token", "ial")]
+    events = relay.handle("messages", (Chunk("Full", id="run-2"), {"langgraph_node": "llm_agent"}))
+    assert events == [("reset", None), ("token", "Full")]
@@ -0,0 +1,134 @@
+import threading
+import time
+import pytest
+
+pytest.importorskip("langchain_core")
+pytest.importorskip("pypdf")
+vector_store = pytest.importorskip("tools.vector_store")
+
+
+@pytest.fixture
+def db_dir(tmp_path, monkeypatch):
+    db = tmp_path / "medical_db"
+    monkeypatch.setattr(vector_store, "VECTOR_DB_DIR", db)
+    monkeypatch.setattr(vector_store, "MANIFEST_PATH", db / "manifest.json")
+    monkeypatch.setattr(vector_store, "LOCK_PATH", db / ".lock")
+    return db
+
+
+def test_index_lock_serializes_workers(db_dir):
+    pytest.importorskip("fcntl")
+    spans = []
+
+    def worker():
+        # Each call opens its own descriptor, like a separate worker process would
+        with vector_store.index_lock():
+            start = time.perf_counter()
+            time.sleep(0.1)
+            spans.append((start, time.perf_counter()))
+
+    threads = [threading.Thread(target=worker) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    spans.sort()
+    assert len(spans) == 3
+    assert all(prev_end <= start for (_, prev_end), (start, _) in zip(spans, spans[1:]))
+
+
+def test_rebuild_keeps_the_lock_file(db_dir):
+    (db_dir / "flat" / "gen-000001").mkdir(parents=True)
+    (db_dir / "manifest.json").write_text("{}")
+    with vector_store.index_lock():
+        vector_store._clear_vector_db()
+        assert [path.name for path in db_dir.iterdir()] == [".lock"]
+
+
+class StubVectorStore:
+    """Records what ingestion adds and deletes."""
+
+    def __init__(self):
+        self.added = []
+        self.deleted = []
+
+    def add_documents(self, docs, ids):
+        self.added.extend(ids)
+
+    def delete(self, ids):
+        self.deleted.extend(ids)
+
+
+def _fake_chunks(texts):
+    from langchain_core.documents import Document
+
+    def iter_pdf_chunks(path):
+        yield 0, 1, [Document(page_content=text, metadata={"page": 0}) for text in texts]
+    return iter_pdf_chunks
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch, db_dir):
+    data = tmp_path / "data"
+    data.mkdir()
+    (data / "a.pdf").write_bytes(b"%PDF-1.4 a")
+    monkeypatch.setattr(vector_store, "DATA_DIR", data)
+    monkeypatch.setattr(vector_store, "list_pdf_files", lambda: {"a.pdf": data / "a.pdf"})
+    monkeypatch.setattr(vector_store, "iter_pdf_chunks", _fake_chunks(["asthma", "insulin"]))
+    return data
+
+
+def test_current_manifest_is_reused(data_dir, db_dir, monkeypatch):
+    store = StubVectorStore()
+    monkeypatch.setattr(vector_store, "_open_vectorstore", lambda: store)
+    db_dir.mkdir()
+    (db_dir / "chroma.sqlite3").write_bytes(b"existing index")
+    ids = [vector_store.chunk_id("a.pdf", text) for text in ("asthma", "insulin")]
+    vector_store.write_manifest({
+        "params": vector_store.index_params(),
+        "files": {"a.pdf": {"sha256": vector_store.file_sha256(data_dir / "a.pdf"), "chunks": ids}},
+    })
+
+    vector_store._create_vectorstore()
+
+    assert store.added == [] and store.deleted == []
+    assert (db_dir / "chroma.sqlite3").exists()
+
+
+def test_params_mismatch_rebuilds(data_dir, db_dir, monkeypatch):
+    store = StubVectorStore()
+    monkeypatch.setattr(vector_store, "_open_vectorstore", lambda: store)
+    db_dir.mkdir()
+    (db_dir / "chroma.sqlite3").write_bytes(b"old model vectors")
+    vector_store.write_manifest({
+        "params": {**vector_store.index_params(), "embedding_model": "some-older-model"},
+        "files": {"a.pdf": {"sha256": vector_store.file_sha256(data_dir / "a.pdf"), "chunks": ["x"]}},
+    })
+
+    vector_store._create_vectorstore()
+
+    assert not (db_dir / "chroma.sqlite3").exists()
+    assert sorted(store.added) == sorted(vector_store.chunk_id("a.pdf", t) for t in ("asthma", "insulin"))
+    manifest = vector_store.read_manifest()
+    assert manifest["params"] == vector_store.index_params()
+    assert sorted(manifest["files"]["a.pdf"]["chunks"]) == sorted(store.added)
+
+
+def test_sync_embeds_only_new_chunks_and_deletes_stale(data_dir, db_dir, monkeypatch):
+    db_dir.mkdir()
+    monkeypatch.setattr(vector_store, "iter_pdf_chunks", _fake_chunks(["asthma", "fever"]))
+    cid = lambda text: vector_store.chunk_id("a.pdf", text)
+    manifest = {"params": vector_store.index_params(), "files": {
+        "a.pdf": {"sha256": "changed", "chunks": [cid("asthma"), cid("insulin")]},
+        "gone.pdf": {"sha256": "whatever", "chunks": ["g1", "g2"]},
+    }}
+    store = StubVectorStore()
+
+    vector_store.sync_vectorstore(store, manifest, {"a.pdf": data_dir / "a.pdf"})
+
+    assert store.added == [cid("fever")]
+    assert sorted(store.deleted) == sorted(["g1", "g2", cid("insulin")])
+    assert set(manifest["files"]) == {"a.pdf"}
+    assert manifest["files"]["a.pdf"]["chunks"] == [cid("asthma"), cid("fever")]
+    assert vector_store.read_manifest() == manifest
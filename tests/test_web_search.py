@@ -0,0 +1,87 @@
+import time
+import json
+import asyncio
+import threading
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+
+web_search = pytest.importorskip("agents.web_search_agent")
+WebSource = web_search.WebSource
+
+# path -> (delay seconds, status, body)
+ROUTES = {}
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        delay, status, body = ROUTES[self.path.split("?")[0]]
+        time.sleep(delay)
+        self.send_response(status)
+        self.end_headers()
+        self.wfile.write(json.dumps(body).encode())
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def server_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+
+def source(server_url, name, timeout=2.0):
+    def fetch(query):
+        with urllib.request.urlopen(f"{server_url}/{name}?q={query}", timeout=10) as response:
+            return json.loads(response.read())
+    return WebSource(name, name[:4], name.title(), fetch, timeout)
+
+
+def test_first_success_wins_without_waiting_for_slow_source(server_url):
+    ROUTES.update({"/wikipedia": (0.05, 200, "Asthma is a lung disease."),
+                   "/duckduckgo": (2.0, 200, "Slow answer")})
+    started = time.monotonic()
+    results = web_search.hedged_fetch([source(server_url, "wikipedia"), source(server_url, "duckduckgo")],
+                                      "asthma", grace=0.1)
+    assert time.monotonic() - started < 1.0
+    assert [(s.name, content) for s, content in results] == [("wikipedia", "Asthma is a lung disease.")]
+
+
+def test_results_within_grace_window_are_merged(server_url):
+    ROUTES.update({"/wikipedia": (0.05, 200, "Wiki text"),
+                   "/duckduckgo": (0.1, 200, "DDG text")})
+    results = web_search.hedged_fetch([source(server_url, "wikipedia"), source(server_url, "duckduckgo")],
+                                      "asthma", grace=0.5)
+    assert [content for _, content in results] == ["Wiki text", "DDG text"]
+
+
+def test_errors_and_empty_results_fall_through_to_other_source(server_url):
+    ROUTES.update({"/wikipedia": (0.0, 500, "boom"),
+                   "/duckduckgo": (0.1, 200, "DDG text")})
+    results = web_search.hedged_fetch([source(server_url, "wikipedia"), source(server_url, "duckduckgo")],
+                                      "asthma", grace=0.1)
+    assert [s.name for s, _ in results] == ["duckduckgo"]
+
+
+def test_per_source_timeout(server_url):
+    ROUTES.update({"/wikipedia": (2.0, 200, "Too late"),
+                   "/duckduckgo": (0.0, 200, "No good DuckDuckGo Search Result was found")})
+    started = time.monotonic()
+    results = web_search.hedged_fetch([source(server_url, "wikipedia", timeout=0.3),
+                                       source(server_url, "duckduckgo")], "asthma")
+    assert results == []
+    assert time.monotonic() - started < 1.0
+
+
+def test_async_variant_cancels_loser(server_url):
+    ROUTES.update({"/wikipedia": (2.0, 200, "Slow answer"),
+                   "/duckduckgo": (0.05, 200, "DDG text")})
+    started = time.monotonic()
+    results = asyncio.run(web_search.ahedged_fetch(
+        [source(server_url, "wikipedia"), source(server_url, "duckduckgo")], "asthma", grace=0.1))
+    assert [s.name for s, _ in results] == ["duckduckgo"]
+    assert time.monotonic() - started < 1.0
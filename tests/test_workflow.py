@@ -0,0 +1,93 @@
+import time
+import asyncio
+import pytest
+
+pytest.importorskip("langgraph")
+pytest.importorskip("tools.vector_store")
+from langchain_core.documents import Document
+from core.langgraph_workflow import setup_workflow
+from core.state import initialize_state
+
+LATENCY = 0.2
+
+
+class StubResponse:
+    def __init__(self, content):
+        self.content = content
+
+
+class SlowLLM:
+    """Answers every prompt after a fixed delay and tracks how many calls overlap."""
+
+    def __init__(self, latency=LATENCY):
+        self.latency = latency
+        self.running = 0
+        self.max_running = 0
+
+    def invoke(self, prompt, config=None, **kwargs):
+        time.sleep(self.latency)
+        return StubResponse("Rest and drink fluids.")
+
+    async def ainvoke(self, prompt, config=None, **kwargs):
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            self.running -= 1
+        return StubResponse("Rest and drink fluids.")
+
+
+class StubRetriever:
+    # Keeps a speculative lookup away from the real index
+    def invoke(self, query):
+        return [Document(page_content="Influenza causes fever and aches.")]
+
+    async def ainvoke(self, query):
+        return self.invoke(query)
+
+
+@pytest.fixture
+def llm(swap_resource):
+    llm = SlowLLM()
+    swap_resource("llm", lambda: llm)
+    swap_resource("retriever", StubRetriever)
+    return llm
+
+
+def make_state(question):
+    state = initialize_state()
+    state.update({"question": question, "conversation_history": [f"User: {question}"]})
+    return state
+
+
+def _comparable(state):
+    return {key: value for key, value in state.items() if key != "conversation_log"}
+
+
+def test_ainvoke_matches_invoke(llm):
+    workflow = setup_workflow()
+    sync_result = workflow.invoke(make_state("What are the symptoms of flu?"))
+    async_result = asyncio.run(workflow.ainvoke(make_state("What are the symptoms of flu?")))
+
+    assert sync_result["generation"] == "Rest and drink fluids."
+    assert sync_result["llm_success"] is True
+    assert _comparable(async_result) == _comparable(sync_result)
+
+
+def test_concurrent_ainvoke_calls_overlap(llm):
+    workflow = setup_workflow()
+    requests = 5
+
+    async def run_all():
+        return await asyncio.gather(*(workflow.ainvoke(make_state(f"What are the symptoms of condition {i}?"))
+                                      for i in range(requests)))
+
+    started = time.perf_counter()
+    results = asyncio.run(run_all())
+    elapsed = time.perf_counter() - started
+
+    assert [result["generation"] for result in results] == ["Rest and drink fluids."] * requests
+    assert llm.max_running == requests
+    # Serial calls would take requests * LATENCY
+    assert elapsed < requests * LATENCY / 2
@@ -0,0 +1,109 @@
+# tools/embedding_cache.py
+import os
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import List
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "4096"))
+
+
+def normalize_text(text: str) -> str:
+    # Only whitespace is normalized: the model is case- and punctuation-sensitive
+    return " ".join(text.split())
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper with a bounded LRU of query vectors, keyed by
+    (model name, normalized text) and stored as float32 arrays.
+    Document embedding (ingestion) is passed through uncached.
+    """
+
+    def __init__(self, inner: Embeddings, model_name: str, max_entries: int = QUERY_EMBEDDING_CACHE_SIZE):
+        self.inner = inner
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self._vectors = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _key(self, text: str):
+        return self.model_name, normalize_text(text)
+
+    def _get(self, key):
+        with self._lock:
+            vector = self._vectors.get(key)
+            if vector is None:
+                self.misses += 1
+                return None
+            self._vectors.move_to_end(key)
+            self.hits += 1
+            return vector
+
+    def _put(self, key, embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        with self._lock:
+            self._vectors[key] = vector
+            self._vectors.move_to_end(key)
+            while len(self._vectors) > self.max_entries:
+                self._vectors.popitem(last=False)
+                self.evictions += 1
+        return vector
+
+    def embed_query(self, text: str) -> List[float]:
+        key = self._key(text)
+        vector = self._get(key)
+        if vector is None:
+            # Misses return the stored float32 values too, so hits are bit-identical
+            vector = self._put(key, self.inner.embed_query(text))
+        return vector.tolist()
+
+    async def aembed_query(self, text: str) -> List[float]:
+        key = self._key(text)
+        vector = self._get(key)
+        if vector is None:
+            # The local model is CPU-bound; keep it off the event loop
+            vector = self._put(key, await asyncio.to_thread(self.inner.embed_query, text))
+        return vector.tolist()
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """embed_query for many texts, with all cache misses encoded in one model call."""
+        keys = [self._key(text) for text in texts]
+        vectors = {key: self._get(key) for key in dict.fromkeys(keys)}
+        missing = [key for key, vector in vectors.items() if vector is None]
+        if missing:
+            # Both backends encode queries and documents the same way, so one batch fills the query cache
+            for key, embedding in zip(missing, self.inner.embed_documents([text for _, text in missing])):
+                vectors[key] = self._put(key, embedding)
+        return [vectors[key].tolist() for key in keys]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.inner.embed_documents(texts)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await asyncio.to_thread(self.inner.embed_documents, texts)
+
+    def clear(self):
+        with self._lock:
+            self._vectors.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        with self._lock:
+            size_bytes = sum(vector.nbytes for vector in self._vectors.values())
+            entries = len(self._vectors)
+        return {
+            "model": self.model_name,
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "bytes": size_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
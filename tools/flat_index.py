@@ -0,0 +1,307 @@
+# tools/flat_index.py
+import os
+import json
+import mmap
+import time
+import shutil
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+FLAT_INDEX_DTYPE = os.getenv("FLAT_INDEX_DTYPE", "float16")  # float16 | int8
+FLAT_INDEX_DIMS = int(os.getenv("FLAT_INDEX_DIMS", "0"))  # >0: PCA-reduce vectors to this many dimensions
+FLAT_INDEX_DTYPES = ("float16", "int8")
+# Superseded generations are deleted only once this many newer ones exist and they have been
+# out of use for FLAT_INDEX_GRACE seconds, so readers that just read CURRENT can still open them
+FLAT_INDEX_KEEP_GENERATIONS = int(os.getenv("FLAT_INDEX_KEEP_GENERATIONS", "2"))
+FLAT_INDEX_GRACE = float(os.getenv("FLAT_INDEX_GRACE", "300"))
+
+# Rows converted to float32 at a time during search, bounding temporary memory
+SEARCH_BLOCK_ROWS = 16384
+
+CURRENT_FILE = "CURRENT"
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.clip(norms, 1e-12, None)
+
+
+def quantize(vectors: np.ndarray, dtype: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """float16 as is, or int8 with one float32 scale per vector (max |value| maps to 127)."""
+    if dtype == "float16":
+        return vectors.astype(np.float16), None
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    return np.round(vectors / scales[:, None]).astype(np.int8), scales.astype(np.float32)
+
+
+def fit_projection(vectors: np.ndarray, dims: int) -> Tuple[np.ndarray, np.ndarray]:
+    """PCA: mean and the top `dims` principal directions (d x dims)."""
+    mean = vectors.mean(axis=0)
+    _, _, vt = np.linalg.svd(vectors - mean, full_matrices=False)
+    return mean.astype(np.float32), vt[:dims].T.astype(np.float32)
+
+
+class _Generation:
+    """
+    One immutable snapshot of the index on disk, opened read-only through mmap:
+    vectors.npy (+ scales.npy for int8), and records.bin addressed by
+    offsets.npy holding each chunk's id, text and metadata as JSON.
+    The maps are released when the last search holding the snapshot ends.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.vectors = np.load(path / "vectors.npy", mmap_mode="r")
+        self.scales = np.load(path / "scales.npy", mmap_mode="r") if (path / "scales.npy").exists() else None
+        self.offsets = np.load(path / "offsets.npy", mmap_mode="r")
+        self._file = open(path / "records.bin", "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        self.blob = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        projection = path / "projection.npz"
+        if projection.exists():
+            with np.load(projection) as data:
+                self.projection = (data["mean"], data["components"])
+        else:
+            self.projection = None
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def record(self, i: int) -> dict:
+        return json.loads(self.blob[int(self.offsets[i]):int(self.offsets[i + 1])].decode("utf-8"))
+
+    def dense(self, start: int, stop: int) -> np.ndarray:
+        block = np.asarray(self.vectors[start:stop], dtype=np.float32)
+        if self.scales is not None:
+            block *= np.asarray(self.scales[start:stop])[:, None]
+        return block
+
+    def scores(self, query: np.ndarray) -> np.ndarray:
+        out = np.empty(len(self), dtype=np.float32)
+        for start in range(0, len(self), SEARCH_BLOCK_ROWS):
+            stop = min(start + SEARCH_BLOCK_ROWS, len(self))
+            out[start:stop] = self.dense(start, stop) @ query
+        return out
+
+
+def _write_generation(path: Path, vectors: np.ndarray, records: List[dict], dtype: str, projection):
+    path.mkdir(parents=True)
+    stored, scales = quantize(vectors, dtype)
+    np.save(path / "vectors.npy", stored)
+    if scales is not None:
+        np.save(path / "scales.npy", scales)
+    if projection is not None:
+        np.savez(path / "projection.npz", mean=projection[0], components=projection[1])
+
+    offsets = np.zeros(len(records) + 1, dtype=np.int64)
+    with open(path / "records.bin", "wb") as f:
+        for i, record in enumerate(records):
+            blob = json.dumps(record, ensure_ascii=False, default=str).encode("utf-8")
+            f.write(blob)
+            offsets[i + 1] = offsets[i] + len(blob)
+    np.save(path / "offsets.npy", offsets)
+
+
+class FlatVectorStore(VectorStore):
+    """
+    Exact-search vector store kept as memory-mapped flat files.
+    Vectors are L2-normalized (optionally PCA-reduced) and stored as float16
+    or int8 with per-vector scales; a query is one blocked matrix-vector
+    product. Workers mapping the same files share their pages through the
+    OS page cache. Added/deleted chunks become visible on commit(), which
+    writes a new generation and atomically repoints CURRENT to it.
+    """
+
+    def __init__(self, directory: Path, embedding: Embeddings, dtype: str = FLAT_INDEX_DTYPE,
+                 dims: int = FLAT_INDEX_DIMS):
+        if dtype not in FLAT_INDEX_DTYPES:
+            raise ValueError(f"FLAT_INDEX_DTYPE must be one of {FLAT_INDEX_DTYPES}, got {dtype!r}")
+        self.directory = Path(directory)
+        self._embedding = embedding
+        self.dtype = dtype
+        self.dims = dims
+        self._lock = threading.Lock()
+        self._pending_add = {}  # id -> (text, metadata, full-dimension vector)
+        self._pending_delete = set()
+        self._generation = self._open_current()
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embedding
+
+    def _read_current(self) -> Optional[str]:
+        try:
+            return (self.directory / CURRENT_FILE).read_text(encoding="utf-8").strip()
+        except OSError:
+            return None
+
+    def _open_current(self) -> Optional[_Generation]:
+        for _ in range(3):
+            name = self._read_current()
+            if name is None:
+                return None
+            try:
+                return _Generation(self.directory / name)
+            except FileNotFoundError:
+                continue  # cleaned up between reading CURRENT and opening it; read it again
+        return None
+
+    def _current(self) -> Optional[_Generation]:
+        """The generation CURRENT points to, reopened when another process has committed."""
+        generation = self._generation
+        name = self._read_current()
+        if name is not None and (generation is None or generation.path.name != name):
+            with self._lock:
+                if self._generation is generation:
+                    try:
+                        self._generation = _Generation(self.directory / name)
+                    except FileNotFoundError:
+                        pass  # superseded again meanwhile; keep serving the one we have
+                generation = self._generation
+        return generation
+
+    def __len__(self):
+        generation = self._current()
+        return len(generation) if generation else 0
+
+    def add_texts(self, texts: Iterable[str], metadatas: Optional[List[dict]] = None,
+                  ids: Optional[List[str]] = None, **kwargs) -> List[str]:
+        texts = list(texts)
+        metadatas = metadatas or [{} for _ in texts]
+        if ids is None:
+            from .vector_store import chunk_id
+            ids = [chunk_id(str(metadata.get("source", "")), text) for text, metadata in zip(texts, metadatas)]
+        vectors = np.asarray(self._embedding.embed_documents(texts), dtype=np.float32)
+        with self._lock:
+            for cid, text, metadata, vector in zip(ids, texts, metadatas, vectors):
+                self._pending_add[cid] = (text, metadata, vector)
+                self._pending_delete.discard(cid)
+        return ids
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs) -> Optional[bool]:
+        with self._lock:
+            for cid in ids or []:
+                self._pending_add.pop(cid, None)
+                self._pending_delete.add(cid)
+        return True
+
+    def _project(self, vectors: np.ndarray, projection) -> np.ndarray:
+        if projection is not None:
+            vectors = (vectors - projection[0]) @ projection[1]
+        return normalize_rows(vectors)
+
+    def commit(self):
+        """Write pending changes as a new generation and switch readers to it."""
+        self._current()  # build on another process's latest commit
+        with self._lock:
+            if not self._pending_add and not self._pending_delete:
+                return
+            added, deleted = self._pending_add, self._pending_delete
+            self._pending_add, self._pending_delete = {}, set()
+
+            current = self._generation
+            keep_rows, records = [], []
+            if current is not None:
+                for i in range(len(current)):
+                    record = current.record(i)
+                    if record["id"] not in deleted and record["id"] not in added:
+                        keep_rows.append(i)
+                        records.append(record)
+
+            projection = current.projection if current is not None else None
+            new_vectors = np.stack([vector for _, _, vector in added.values()]) if added else None
+            if current is None and self.dims and new_vectors is not None:
+                if len(new_vectors) > self.dims and self.dims < new_vectors.shape[1]:
+                    projection = fit_projection(new_vectors, self.dims)
+                else:
+                    print(f"Flat index: too few vectors to fit a {self.dims}-d projection, keeping full dimension")
+
+            # Requantizing dequantized rows reproduces them exactly, so kept rows don't drift
+            blocks = [current.dense(0, len(current))[keep_rows]] if keep_rows else []
+            if new_vectors is not None:
+                blocks.append(self._project(new_vectors, projection))
+                records.extend({"id": cid, "text": text, "metadata": metadata}
+                               for cid, (text, metadata, _) in added.items())
+            dim = projection[1].shape[1] if projection is not None else (
+                blocks[0].shape[1] if blocks else 0)
+            vectors = np.concatenate(blocks) if blocks else np.zeros((0, dim), dtype=np.float32)
+
+            name = f"gen-{(int(current.path.name.split('-')[1]) + 1) if current else 1:06d}"
+            _write_generation(self.directory / name, vectors, records, self.dtype, projection)
+            tmp_current = self.directory / f"{CURRENT_FILE}.tmp"
+            tmp_current.write_text(name, encoding="utf-8")
+            os.replace(tmp_current, self.directory / CURRENT_FILE)
+
+            # Threads still searching the previous generation keep it mapped until they finish
+            self._generation = _Generation(self.directory / name)
+            self._remove_old_generations()
+
+    def _remove_old_generations(self):
+        generations = sorted(self.directory.glob("gen-*"))
+        now = time.time()
+        for old, successor in zip(generations[:-FLAT_INDEX_KEEP_GENERATIONS], generations[1:]):
+            # A generation has been out of use since its successor was written
+            if now - successor.stat().st_mtime >= FLAT_INDEX_GRACE:
+                shutil.rmtree(old, ignore_errors=True)
+
+    def _query_vector(self, generation: _Generation, embedding: List[float]) -> np.ndarray:
+        query = np.asarray(embedding, dtype=np.float32)[None, :]
+        return self._project(query, generation.projection)[0]
+
+    def similarity_search_with_score_by_vector(self, embedding: List[float], k: int = 4) -> List[Tuple[Document, float]]:
+        generation = self._current()
+        if k <= 0 or generation is None or len(generation) == 0:
+            return []
+        scores = generation.scores(self._query_vector(generation, embedding))
+        # argpartition needs 0 <= k - 1 < rows; asking for every row just sorts them all
+        k = min(k, len(scores))
+        if k < len(scores):
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind="stable")]
+        results = []
+        for i in top:
+            record = generation.record(int(i))
+            results.append((Document(page_content=record["text"], metadata=record["metadata"]), float(scores[i])))
+        return results
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs) -> List[Tuple[Document, float]]:
+        return self.similarity_search_with_score_by_vector(self._embedding.embed_query(query), k)
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, **kwargs) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k)]
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k)]
+
+    def _select_relevance_score_fn(self):
+        # Scores are cosine similarities of normalized vectors
+        return lambda score: score
+
+    def get(self, ids: Optional[List[str]] = None, include: Optional[List[str]] = None) -> Dict[str, list]:
+        """Chroma-style dump of the committed chunks (optionally only the given ids)."""
+        generation = self._current()
+        wanted = set(ids) if ids is not None else None
+        result = {"ids": [], "documents": [], "metadatas": []}
+        for i in range(len(generation) if generation else 0):
+            record = generation.record(i)
+            if wanted is None or record["id"] in wanted:
+                result["ids"].append(record["id"])
+                result["documents"].append(record["text"])
+                result["metadatas"].append(record["metadata"])
+        return result
+
+    @classmethod
+    def from_texts(cls, texts: List[str], embedding: Embeddings, metadatas: Optional[List[dict]] = None,
+                   ids: Optional[List[str]] = None, directory: Path = None, **kwargs) -> "FlatVectorStore":
+        store = cls(directory, embedding, **kwargs)
+        store.add_texts(texts, metadatas, ids=ids)
+        store.commit()
+        return store
@@ -0,0 +1,249 @@
+# tools/hybrid_retriever.py
+import os
+import re
+import math
+import time
+import asyncio
+import threading
+from collections import Counter, deque
+from typing import Dict, List, Tuple
+import numpy as np
+from langchain_core.documents import Document
+from core.resources import registry
+from .vector_store import initialize_vectorstore, RETRIEVAL_K
+from .query_builder import query_vector, lexical_text
+
+HYBRID_RETRIEVAL = os.getenv("HYBRID_RETRIEVAL", "1") == "1"
+# Documents each leg contributes to the fusion; the fused list is cut to RETRIEVAL_K
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "10"))
+HYBRID_VECTOR_WEIGHT = float(os.getenv("HYBRID_VECTOR_WEIGHT", "1.0"))
+HYBRID_LEXICAL_WEIGHT = float(os.getenv("HYBRID_LEXICAL_WEIGHT", "1.0"))
+RRF_K = int(os.getenv("RRF_K", "60"))
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    # No stemming or stopwords: exact drug names and dosages are what this leg is for
+    return [token.lower() for token in _TOKEN.findall(text)]
+
+
+def document_key(doc: Document) -> str:
+    return doc.metadata.get("chunk_id") or doc.page_content
+
+
+class BM25Index:
+    """
+    Okapi BM25 over a fixed list of documents.
+    Each term's posting list stores its documents and precomputed BM25
+    weights, so a query is one vectorized scatter-add per query term.
+    """
+
+    def __init__(self, documents: List[Document], k1: float = 1.5, b: float = 0.75):
+        self.documents = list(documents)
+        self.k1 = k1
+        self.b = b
+
+        postings = {}
+        lengths = np.zeros(len(self.documents), dtype=np.float32)
+        for i, doc in enumerate(self.documents):
+            counts = Counter(tokenize(doc.page_content))
+            lengths[i] = sum(counts.values())
+            for term, tf in counts.items():
+                ids, tfs = postings.setdefault(term, ([], []))
+                ids.append(i)
+                tfs.append(tf)
+
+        avg_length = float(lengths.mean()) if len(lengths) else 0.0
+        norm = k1 * (1 - b + b * lengths / avg_length) if avg_length else lengths
+        n = len(self.documents)
+        self._postings = {}
+        for term, (ids, tfs) in postings.items():
+            ids = np.asarray(ids, dtype=np.int32)
+            tfs = np.asarray(tfs, dtype=np.float32)
+            idf = math.log(1 + (n - len(ids) + 0.5) / (len(ids) + 0.5))
+            self._postings[term] = (ids, (idf * tfs * (k1 + 1) / (tfs + norm[ids])).astype(np.float32))
+
+    def __len__(self):
+        return len(self.documents)
+
+    def search(self, query: str, k: int) -> List[Tuple[Document, float]]:
+        scores = np.zeros(len(self.documents), dtype=np.float32)
+        for term in set(tokenize(query)):
+            entry = self._postings.get(term)
+            if entry is not None:
+                ids, weights = entry
+                scores[ids] += weights
+
+        k = min(k, int(np.count_nonzero(scores)))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(self.documents[i], float(scores[i])) for i in top]
+
+
+def reciprocal_rank_fusion(rankings: Dict[str, List[Document]], weights: Dict[str, float],
+                           k: int = RRF_K) -> List[Document]:
+    """Merge ranked lists: each document scores sum(weight / (k + rank)) over the lists it appears in."""
+    scores = {}
+    docs = {}
+    for leg, ranked in rankings.items():
+        weight = weights.get(leg, 1.0)
+        for rank, doc in enumerate(ranked, start=1):
+            key = document_key(doc)
+            docs.setdefault(key, doc)
+            scores[key] = scores.get(key, 0.0) + weight / (k + rank)
+    return [docs[key] for key in sorted(scores, key=scores.get, reverse=True)]
+
+
+class LatencyStats:
+    """Rolling window of per-leg latencies (ms) for the /stats endpoint."""
+
+    def __init__(self, window: int = 1000):
+        self.window = window
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, timings: Dict[str, float]):
+        with self._lock:
+            for leg, ms in timings.items():
+                self._samples.setdefault(leg, deque(maxlen=self.window)).append(ms)
+
+    def summary(self) -> Dict[str, dict]:
+        with self._lock:
+            samples = {leg: np.asarray(values) for leg, values in self._samples.items()}
+        return {
+            leg: {
+                "count": len(values),
+                "mean_ms": round(float(values.mean()), 2),
+                "p50_ms": round(float(np.percentile(values, 50)), 2),
+                "p95_ms": round(float(np.percentile(values, 95)), 2)
+            }
+            for leg, values in samples.items()
+        }
+
+
+def _timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - started) * 1000
+
+
+def vector_search(vectorstore, query: str, k: int) -> List[Document]:
+    if getattr(query, "turns", None):
+        return vectorstore.similarity_search_by_vector(query_vector(vectorstore.embeddings, query), k=k)
+    return vectorstore.similarity_search(query, k=k)
+
+
+class VectorRetriever:
+    """Dense retrieval only, with the same search()/stats() surface as HybridRetriever."""
+
+    def __init__(self, vectorstore, k: int = RETRIEVAL_K):
+        self.vectorstore = vectorstore
+        self.k = k
+        self.latency = LatencyStats()
+
+    def _finish(self, docs: List[Document], ms: float) -> Tuple[List[Document], Dict[str, float]]:
+        timings = {"vector_ms": ms, "total_ms": ms}
+        self.latency.record(timings)
+        return docs, timings
+
+    def search(self, query: str) -> Tuple[List[Document], Dict[str, float]]:
+        return self._finish(*_timed(vector_search, self.vectorstore, query, self.k))
+
+    async def asearch(self, query: str) -> Tuple[List[Document], Dict[str, float]]:
+        return self._finish(*await asyncio.to_thread(_timed, vector_search, self.vectorstore, query, self.k))
+
+    def invoke(self, query: str) -> List[Document]:
+        return self.search(query)[0]
+
+    async def ainvoke(self, query: str) -> List[Document]:
+        return (await self.asearch(query))[0]
+
+    def stats(self) -> dict:
+        return {"mode": "vector", "k": self.k, "latency": self.latency.summary()}
+
+
+class HybridRetriever:
+    """
+    Dense (vector store) plus lexical (BM25) retrieval merged by weighted reciprocal
+    rank fusion. A leg with weight 0 is not queried. search() also returns
+    the request's latency breakdown in milliseconds per leg.
+    """
+
+    def __init__(self, vectorstore, lexical_index: BM25Index, k: int = RETRIEVAL_K,
+                 candidates: int = HYBRID_CANDIDATES, vector_weight: float = HYBRID_VECTOR_WEIGHT,
+                 lexical_weight: float = HYBRID_LEXICAL_WEIGHT, rrf_k: int = RRF_K):
+        self.vectorstore = vectorstore
+        self.lexical_index = lexical_index
+        self.k = k
+        self.candidates = candidates
+        self.weights = {"vector": vector_weight, "lexical": lexical_weight}
+        self.rrf_k = rrf_k
+        self.latency = LatencyStats()
+
+    def _vector_leg(self, query: str) -> List[Document]:
+        return vector_search(self.vectorstore, query, self.candidates)
+
+    def _lexical_leg(self, query: str) -> List[Document]:
+        return [doc for doc, _ in self.lexical_index.search(lexical_text(query), self.candidates)]
+
+    def _legs(self):
+        legs = {"vector": self._vector_leg, "lexical": self._lexical_leg}
+        return {name: leg for name, leg in legs.items() if self.weights[name] > 0}
+
+    def _fuse(self, results: Dict[str, tuple], started: float) -> Tuple[List[Document], Dict[str, float]]:
+        timings = {f"{name}_ms": ms for name, (_, ms) in results.items()}
+        rankings = {name: docs for name, (docs, _) in results.items()}
+        docs, timings["fusion_ms"] = _timed(reciprocal_rank_fusion, rankings, self.weights, self.rrf_k)
+        timings["total_ms"] = (time.perf_counter() - started) * 1000
+        self.latency.record(timings)
+        return docs[:self.k], timings
+
+    def search(self, query: str) -> Tuple[List[Document], Dict[str, float]]:
+        started = time.perf_counter()
+        results = {name: _timed(leg, query) for name, leg in self._legs().items()}
+        return self._fuse(results, started)
+
+    async def asearch(self, query: str) -> Tuple[List[Document], Dict[str, float]]:
+        # Both legs block (vector query, numpy scoring); run them side by side in threads
+        started = time.perf_counter()
+        legs = self._legs()
+        outcomes = await asyncio.gather(*(asyncio.to_thread(_timed, leg, query) for leg in legs.values()))
+        return self._fuse(dict(zip(legs, outcomes)), started)
+
+    def invoke(self, query: str) -> List[Document]:
+        return self.search(query)[0]
+
+    async def ainvoke(self, query: str) -> List[Document]:
+        return (await self.asearch(query))[0]
+
+    def stats(self) -> dict:
+        return {
+            "mode": "hybrid",
+            "chunks": len(self.lexical_index),
+            "k": self.k,
+            "candidates": self.candidates,
+            "weights": self.weights,
+            "latency": self.latency.summary()
+        }
+
+
+def _create_lexical_index() -> BM25Index:
+    # The vector store holds exactly the chunks load_pdf_documents/iter_pdf_chunks produced
+    started = time.perf_counter()
+    data = initialize_vectorstore().get(include=["documents", "metadatas"])
+    docs = [Document(page_content=text, metadata=metadata or {})
+            for text, metadata in zip(data["documents"], data["metadatas"])]
+    index = BM25Index(docs)
+    print(f"Built BM25 index over {len(docs)} chunks in {time.perf_counter() - started:.2f}s")
+    return index
+
+
+registry.register("lexical_index", _create_lexical_index, enabled=HYBRID_RETRIEVAL)
+
+
+def create_hybrid_retriever(k: int = RETRIEVAL_K) -> HybridRetriever:
+    return HybridRetriever(initialize_vectorstore(), registry.get("lexical_index"), k=k,
+                           candidates=max(HYBRID_CANDIDATES, k))
@@ -1,5 +1,6 @@
 # tools/language_utils.py
-from typing import Dict
+from typing import Dict, List
+from .prompt_budget import pack_prompt, PackedPrompt, PROMPT_TOKEN_BUDGET
 
 # Language-specific prompts and responses
 LANGUAGE_PROMPTS = {
@@ -249,32 +250,46 @@ def detect_language_change(question: str, current_language: str) -> str:
     
     return current_language
 
-def format_prompt(language: str, context: str, question: str, medical_info: str = None) -> str:
-    """Format a prompt in the specified language."""
-    prompts = get_language_prompts(language)
-    
-    if medical_info:
-        # RAG prompt with medical information
-        return f"""{prompts['system_prompt']}
+PROMPT_TEMPLATE = """{system_prompt}
 
-{prompts['context_intro']}
-{context}
+{context_intro}
+{history}
 
-{prompts['question_intro']}
+{question_intro}
 {question}
 
-{prompts['rag_intro']}
-{medical_info}
+{instruction}"""
 
-{prompts['instruction']}"""
-    else:
-        # Direct LLM prompt
-        return f"""{prompts['system_prompt']}
+RAG_PROMPT_TEMPLATE = """{system_prompt}
 
-{prompts['context_intro']}
-{context}
+{context_intro}
+{history}
 
-{prompts['question_intro']}
+{question_intro}
 {question}
 
-{prompts['instruction']}"""
+{rag_intro}
+{context}
+
+{instruction}"""
+
+
+def build_prompt(language: str, history: List[str], question: str, documents: List[str] = None,
+                 budget: int = PROMPT_TOKEN_BUDGET) -> PackedPrompt:
+    """Assemble a prompt in the specified language within a token budget (see tools/prompt_budget.py)."""
+    prompts = get_language_prompts(language)
+    fixed = {key: prompts[key] for key in ("system_prompt", "context_intro", "question_intro", "instruction")}
+    fixed["question"] = question
+    if documents:
+        # RAG prompt with medical information
+        fixed["rag_intro"] = prompts["rag_intro"]
+        return pack_prompt(RAG_PROMPT_TEMPLATE, fixed, history, documents, budget)
+    # Direct LLM prompt
+    return pack_prompt(PROMPT_TEMPLATE, fixed, history, budget=budget)
+
+
+def format_prompt(language: str, context: str, question: str, medical_info: str = None) -> str:
+    """Format a prompt in the specified language."""
+    history = context.splitlines() if isinstance(context, str) else list(context)
+    documents = [medical_info] if medical_info else None
+    return build_prompt(language, history, question, documents).text
@@ -1,18 +1,30 @@
-from langchain_groq.chat_models import ChatGroq
 from dotenv import load_dotenv
+from core.resources import registry
+from core.resilience import dependency
+from tools.prompt_budget import ANSWER_MAX_TOKENS
 import os
 
 load_dotenv()
 
-_llm = None
+
+def _create_llm():
+    # Imported here so importing the agents does not pull in the Groq client
+    from langchain_groq.chat_models import ChatGroq
+    from tools.replay import wrap_llm
+    return wrap_llm(ChatGroq(
+        model_name="openai/gpt-oss-120b",
+        temperature=0.3,
+        # Upper bound; agents pass each prompt's own answer budget per call
+        max_tokens=ANSWER_MAX_TOKENS,
+        api_key=os.getenv("GROQ_API_KEY"),
+        # Deadline enforced by the client; retries are left to core.resilience
+        timeout=dependency("groq").timeout,
+        max_retries=0
+    ))
+
+
+registry.register("llm", _create_llm)
+
 
 def get_llm():
-    global _llm
-    if _llm is None:
-        _llm = ChatGroq(
-            model_name="openai/gpt-oss-120b",
-            temperature=0.3,
-            max_tokens=2048,
-            api_key=os.getenv("GROQ_API_KEY")
-        )
-    return _llm
+    return registry.get("llm")
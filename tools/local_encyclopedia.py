@@ -0,0 +1,216 @@
+# tools/local_encyclopedia.py
+import os
+import re
+import bz2
+import gzip
+import json
+import sqlite3
+import argparse
+import threading
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+PROJECT_ROOT = Path(__file__).parent.parent.resolve()
+
+# Kept out of medical_db/, which is wiped whenever the vector index is rebuilt
+ENCYCLOPEDIA_PATH = Path(os.getenv("ENCYCLOPEDIA_PATH", PROJECT_ROOT / "encyclopedia_db" / "encyclopedia.sqlite3"))
+SAMPLE_DUMP = PROJECT_ROOT / "data" / "encyclopedia" / "sample_medical_articles.xml"
+
+# Same result shape as WikipediaAPIWrapper(top_k_results=2, doc_content_chars_max=2000)
+TOP_K_RESULTS = 2
+DOC_CONTENT_CHARS_MAX = 2000
+# Only the lead section of each article is indexed, as the live wrapper returns summaries
+SUMMARY_CHARS_MAX = 4000
+
+NO_RESULT = "No good Wikipedia Search Result was found"
+
+_WIKITEXT_PATTERNS = [
+    (re.compile(r"<!--.*?-->", re.S), ""),
+    (re.compile(r"<ref[^>]*/>|<ref[^>]*>.*?</ref>", re.S), ""),
+    (re.compile(r"\[\[(?:File|Image|Category):[^\]]*\]\]", re.I), ""),
+    (re.compile(r"\[\[(?:[^|\]]*\|)?([^\]]*)\]\]"), r"\1"),
+    (re.compile(r"\[https?://\S+ ([^\]]*)\]"), r"\1"),
+    (re.compile(r"'{2,}"), ""),
+    (re.compile(r"<[^>]+>"), ""),
+]
+_TEMPLATE = re.compile(r"\{\{[^{}]*\}\}|\{\|[^{}]*?\|\}", re.S)
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+# Question words would otherwise match nearly every article
+STOPWORDS = frozenset("""
+a an and are as at be by can do does for from how i in is it my of on or should the to was what when
+where which who why will with you your
+""".split())
+
+
+def clean_wikitext(text: str) -> str:
+    """Reduce MediaWiki markup to plain text (lead section only)."""
+    previous = None
+    while previous != text:  # templates nest, strip innermost first
+        previous, text = text, _TEMPLATE.sub("", text)
+    text = re.split(r"^==[^=].*$", text, maxsplit=1, flags=re.M)[0]
+    for pattern, replacement in _WIKITEXT_PATTERNS:
+        text = pattern.sub(replacement, text)
+    paragraphs = [" ".join(p.split()) for p in text.split("\n\n")]
+    return "\n".join(p for p in paragraphs if p)
+
+
+def _open_dump(path: Path):
+    if path.suffix == ".bz2":
+        return bz2.open(path, "rb")
+    if path.suffix == ".gz":
+        return gzip.open(path, "rb")
+    return open(path, "rb")
+
+
+def iter_jsonl_articles(path: Path) -> Iterator[Dict[str, str]]:
+    """JSONL dump: one {"title": ..., "text": ...} object per line."""
+    with _open_dump(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            text = record.get("text") or record.get("summary") or ""
+            yield {"title": record["title"], "summary": clean_wikitext(text)}
+
+
+def iter_xml_articles(path: Path) -> Iterator[Dict[str, str]]:
+    """MediaWiki XML export, streamed page by page; redirects and non-article namespaces are skipped."""
+    with _open_dump(path) as f:
+        title, text, namespace, redirect = None, "", "0", False
+        root = None
+        for event, elem in ET.iterparse(f, events=("start", "end")):
+            if event == "start":
+                if root is None:
+                    root = elem
+                continue
+            tag = elem.tag.rsplit("}", 1)[-1]  # export files carry a versioned namespace
+            if tag == "title":
+                title = elem.text
+            elif tag == "ns":
+                namespace = elem.text or "0"
+            elif tag == "redirect":
+                redirect = True
+            elif tag == "text":
+                text = elem.text or ""
+            elif tag == "page":
+                if title and namespace == "0" and not redirect:
+                    yield {"title": title, "summary": clean_wikitext(text)}
+                title, text, namespace, redirect = None, "", "0", False
+                # Cleared pages stay attached to <mediawiki>; drop them so memory stays flat on large dumps
+                root.clear()
+
+
+def iter_articles(path: Path) -> Iterator[Dict[str, str]]:
+    path = Path(path)
+    suffixes = path.suffixes
+    if ".jsonl" in suffixes or ".json" in suffixes:
+        return iter_jsonl_articles(path)
+    if ".xml" in suffixes:
+        return iter_xml_articles(path)
+    raise ValueError(f"Unsupported dump format: {path.name} (expected .xml or .jsonl, optionally .bz2/.gz)")
+
+
+def build_index(dump_path: Path, index_path: Path = ENCYCLOPEDIA_PATH, batch_size: int = 1000) -> int:
+    """Build (or rebuild) the full-text index from an article dump. Returns the number of articles indexed."""
+    index_path = Path(index_path)
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = index_path.with_suffix(index_path.suffix + ".tmp")
+    if tmp_path.exists():
+        tmp_path.unlink()
+
+    conn = sqlite3.connect(str(tmp_path))
+    conn.execute("CREATE VIRTUAL TABLE articles USING fts5(title, summary, tokenize='porter unicode61 remove_diacritics 2')")
+    count = 0
+    batch = []
+    for article in iter_articles(dump_path):
+        if not article["summary"]:
+            continue
+        batch.append((article["title"], article["summary"][:SUMMARY_CHARS_MAX]))
+        if len(batch) >= batch_size:
+            conn.executemany("INSERT INTO articles (title, summary) VALUES (?, ?)", batch)
+            count += len(batch)
+            batch = []
+            print(f"Indexed {count} articles...")
+    conn.executemany("INSERT INTO articles (title, summary) VALUES (?, ?)", batch)
+    count += len(batch)
+    conn.execute("INSERT INTO articles (articles) VALUES ('optimize')")
+    conn.commit()
+    conn.close()
+
+    # Swap in atomically so running workers never see a half-built index
+    os.replace(tmp_path, index_path)
+    print(f"Built encyclopedia index with {count} articles at {index_path}")
+    return count
+
+
+def match_expression(query: str) -> str:
+    """FTS5 query that ORs the query's terms, so BM25 ranks partial matches too."""
+    tokens = [token.lower() for token in _TOKEN.findall(query)]
+    terms = dict.fromkeys(token for token in tokens if token not in STOPWORDS) or dict.fromkeys(tokens)
+    return " OR ".join(f'"{term}"' for term in terms)
+
+
+class LocalEncyclopedia:
+    """
+    Offline stand-in for WikipediaAPIWrapper: run(query) returns the best
+    BM25 matches as "Page: ...\\nSummary: ..." blocks, or the wrapper's
+    no-result message.
+    """
+
+    def __init__(self, index_path: Path = ENCYCLOPEDIA_PATH, top_k_results: int = TOP_K_RESULTS,
+                 doc_content_chars_max: int = DOC_CONTENT_CHARS_MAX):
+        self.index_path = Path(index_path)
+        if not self.index_path.exists():
+            raise FileNotFoundError(
+                f"No encyclopedia index at {self.index_path}; build one with "
+                f"`python -m tools.local_encyclopedia build <dump>`")
+        self.top_k_results = top_k_results
+        self.doc_content_chars_max = doc_content_chars_max
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(f"{self.index_path.resolve().as_uri()}?mode=ro", uri=True)
+            self._local.conn = conn
+        return conn
+
+    def search(self, query: str, k: int = None) -> List[Dict[str, str]]:
+        expression = match_expression(query)
+        if not expression:
+            return []
+        # Title matches weigh more than summary matches; bm25() is lower-is-better
+        rows = self._connection().execute(
+            "SELECT title, summary, bm25(articles, 5.0, 1.0) AS score FROM articles "
+            "WHERE articles MATCH ? ORDER BY score LIMIT ?",
+            (expression, k or self.top_k_results)).fetchall()
+        return [{"title": title, "summary": summary, "score": -score} for title, summary, score in rows]
+
+    def run(self, query: str) -> str:
+        pages = [f"Page: {hit['title']}\nSummary: {hit['summary']}" for hit in self.search(query)]
+        if not pages:
+            return NO_RESULT
+        return "\n\n".join(pages)[:self.doc_content_chars_max]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query the offline medical encyclopedia index.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build = subparsers.add_parser("build", help="Index a MediaWiki XML or JSONL article dump")
+    build.add_argument("dump", nargs="?", default=str(SAMPLE_DUMP), help="Dump file (.xml/.jsonl, optionally .bz2/.gz)")
+    build.add_argument("--output", default=str(ENCYCLOPEDIA_PATH), help="Index file to write")
+    search = subparsers.add_parser("search", help="Look up a query in a built index")
+    search.add_argument("query")
+    search.add_argument("--index", default=str(ENCYCLOPEDIA_PATH))
+    args = parser.parse_args()
+
+    if args.command == "build":
+        build_index(Path(args.dump), Path(args.output))
+    else:
+        print(LocalEncyclopedia(Path(args.index)).run(args.query))
+
+
+if __name__ == "__main__":
+    main()
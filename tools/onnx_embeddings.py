@@ -0,0 +1,159 @@
+# tools/onnx_embeddings.py
+import os
+import argparse
+from pathlib import Path
+from typing import List
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+PROJECT_ROOT = Path(__file__).parent.parent.resolve()
+
+ONNX_MODEL_DIR = Path(os.getenv("ONNX_MODEL_DIR", PROJECT_ROOT / "models" / "embedding-onnx"))
+ONNX_QUANTIZED = os.getenv("ONNX_QUANTIZED", "1") == "1"
+ONNX_BATCH_SIZE = int(os.getenv("ONNX_BATCH_SIZE", "64"))
+ONNX_THREADS = int(os.getenv("ONNX_THREADS", "0"))  # 0 lets ONNX Runtime decide
+
+# max_seq_length of paraphrase-multilingual-MiniLM-L12-v2 in sentence-transformers
+MAX_SEQ_LENGTH = 128
+
+FP32_FILE = "model.onnx"
+INT8_FILE = "model_int8.onnx"
+
+
+def mean_pool(hidden: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+    """Sentence-transformers mean pooling: average of token vectors, padding excluded."""
+    mask = attention_mask[..., None].astype(np.float32)
+    return (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+
+class OnnxEmbeddings(Embeddings):
+    """
+    Sentence embeddings from an exported (optionally int8-quantized) ONNX
+    model run with ONNX Runtime. Needs only onnxruntime, tokenizers and numpy,
+    so torch is never imported.
+    """
+
+    def __init__(self, model_dir: Path = ONNX_MODEL_DIR, quantized: bool = ONNX_QUANTIZED,
+                 batch_size: int = ONNX_BATCH_SIZE, threads: int = ONNX_THREADS):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        model_dir = Path(model_dir)
+        self.model_path = model_dir / (INT8_FILE if quantized else FP32_FILE)
+        if not self.model_path.exists():
+            raise FileNotFoundError(
+                f"No ONNX embedding model at {self.model_path}; export one with "
+                f"`python -m tools.onnx_embeddings export`")
+
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(str(self.model_path), options, providers=["CPUExecutionProvider"])
+        self.input_names = {node.name for node in self.session.get_inputs()}
+        self.batch_size = batch_size
+
+        self.tokenizer = Tokenizer.from_file(str(model_dir / "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=MAX_SEQ_LENGTH)
+        self.tokenizer.no_padding()
+        self.pad_id = next((self.tokenizer.token_to_id(token) for token in ("<pad>", "[PAD]")
+                            if self.tokenizer.token_to_id(token) is not None), 0)
+
+    def _run_batch(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        length = max(len(encoding.ids) for encoding in encodings)
+        input_ids = np.full((len(texts), length), self.pad_id, dtype=np.int64)
+        attention_mask = np.zeros((len(texts), length), dtype=np.int64)
+        for row, encoding in enumerate(encodings):
+            input_ids[row, :len(encoding.ids)] = encoding.ids
+            attention_mask[row, :len(encoding.ids)] = 1
+
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.zeros_like(input_ids)
+        hidden = self.session.run(None, feeds)[0]
+        return mean_pool(hidden, attention_mask)
+
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        # Length-sorted batches keep padding (and wasted compute) low
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        vectors = [None] * len(texts)
+        for start in range(0, len(order), self.batch_size):
+            batch = order[start:start + self.batch_size]
+            for i, vector in zip(batch, self._run_batch([texts[i] for i in batch])):
+                vectors[i] = vector
+        return np.stack(vectors).astype(np.float32)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._embed(list(texts)).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed([text])[0].tolist()
+
+
+def export_onnx_model(model_name: str, output_dir: Path = ONNX_MODEL_DIR, quantize: bool = True) -> Path:
+    """
+    One-off export of a Hugging Face encoder to ONNX (plus a dynamically
+    int8-quantized copy). This step needs torch and transformers; serving does not.
+    """
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name).eval()
+    tokenizer.save_pretrained(str(output_dir))  # writes tokenizer.json for the runtime
+
+    sample = tokenizer(["A sample sentence for tracing."], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    class Encoder(torch.nn.Module):
+        # Fixed positional signature for tracing; forward() argument order varies across models/versions
+        def __init__(self):
+            super().__init__()
+            self.model = model
+
+        def forward(self, *inputs):
+            return self.model(**dict(zip(input_names, inputs))).last_hidden_state
+
+    fp32_path = output_dir / FP32_FILE
+    with torch.no_grad():
+        torch.onnx.export(
+            Encoder().eval(),
+            tuple(sample[name] for name in input_names),
+            str(fp32_path),
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=14,
+            dynamo=False,
+        )
+    print(f"Exported {model_name} to {fp32_path}")
+
+    if quantize:
+        int8_path = output_dir / INT8_FILE
+        quantize_dynamic(str(fp32_path), str(int8_path), weight_type=QuantType.QInt8)
+        print(f"Quantized model written to {int8_path} "
+              f"({fp32_path.stat().st_size / 1e6:.0f} MB -> {int8_path.stat().st_size / 1e6:.0f} MB)")
+    return output_dir
+
+
+def main():
+    from tools.vector_store import EMBEDDING_MODEL_NAME
+    parser = argparse.ArgumentParser(description="Export the embedding model for the ONNX backend.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    export = subparsers.add_parser("export", help="Export to ONNX and quantize to int8")
+    export.add_argument("--model", default=EMBEDDING_MODEL_NAME)
+    export.add_argument("--output", default=str(ONNX_MODEL_DIR))
+    export.add_argument("--no-quantize", action="store_true")
+    args = parser.parse_args()
+    export_onnx_model(args.model, Path(args.output), quantize=not args.no_quantize)
+
+
+if __name__ == "__main__":
+    main()
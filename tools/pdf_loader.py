@@ -1,27 +1,99 @@
 # tools/pdf_loader.py
-from langchain_community.document_loaders import PyPDFLoader
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pypdf import PdfReader
+from langchain_core.documents import Document
 # from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
+# Splitter parameters (also recorded in the vector DB manifest)
+CHUNK_SIZE = 512
+CHUNK_OVERLAP = 128
+SEPARATORS = ["\n\n", ". ", "\n", " "]
+# tiktoken encoding chunks are measured in (also used to budget prompts)
+TOKEN_ENCODING = "gpt2"
 
-def load_pdf_documents(file_path: str):
-    print("Loading PDF from:", file_path)
-    
-    loader = PyPDFLoader(file_path)
-    docs = loader.load()
-    
-    print("Pages loaded:", len(docs))
+# Pages handed to a worker process per task
+PAGES_PER_TASK = 32
+
+_text_splitter = None
+
+
+def get_text_splitter():
+    """Build the tiktoken splitter once per process (the encoding load is not free)."""
+    global _text_splitter
+    if _text_splitter is None:
+        _text_splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder(
+            encoding_name=TOKEN_ENCODING,
+            chunk_size=CHUNK_SIZE,
+            chunk_overlap=CHUNK_OVERLAP,
+            separators=SEPARATORS
+        )
+    return _text_splitter
+
+
+def count_pdf_pages(file_path: str) -> int:
+    return len(PdfReader(file_path).pages)
+
+
+def split_page_range(file_path: str, start: int, end: int):
+    """
+    Extract pages [start, end) and split them into chunks.
+    Chunks never span pages (each page is its own document, as with
+    PyPDFLoader), so splitting ranges independently gives the same result
+    as splitting the whole book at once.
+    """
+    reader = PdfReader(file_path)
+    pages = [
+        Document(
+            page_content=reader.pages[i].extract_text() or "",
+            metadata={"source": file_path, "page": i}
+        )
+        for i in range(start, end)
+    ]
+    return get_text_splitter().split_documents(pages)
 
-    if len(docs) == 0:
+
+def iter_pdf_chunks(file_path: str, max_workers: int = None, pages_per_task: int = PAGES_PER_TASK):
+    """
+    Yield (start, end, chunks) for consecutive page ranges of a PDF, in page order.
+    Ranges are extracted and split in a process pool so chunks can be consumed
+    (e.g. embedded) while later pages are still being parsed.
+    """
+    total_pages = count_pdf_pages(file_path)
+    if total_pages == 0:
         raise Exception("PDF loaded 0 pages. File is scanned, encrypted, or corrupted.")
 
-    text_splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder(
-        chunk_size=512,
-        chunk_overlap=128,
-        separators=["\n\n", ". ", "\n", " "]
-    )
+    ranges = [(start, min(start + pages_per_task, total_pages))
+              for start in range(0, total_pages, pages_per_task)]
+    max_workers = min(max_workers or os.cpu_count() or 1, len(ranges))
+
+    if max_workers <= 1:
+        for start, end in ranges:
+            yield start, end, split_page_range(file_path, start, end)
+        return
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        results = pool.map(
+            split_page_range,
+            [file_path] * len(ranges),
+            [start for start, _ in ranges],
+            [end for _, end in ranges]
+        )
+        for (start, end), chunks in zip(ranges, results):
+            yield start, end, chunks
+
+
+def load_pdf_documents(file_path: str):
+    print("Loading PDF from:", file_path)
+
+    splits = []
+    pages = 0
+    for start, end, chunks in iter_pdf_chunks(file_path):
+        pages = end
+        splits.extend(chunks)
 
-    splits = text_splitter.split_documents(docs)
+    print("Pages loaded:", pages)
     print("Chunks created:", len(splits))
 
     return splits
@@ -0,0 +1,140 @@
+# tools/prompt_budget.py
+import os
+from typing import Dict, List, Optional, Tuple
+from core.resources import registry
+from .pdf_loader import TOKEN_ENCODING
+
+# Prompt plus answer tokens per LLM call; the answer gets whatever the packed prompt leaves
+REQUEST_TOKEN_BUDGET = int(os.getenv("REQUEST_TOKEN_BUDGET", "4096"))
+# Most of the request budget a prompt may use
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "3000"))
+# Share of the variable part (after system prompt, instructions and question)
+# reserved for history when documents compete for it; unused space goes to the other section
+PROMPT_HISTORY_SHARE = float(os.getenv("PROMPT_HISTORY_SHARE", "0.3"))
+# Longest question kept whole; a longer one is cut so it cannot crowd out everything else
+QUESTION_TOKEN_LIMIT = int(os.getenv("QUESTION_TOKEN_LIMIT", "512"))
+# Bounds on the answer's share. The floor leaves gpt-oss room to reason before a 2-3 sentence
+# answer even after a full prompt; the cap is the 2048 the client allowed before budgeting
+ANSWER_MIN_TOKENS = int(os.getenv("ANSWER_MIN_TOKENS", "512"))
+ANSWER_MAX_TOKENS = int(os.getenv("ANSWER_MAX_TOKENS", "2048"))
+
+# A truncated piece shorter than this carries too little to be worth including
+MIN_PIECE_TOKENS = 32
+
+
+class ApproximateEncoding:
+    """Fallback when the tiktoken encoding can't be loaded: about 4 characters per token."""
+    name = "approximate"
+
+    def encode(self, text: str) -> List[str]:
+        return [text[i:i + 4] for i in range(0, len(text), 4)]
+
+    def decode(self, tokens: List[str]) -> str:
+        return "".join(tokens)
+
+
+def _create_token_encoding():
+    import tiktoken
+    try:
+        return tiktoken.get_encoding(TOKEN_ENCODING)
+    except Exception as e:
+        # The BPE file is downloaded on first use; budgeting must not fail offline
+        print(f"Could not load tiktoken encoding {TOKEN_ENCODING!r} ({e}); estimating token counts")
+        return ApproximateEncoding()
+
+
+registry.register("token_encoding", _create_token_encoding)
+
+
+def count_tokens(text: str) -> int:
+    return len(registry.get("token_encoding").encode(text))
+
+
+def truncate_tokens(text: str, limit: int) -> str:
+    encoding = registry.get("token_encoding")
+    tokens = encoding.encode(text)
+    if len(tokens) <= limit:
+        return text
+    return encoding.decode(tokens[:max(limit, 0)]).rstrip() + " …"
+
+
+def answer_budget(prompt_tokens: int, request_budget: int = REQUEST_TOKEN_BUDGET) -> int:
+    """max_tokens for the answer to a prompt of this size: the rest of the request budget, within bounds."""
+    return min(max(request_budget - prompt_tokens, ANSWER_MIN_TOKENS), ANSWER_MAX_TOKENS)
+
+
+class PackedPrompt:
+    """An assembled prompt with its token count, its answer budget and what had to be left out."""
+
+    def __init__(self, text: str, tokens: int, sections: Dict[str, int], dropped: Dict[str, int]):
+        self.text = text
+        self.tokens = tokens
+        self.answer_tokens = answer_budget(tokens)
+        self.sections = sections
+        self.dropped = dropped
+
+    def __str__(self):
+        return self.text
+
+
+def _fit(pieces: List[str], budget: int, truncate_last: bool) -> Tuple[List[str], int, int]:
+    """
+    Keep pieces in order (most valuable first) while they fit in budget tokens.
+    The first piece that doesn't fit is truncated if truncate_last is set and
+    enough room is left; everything after it is dropped.
+    Returns (kept pieces, tokens used, pieces dropped or truncated).
+    """
+    kept, used = [], 0
+    for i, piece in enumerate(pieces):
+        cost = count_tokens(piece) + 1  # +1 for the joining newline
+        if used + cost <= budget:
+            kept.append(piece)
+            used += cost
+            continue
+        room = budget - used - 1
+        if truncate_last and room >= MIN_PIECE_TOKENS:
+            kept.append(truncate_tokens(piece, room))
+            used += count_tokens(kept[-1]) + 1
+        return kept, used, len(pieces) - i
+    return kept, used, 0
+
+
+def allocate(remaining: int, history_need: int, context_need: int,
+             history_share: float = PROMPT_HISTORY_SHARE) -> Tuple[int, int]:
+    """Split the variable budget between history and context; either may use the other's slack."""
+    if history_need + context_need <= remaining:
+        return history_need, context_need
+    history = min(history_need, max(int(remaining * history_share), remaining - context_need))
+    return history, remaining - history
+
+
+def pack_prompt(template: str, fixed: Dict[str, str], history: List[str], documents: Optional[List[str]] = None,
+                budget: int = PROMPT_TOKEN_BUDGET) -> PackedPrompt:
+    """
+    Fill `template` ({system}, {question}, ... from `fixed` plus {history} and
+    {context}) within `budget` tokens. Fixed sections are always kept (the
+    question is capped at QUESTION_TOKEN_LIMIT); history loses its oldest
+    lines first and documents their lowest-ranked ones, with the last piece
+    that fits partially truncated.
+    """
+    fixed = dict(fixed)
+    fixed["question"] = truncate_tokens(fixed["question"], QUESTION_TOKEN_LIMIT)
+    skeleton = template.format(history="", context="", **fixed)
+    remaining = max(budget - count_tokens(skeleton), 0)
+
+    documents = documents or []
+    history_need = sum(count_tokens(line) + 1 for line in history)
+    context_need = sum(count_tokens(doc) + 1 for doc in documents)
+    history_budget, context_budget = allocate(remaining, history_need, context_need)
+
+    # Newest history lines are worth most: fit them newest-first, then restore order
+    recent, history_used, history_dropped = _fit(list(reversed(history)), history_budget, truncate_last=False)
+    context, context_used, context_dropped = _fit(documents, context_budget, truncate_last=True)
+
+    text = template.format(history="\n".join(reversed(recent)), context="\n".join(context), **fixed)
+    tokens = count_tokens(text)
+    return PackedPrompt(
+        text, tokens,
+        sections={"fixed": tokens - history_used - context_used, "history": history_used, "context": context_used},
+        dropped={"history": history_dropped, "context": context_dropped}
+    )
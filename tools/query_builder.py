@@ -0,0 +1,79 @@
+# tools/query_builder.py
+import os
+from typing import List, Sequence
+import numpy as np
+
+# weighted: embed the question and recent user turns separately and mix the vectors;
+# concat: the previous "Context: ...\nQuestion: ..." string embedded as one text
+QUERY_MODE = os.getenv("QUERY_MODE", "weighted")
+QUERY_CONTEXT_TURNS = int(os.getenv("QUERY_CONTEXT_TURNS", "3"))
+# Weight of the most recent earlier user turn relative to the question (1.0)
+QUERY_CONTEXT_WEIGHT = float(os.getenv("QUERY_CONTEXT_WEIGHT", "0.5"))
+# Each older turn counts this much less than the next newer one
+QUERY_CONTEXT_DECAY = float(os.getenv("QUERY_CONTEXT_DECAY", "0.5"))
+
+USER_PREFIX = "User:"
+
+
+class RetrievalQuery(str):
+    """
+    The question itself, as text, plus the user's earlier turns (oldest
+    first). Retrievers use the text for BM25 and reranking and mix the turns
+    into the dense query vector with query_vector().
+    """
+
+    def __new__(cls, question: str, turns: Sequence[str] = ()):
+        query = super().__new__(cls, question)
+        query.turns = tuple(turns)
+        return query
+
+
+def recent_user_turns(history: List[str], question: str, n: int = QUERY_CONTEXT_TURNS) -> List[str]:
+    """The last n user messages before the current question (doctor replies carry little query signal)."""
+    turns = [line[len(USER_PREFIX):].strip() for line in history if line.startswith(USER_PREFIX)]
+    if turns and turns[-1] == question.strip():
+        turns = turns[:-1]  # the current question is already in the history
+    return turns[-n:] if n > 0 else []
+
+
+def build_retrieval_query(question: str, history: List[str], mode: str = QUERY_MODE) -> str:
+    if mode == "concat":
+        context = "\n".join(history[-6:])
+        return f"Context: {context}\nQuestion: {question}"
+    if mode != "weighted":
+        raise ValueError(f"QUERY_MODE must be 'weighted' or 'concat', got {mode!r}")
+    return RetrievalQuery(question, recent_user_turns(history, question))
+
+
+def context_weights(n_turns: int, weight: float = QUERY_CONTEXT_WEIGHT,
+                    decay: float = QUERY_CONTEXT_DECAY) -> List[float]:
+    """Recency weights for turns ordered oldest first."""
+    return [weight * decay ** (n_turns - 1 - i) for i in range(n_turns)]
+
+
+def combine_vectors(question_vector, turn_vectors, weight: float = QUERY_CONTEXT_WEIGHT,
+                    decay: float = QUERY_CONTEXT_DECAY) -> np.ndarray:
+    """Weighted sum of unit-normalized vectors: the question at 1.0, turns by recency."""
+    vectors = np.asarray([question_vector, *turn_vectors], dtype=np.float32)
+    vectors /= np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+    weights = np.asarray([1.0, *context_weights(len(turn_vectors), weight, decay)], dtype=np.float32)
+    combined = weights @ vectors
+    return combined / max(float(np.linalg.norm(combined)), 1e-12)
+
+
+def query_vector(embeddings, query: str) -> List[float]:
+    """
+    Dense vector for a query. Each text is embedded on its own, so the
+    question never falls out of the model's input window; with the query
+    embedding cache, earlier turns are embedded once per conversation.
+    """
+    question = embeddings.embed_query(str(query))
+    turns = getattr(query, "turns", ())
+    if not turns:
+        return question
+    return combine_vectors(question, [embeddings.embed_query(turn) for turn in turns]).tolist()
+
+
+def lexical_text(query: str) -> str:
+    """BM25 text: the question plus the previous user turn, which usually names the topic of a follow-up."""
+    return " ".join([*getattr(query, "turns", ())[-1:], str(query)])
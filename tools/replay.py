@@ -0,0 +1,209 @@
+# tools/replay.py
+import os
+import json
+import hashlib
+from pathlib import Path
+from typing import Any, Iterator, AsyncIterator, List, Optional
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+PROJECT_ROOT = Path(__file__).parent.parent.resolve()
+
+# record: serve recorded responses, call the live service on a miss and save it
+# replay: serve recorded responses only; a miss raises ReplayMissError (offline runs)
+# passthrough: always call the live service, nothing is read or written
+REPLAY_MODES = ("record", "replay", "passthrough")
+REPLAY_MODE = os.getenv("REPLAY_MODE", "passthrough")
+REPLAY_DIR = Path(os.getenv("REPLAY_DIR", PROJECT_ROOT / "replay_cache"))
+
+if REPLAY_MODE not in REPLAY_MODES:
+    raise ValueError(f"REPLAY_MODE must be one of {REPLAY_MODES}, got {REPLAY_MODE!r}")
+
+
+class ReplayMissError(RuntimeError):
+    """Raised in replay mode when a request has no recorded response."""
+
+
+def request_key(kind: str, params: dict, payload) -> str:
+    """Hash of the exact request: what is called, with which parameters and input."""
+    blob = json.dumps({"kind": kind, "params": params, "payload": payload},
+                      sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class ReplayStore:
+    """One JSON file per recorded request, sharded by the first two hex digits of its key."""
+
+    def __init__(self, root: Path = REPLAY_DIR):
+        self.root = Path(root)
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[dict]:
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, key: str, record: dict):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(record, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+
+
+class _Recorder:
+    """Shared lookup/save logic for the LLM and tool wrappers."""
+
+    def __init__(self, kind: str, params: dict, mode: str, store: ReplayStore):
+        self.kind = kind
+        self.params = params
+        self.mode = mode
+        self.store = store
+
+    def key(self, payload) -> str:
+        return request_key(self.kind, self.params, payload)
+
+    def lookup(self, key: str) -> Optional[dict]:
+        if self.mode == "passthrough":
+            return None
+        record = self.store.get(key)
+        if record is None and self.mode == "replay":
+            raise ReplayMissError(f"No recorded {self.kind} response for request {key[:12]}")
+        return record
+
+    def save(self, key: str, payload, response: str):
+        if self.mode == "record":
+            self.store.put(key, {"kind": self.kind, "params": self.params,
+                                 "request": payload, "response": response})
+
+
+class ReplayChatModel(BaseChatModel):
+    """
+    Chat model wrapper that records/replays responses of an inner model.
+    Keys cover the model's identifying parameters (model name, temperature,
+    max tokens, ...), the exact messages, stop sequences and per-call
+    arguments such as max_tokens.
+    """
+
+    inner: Any
+    recorder: Any
+
+    @property
+    def _llm_type(self) -> str:
+        return "replay"
+
+    @staticmethod
+    def _payload(messages: List[BaseMessage], stop: Optional[List[str]], kwargs: dict):
+        payload = {"messages": [[m.type, m.content] for m in messages], "stop": stop}
+        if kwargs:
+            # Only added when present, so recordings of calls without extra arguments keep their keys
+            payload["kwargs"] = {name: kwargs[name] for name in sorted(kwargs)}
+        return payload
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        payload = self._payload(messages, stop, kwargs)
+        key = self.recorder.key(payload)
+        record = self.recorder.lookup(key)
+        if record is not None:
+            return ChatResult(generations=[ChatGeneration(message=AIMessage(content=record["response"]))])
+
+        message = self.inner.invoke(messages, stop=stop, **kwargs)
+        self.recorder.save(key, payload, message.content)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        payload = self._payload(messages, stop, kwargs)
+        key = self.recorder.key(payload)
+        record = self.recorder.lookup(key)
+        if record is not None:
+            return ChatResult(generations=[ChatGeneration(message=AIMessage(content=record["response"]))])
+
+        message = await self.inner.ainvoke(messages, stop=stop, **kwargs)
+        self.recorder.save(key, payload, message.content)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs) -> Iterator[ChatGenerationChunk]:
+        payload = self._payload(messages, stop, kwargs)
+        key = self.recorder.key(payload)
+        record = self.recorder.lookup(key)
+
+        if record is not None:
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=record["response"]))
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+            return
+
+        parts = []
+        for message_chunk in self.inner.stream(messages, stop=stop, **kwargs):
+            chunk = ChatGenerationChunk(message=message_chunk)
+            parts.append(chunk.text)
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+        self.recorder.save(key, payload, "".join(parts))
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs) -> AsyncIterator[ChatGenerationChunk]:
+        payload = self._payload(messages, stop, kwargs)
+        key = self.recorder.key(payload)
+        record = self.recorder.lookup(key)
+
+        if record is not None:
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=record["response"]))
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+            return
+
+        parts = []
+        async for message_chunk in self.inner.astream(messages, stop=stop, **kwargs):
+            chunk = ChatGenerationChunk(message=message_chunk)
+            parts.append(chunk.text)
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+        self.recorder.save(key, payload, "".join(parts))
+
+
+class ReplayTool:
+    """Record/replay wrapper for search wrappers exposing run(query) -> str."""
+
+    def __init__(self, inner, recorder: _Recorder):
+        self.inner = inner
+        self.recorder = recorder
+
+    def run(self, query: str) -> str:
+        key = self.recorder.key(query)
+        record = self.recorder.lookup(key)
+        if record is not None:
+            return record["response"]
+
+        response = self.inner.run(query)
+        self.recorder.save(key, query, response)
+        return response
+
+
+def wrap_llm(llm, mode: str = None, store: ReplayStore = None):
+    """Return llm wrapped for record/replay, or unchanged in passthrough mode."""
+    mode = mode or REPLAY_MODE
+    if mode == "passthrough":
+        return llm
+    params = {k: v for k, v in llm._identifying_params.items() if k != "api_key"}
+    recorder = _Recorder("llm", params, mode, store or ReplayStore())
+    return ReplayChatModel(inner=llm, recorder=recorder)
+
+
+def wrap_tool(name: str, tool, params: dict = None, mode: str = None, store: ReplayStore = None):
+    """Return a search tool wrapped for record/replay, or unchanged in passthrough mode."""
+    mode = mode or REPLAY_MODE
+    if mode == "passthrough":
+        return tool
+    return ReplayTool(tool, _Recorder(name, params or {}, mode, store or ReplayStore()))
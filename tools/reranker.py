@@ -0,0 +1,209 @@
+# tools/reranker.py
+import os
+import time
+import asyncio
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from langchain_core.documents import Document
+from core.resources import registry
+from .vector_store import RETRIEVAL_K
+from .hybrid_retriever import LatencyStats, document_key
+
+RERANK_ENABLED = os.getenv("RERANK_ENABLED", "0") == "1"
+# Multilingual, like the embedding model: questions arrive in many languages and the
+# English-only ms-marco cross-encoders score non-English pairs close to noise.
+# English-only deployments can set cross-encoder/ms-marco-MiniLM-L-6-v2 (about twice as fast)
+RERANK_MODEL = os.getenv("RERANK_MODEL", "cross-encoder/mmarco-mMiniLMv2-L12-H384-v1")
+# Candidates fetched from the first stage; the best RERANK_TOP_N are kept
+RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", "20"))
+RERANK_TOP_N = int(os.getenv("RERANK_TOP_N", str(RETRIEVAL_K)))
+# Past this budget the first-stage order is used; late scores still fill the cache
+RERANK_BUDGET_MS = float(os.getenv("RERANK_BUDGET_MS", "300"))
+RERANK_CACHE_SIZE = int(os.getenv("RERANK_CACHE_SIZE", "20000"))
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="rerank")
+
+
+def _create_cross_encoder():
+    # Imported here so the model (and torch) only load when reranking is on
+    from sentence_transformers import CrossEncoder
+    return CrossEncoder(RERANK_MODEL, device="cpu")
+
+
+registry.register("cross_encoder", _create_cross_encoder, enabled=RERANK_ENABLED)
+
+
+def cross_encoder_scores(pairs: List[Tuple[str, str]]) -> List[float]:
+    """Score all (query, passage) pairs in a single batched forward pass."""
+    model = registry.get("cross_encoder")
+    return [float(score) for score in model.predict(pairs, batch_size=len(pairs), show_progress_bar=False)]
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+class ScoreCache:
+    """Bounded LRU of cross-encoder scores keyed by (normalized query, chunk key)."""
+
+    def __init__(self, max_entries: int = RERANK_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._scores = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys: Sequence[tuple]) -> Dict[tuple, float]:
+        found = {}
+        with self._lock:
+            for key in keys:
+                if key in self._scores:
+                    self._scores.move_to_end(key)
+                    found[key] = self._scores[key]
+        return found
+
+    def put_many(self, scores: Dict[tuple, float]):
+        with self._lock:
+            for key, score in scores.items():
+                self._scores[key] = score
+                self._scores.move_to_end(key)
+            while len(self._scores) > self.max_entries:
+                self._scores.popitem(last=False)
+
+    def __len__(self):
+        return len(self._scores)
+
+
+class CrossEncoderReranker:
+    """
+    Reorders candidate chunks by cross-encoder relevance and keeps the top_n.
+    Only pairs missing from the score cache are sent to the model, in one batch.
+    If scoring does not finish within budget_ms the candidates keep their
+    first-stage order.
+    """
+
+    def __init__(self, score_fn: Callable[[List[Tuple[str, str]]], List[float]] = cross_encoder_scores,
+                 top_n: int = RERANK_TOP_N, budget_ms: float = RERANK_BUDGET_MS,
+                 cache: Optional[ScoreCache] = None):
+        self.score_fn = score_fn
+        self.top_n = top_n
+        self.budget_ms = budget_ms
+        self.cache = cache if cache is not None else ScoreCache()
+        self._lock = threading.Lock()
+        self.reranked = 0
+        self.fallbacks = 0
+        self.pairs_scored = 0
+        self.pairs_cached = 0
+
+    def _count(self, **increments):
+        with self._lock:
+            for attr, value in increments.items():
+                setattr(self, attr, getattr(self, attr) + value)
+
+    def _score(self, query: str, docs: List[Document]) -> List[float]:
+        keys = [(normalize_query(query), document_key(doc)) for doc in docs]
+        scores = self.cache.get_many(keys)
+        missing = [i for i, key in enumerate(keys) if key not in scores]
+        if missing:
+            fresh = self.score_fn([(query, docs[i].page_content) for i in missing])
+            new_scores = {keys[i]: score for i, score in zip(missing, fresh)}
+            self.cache.put_many(new_scores)
+            scores.update(new_scores)
+        self._count(pairs_scored=len(missing), pairs_cached=len(keys) - len(missing))
+        return [scores[key] for key in keys]
+
+    def _order(self, docs: List[Document], scores: Optional[List[float]]) -> List[Document]:
+        if scores is None:
+            self._count(fallbacks=1)
+            return docs[:self.top_n]
+        self._count(reranked=1)
+        # sorted() is stable, so equal scores keep first-stage order
+        order = sorted(range(len(docs)), key=lambda i: -scores[i])
+        return [docs[i] for i in order[:self.top_n]]
+
+    def rerank(self, query: str, docs: List[Document]) -> List[Document]:
+        if len(docs) <= 1:
+            return docs[:self.top_n]
+        future = _executor.submit(self._score, query, docs)
+        try:
+            scores = future.result(timeout=self.budget_ms / 1000)
+        except Exception:  # over budget (TimeoutError) or the model failed
+            scores = None
+        return self._order(docs, scores)
+
+    async def arerank(self, query: str, docs: List[Document]) -> List[Document]:
+        if len(docs) <= 1:
+            return docs[:self.top_n]
+        future = asyncio.wrap_future(_executor.submit(self._score, query, docs))
+        try:
+            # shield: a late batch keeps running so its scores are cached
+            scores = await asyncio.wait_for(asyncio.shield(future), timeout=self.budget_ms / 1000)
+        except Exception:
+            scores = None
+        return self._order(docs, scores)
+
+    def stats(self) -> dict:
+        return {
+            "model": RERANK_MODEL,
+            "top_n": self.top_n,
+            "budget_ms": self.budget_ms,
+            "reranked": self.reranked,
+            "fallbacks": self.fallbacks,
+            "pairs_scored": self.pairs_scored,
+            "pairs_cached": self.pairs_cached,
+            "cached_scores": len(self.cache)
+        }
+
+
+class RerankingRetriever:
+    """A first-stage retriever returning a large candidate pool, followed by reranking."""
+
+    def __init__(self, base, reranker: CrossEncoderReranker):
+        self.base = base
+        self.reranker = reranker
+        self.latency = LatencyStats()
+
+    def _first_stage(self, query: str):
+        if hasattr(self.base, "search"):
+            return self.base.search(query)
+        started = time.perf_counter()
+        docs = self.base.invoke(query)
+        return docs, {"retrieve_ms": (time.perf_counter() - started) * 1000}
+
+    async def _afirst_stage(self, query: str):
+        if hasattr(self.base, "asearch"):
+            return await self.base.asearch(query)
+        started = time.perf_counter()
+        docs = await self.base.ainvoke(query)
+        return docs, {"retrieve_ms": (time.perf_counter() - started) * 1000}
+
+    def _record(self, timings: Dict[str, float], rerank_started: float, started: float) -> Dict[str, float]:
+        now = time.perf_counter()
+        timings = dict(timings, rerank_ms=(now - rerank_started) * 1000, total_ms=(now - started) * 1000)
+        self.latency.record({"rerank_ms": timings["rerank_ms"], "total_ms": timings["total_ms"]})
+        return timings
+
+    def search(self, query: str) -> Tuple[List[Document], Dict[str, float]]:
+        started = time.perf_counter()
+        candidates, timings = self._first_stage(query)
+        rerank_started = time.perf_counter()
+        docs = self.reranker.rerank(query, candidates)
+        return docs, self._record(timings, rerank_started, started)
+
+    async def asearch(self, query: str) -> Tuple[List[Document], Dict[str, float]]:
+        started = time.perf_counter()
+        candidates, timings = await self._afirst_stage(query)
+        rerank_started = time.perf_counter()
+        docs = await self.reranker.arerank(query, candidates)
+        return docs, self._record(timings, rerank_started, started)
+
+    def invoke(self, query: str) -> List[Document]:
+        return self.search(query)[0]
+
+    async def ainvoke(self, query: str) -> List[Document]:
+        return (await self.asearch(query))[0]
+
+    def stats(self) -> dict:
+        stats = self.base.stats() if hasattr(self.base, "stats") else {"mode": "vector"}
+        stats["rerank"] = dict(self.reranker.stats(), latency=self.latency.summary())
+        return stats
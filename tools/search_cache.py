@@ -0,0 +1,188 @@
+# tools/search_cache.py
+import os
+import time
+import asyncio
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Callable, Optional, Tuple
+from core.resources import registry
+
+PROJECT_ROOT = Path(__file__).parent.parent.resolve()
+
+SEARCH_CACHE_ENABLED = os.getenv("SEARCH_CACHE_ENABLED", "1") == "1"
+SEARCH_CACHE_PATH = Path(os.getenv("SEARCH_CACHE_PATH", PROJECT_ROOT / "cache" / "search_cache.sqlite3"))
+SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", str(7 * 24 * 3600)))
+SEARCH_CACHE_NEGATIVE_TTL = float(os.getenv("SEARCH_CACHE_NEGATIVE_TTL", "3600"))
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "50000"))
+# Inserts per worker between size checks; the table may overshoot max_entries by this much per worker
+SEARCH_CACHE_EVICT_EVERY = int(os.getenv("SEARCH_CACHE_EVICT_EVERY", "100"))
+
+
+def is_usable(content) -> bool:
+    # The LangChain wrappers report "No good ... Search Result was found" as text
+    return bool(content) and not content.startswith("No good ")
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+class SearchCache:
+    """
+    SQLite-backed cache of web lookups keyed by (source, normalized query).
+    Usable results live for ttl seconds, empty ones for negative_ttl; beyond
+    max_entries the least recently used rows are evicted (checked every
+    evict_every inserts, not on each one). WAL mode lets
+    several worker processes on the host share one file.
+    """
+
+    def __init__(self, path: Path = SEARCH_CACHE_PATH, ttl: float = SEARCH_CACHE_TTL,
+                 negative_ttl: float = SEARCH_CACHE_NEGATIVE_TTL, max_entries: int = SEARCH_CACHE_MAX_ENTRIES,
+                 evict_every: int = SEARCH_CACHE_EVICT_EVERY):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.evict_every = max(evict_every, 1)
+        self._puts = 0
+        self._local = threading.local()
+        self._counter_lock = threading.Lock()
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS search_cache (
+                    source TEXT NOT NULL,
+                    query TEXT NOT NULL,
+                    content TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    last_used REAL NOT NULL,
+                    PRIMARY KEY (source, query)
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_search_cache_last_used ON search_cache (last_used)")
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections are not shared between threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _count(self, attr: str):
+        with self._counter_lock:
+            setattr(self, attr, getattr(self, attr) + 1)
+
+    def get(self, source: str, query: str) -> Tuple[bool, Optional[str]]:
+        """Return (hit, content); content may be an empty/negative result."""
+        key = normalize_query(query)
+        now = time.time()
+        conn = self._connection()
+        with conn:
+            row = conn.execute("SELECT content, expires_at FROM search_cache WHERE source = ? AND query = ?",
+                               (source, key)).fetchone()
+            if row is None or row[1] < now:
+                if row is not None:
+                    conn.execute("DELETE FROM search_cache WHERE source = ? AND query = ?", (source, key))
+                self._count("misses")
+                return False, None
+            conn.execute("UPDATE search_cache SET last_used = ? WHERE source = ? AND query = ?", (now, source, key))
+
+        self._count("hits" if is_usable(row[0]) else "negative_hits")
+        return True, row[0]
+
+    def put(self, source: str, query: str, content: Optional[str]):
+        content = content or ""
+        now = time.time()
+        ttl = self.ttl if is_usable(content) else self.negative_ttl
+        with self._counter_lock:
+            self._puts += 1
+            check_size = self._puts % self.evict_every == 0
+        conn = self._connection()
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO search_cache (source, query, content, expires_at, last_used) "
+                         "VALUES (?, ?, ?, ?, ?)", (source, normalize_query(query), content, now + ttl, now))
+        if check_size:
+            self._evict(conn)
+
+    def _evict(self, conn: sqlite3.Connection):
+        # The file is shared by all workers, so the row count is read rather than tracked in-process
+        with conn:
+            excess = conn.execute("SELECT COUNT(*) FROM search_cache").fetchone()[0] - self.max_entries
+            if excess > 0:
+                conn.execute("DELETE FROM search_cache WHERE rowid IN "
+                             "(SELECT rowid FROM search_cache ORDER BY last_used LIMIT ?)", (excess,))
+                with self._counter_lock:
+                    self.evictions += excess
+
+    def clear(self):
+        with self._connection() as conn:
+            conn.execute("DELETE FROM search_cache")
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.negative_hits + self.misses
+        entries = self._connection().execute("SELECT COUNT(*) FROM search_cache").fetchone()[0]
+        return {
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round((self.hits + self.negative_hits) / lookups, 4) if lookups else 0.0
+        }
+
+
+registry.register("search_cache", SearchCache, enabled=SEARCH_CACHE_ENABLED, required=False)
+
+
+def get_search_cache() -> Optional[SearchCache]:
+    return registry.get("search_cache") if SEARCH_CACHE_ENABLED else None
+
+
+def _lookup(source: str, query: str) -> Tuple[bool, Optional[str]]:
+    try:
+        cache = get_search_cache()
+        return cache.get(source, query) if cache else (False, None)
+    except Exception:
+        return False, None
+
+
+def _store(source: str, query: str, content: Optional[str]):
+    try:
+        cache = get_search_cache()
+        if cache:
+            cache.put(source, query, content)
+    except Exception:
+        pass
+
+
+def cached_search(source: str, query: str, fetch: Callable[[str], str]) -> str:
+    """
+    Serve a lookup from the cache, or call fetch(query) and cache its result.
+    Exceptions from fetch (timeouts, open circuits) are not cached.
+    """
+    hit, content = _lookup(source, query)
+    if hit:
+        return content
+    content = fetch(query)
+    _store(source, query, content)
+    return content
+
+
+async def acached_search(source: str, query: str, afetch) -> str:
+    """Async variant of cached_search; SQLite access runs in a worker thread."""
+    hit, content = await asyncio.to_thread(_lookup, source, query)
+    if hit:
+        return content
+    content = await afetch(query)
+    await asyncio.to_thread(_store, source, query, content)
+    return content
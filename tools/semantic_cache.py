@@ -0,0 +1,197 @@
+# tools/semantic_cache.py
+import os
+import time
+import threading
+from collections import OrderedDict
+from typing import Callable, List, Optional
+import numpy as np
+from core.resources import registry
+
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "1") == "1"
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "2000"))
+SEMANTIC_CACHE_TTL = float(os.getenv("SEMANTIC_CACHE_TTL", str(24 * 3600)))
+
+# Only real answers are reused, never the "please consult a doctor" fallback
+CACHEABLE_SOURCES = ("llm_knowledge", "retrieved_docs")
+# Requests that leave the language to detection (WhatsApp) have no bucket until it is known
+AUTO_LANGUAGE = "auto"
+
+
+def normalize_question(question: str) -> str:
+    return " ".join(question.lower().split())
+
+
+class _LanguageBucket:
+    """Entries for one language plus a lazily rebuilt matrix of their unit vectors."""
+
+    def __init__(self):
+        self.entries = OrderedDict()  # normalized question -> (vector, payload, created_at)
+        self._matrix = None
+        self._keys = []
+
+    def invalidate(self):
+        self._matrix = None
+
+    def matrix(self):
+        if self._matrix is None:
+            self._keys = list(self.entries)
+            self._matrix = np.stack([self.entries[k][0] for k in self._keys]) if self._keys else None
+        return self._keys, self._matrix
+
+
+class SemanticCache:
+    """
+    Answer cache keyed on question meaning rather than exact text.
+    A question hits when a cached question in the same language has cosine
+    similarity >= threshold. Entries expire after ttl seconds and the least
+    recently used ones are evicted beyond max_entries (across all languages).
+    """
+
+    def __init__(self, embed_fn: Callable[[str], List[float]], threshold: float = SEMANTIC_CACHE_THRESHOLD,
+                 max_entries: int = SEMANTIC_CACHE_MAX_ENTRIES, ttl: float = SEMANTIC_CACHE_TTL):
+        self.embed_fn = embed_fn
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._buckets = {}
+        self._lru = OrderedDict()  # (language, normalized question) -> None, oldest first
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.evictions = 0
+
+    def _embed(self, question: str) -> np.ndarray:
+        vector = np.asarray(self.embed_fn(question), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _remove(self, language: str, key: str):
+        bucket = self._buckets[language]
+        del bucket.entries[key]
+        bucket.invalidate()
+        self._lru.pop((language, key), None)
+
+    def lookup(self, question: str, language: str, history: Optional[list] = None) -> Optional[dict]:
+        """Return the cached payload for a similar question, or None."""
+        if history:
+            # Follow-ups depend on earlier turns; a context-free answer could be wrong
+            with self._lock:
+                self.bypassed += 1
+            return None
+
+        vector = self._embed(question)
+        now = time.time()
+        with self._lock:
+            bucket = self._buckets.get(language)
+            if bucket is None or not bucket.entries:
+                self.misses += 1
+                return None
+
+            keys, matrix = bucket.matrix()
+            scores = matrix @ vector
+            for index in np.argsort(-scores):
+                if scores[index] < self.threshold:
+                    break
+                key = keys[index]
+                _, payload, created_at = bucket.entries[key]
+                if now - created_at > self.ttl:
+                    self._remove(language, key)
+                    continue
+                self._lru.move_to_end((language, key))
+                self.hits += 1
+                return dict(payload, similarity=float(scores[index]))
+
+            self.misses += 1
+            return None
+
+    def store(self, question: str, language: str, payload: dict, history: Optional[list] = None):
+        if history:
+            # An answer that relied on earlier turns must not be served to a fresh conversation
+            return
+        vector = self._embed(question)
+        key = normalize_question(question)
+        now = time.time()
+        with self._lock:
+            bucket = self._buckets.setdefault(language, _LanguageBucket())
+            bucket.entries[key] = (vector, payload, now)
+            bucket.invalidate()
+            self._lru[(language, key)] = None
+            self._lru.move_to_end((language, key))
+
+            # Expired entries are swept from the old end only (lookups drop the ones they meet),
+            # so a store never scans the whole cache
+            while self._lru:
+                lang, old_key = next(iter(self._lru))
+                if now - self._buckets[lang].entries[old_key][2] <= self.ttl:
+                    break
+                self._remove(lang, old_key)
+            while len(self._lru) > self.max_entries:
+                lang, old_key = next(iter(self._lru))
+                self._remove(lang, old_key)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+            self._lru.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._lru),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "threshold": self.threshold,
+            "ttl_seconds": self.ttl
+        }
+
+
+def _create_answer_cache():
+    from tools.vector_store import get_embeddings
+    return SemanticCache(lambda text: get_embeddings().embed_query(text))
+
+
+# Lookups and stores swallow cache errors, so a broken cache never keeps the instance out of service
+registry.register("answer_cache", _create_answer_cache, enabled=SEMANTIC_CACHE_ENABLED, required=False)
+
+
+def get_answer_cache() -> Optional[SemanticCache]:
+    return registry.get("answer_cache") if SEMANTIC_CACHE_ENABLED else None
+
+
+def lookup_answer(question: str, language: str, history: Optional[list] = None) -> Optional[dict]:
+    """Cached answer for the question, or None (also when the cache is unavailable)."""
+    if language == AUTO_LANGUAGE:
+        return None
+    try:
+        cache = get_answer_cache()
+        return cache.lookup(question, language, history) if cache else None
+    except Exception:
+        return None
+
+
+def cache_answer(question: str, language: str, result: dict, history: Optional[list] = None):
+    """
+    Store a finished workflow result if it is a real answer to a context-free
+    question. It goes in the bucket of the language the answer is written in,
+    which differs from the requested one when the LLM agent switched languages.
+    """
+    answered = result.get("language") or language
+    if result.get("source") not in CACHEABLE_SOURCES or answered == AUTO_LANGUAGE:
+        return
+    try:
+        cache = get_answer_cache()
+        if cache:
+            cache.store(question, answered, {
+                "generation": result.get("generation", ""),
+                "source": result.get("source", ""),
+                "language": answered
+            }, history)
+    except Exception:
+        pass
@@ -0,0 +1,287 @@
+# tools/session_store.py
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+from core.resources import registry
+
+PROJECT_ROOT = Path(__file__).parent.parent.resolve()
+
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "memory")  # memory | sqlite | redis
+# Idle seconds before a conversation expires (each access renews it)
+SESSION_TTL = float(os.getenv("SESSION_TTL", str(24 * 3600)))
+# Conversations kept by the memory and SQLite backends; least recently used go first
+SESSION_MAX_ENTRIES = int(os.getenv("SESSION_MAX_ENTRIES", "10000"))
+# History lines kept per conversation
+SESSION_HISTORY_LIMIT = int(os.getenv("SESSION_HISTORY_LIMIT", "40"))
+SESSION_SQLITE_PATH = Path(os.getenv("SESSION_SQLITE_PATH", PROJECT_ROOT / "cache" / "sessions.sqlite3"))
+SESSION_REDIS_URL = os.getenv("SESSION_REDIS_URL", "redis://localhost:6379/0")
+SESSION_REDIS_PREFIX = os.getenv("SESSION_REDIS_PREFIX", "mediassist:session:")
+# Keys per SCAN page and per STRLEN pipeline when /stats measures the Redis backend
+REDIS_STATS_BATCH = 1000
+
+
+def new_session_id() -> str:
+    # 122 random bits: unique across workers and hosts without coordination
+    return uuid.uuid4().hex
+
+
+def append_history(data: dict, *lines: str, limit: int = SESSION_HISTORY_LIMIT) -> dict:
+    """Add lines to a session's history, keeping only the newest `limit`."""
+    history = data.setdefault("history", [])
+    history.extend(lines)
+    if len(history) > limit:
+        del history[:len(history) - limit]
+    return data
+
+
+class SessionStore(ABC):
+    """
+    Conversation data (a JSON-serializable dict) by session id, with a
+    sliding TTL. Backends serialize on save, so callers never share
+    mutable state with the store.
+    """
+    backend = "base"
+
+    def __init__(self, ttl: float = SESSION_TTL, history_limit: int = SESSION_HISTORY_LIMIT):
+        self.ttl = ttl
+        self.history_limit = history_limit
+        self._counter_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _count(self, attr: str, n: int = 1):
+        with self._counter_lock:
+            setattr(self, attr, getattr(self, attr) + n)
+
+    def _encode(self, data: dict) -> str:
+        history = data.get("history")
+        if history is not None and len(history) > self.history_limit:
+            data = dict(data, history=history[-self.history_limit:])
+        return json.dumps(data, ensure_ascii=False)
+
+    def _decode(self, blob) -> Optional[dict]:
+        if blob is None:
+            self._count("misses")
+            return None
+        self._count("hits")
+        return json.loads(blob)
+
+    @abstractmethod
+    def get(self, session_id: str) -> Optional[dict]:
+        ...
+
+    @abstractmethod
+    def save(self, session_id: str, data: dict):
+        ...
+
+    @abstractmethod
+    def delete(self, session_id: str):
+        ...
+
+    @abstractmethod
+    def _size(self) -> dict:
+        ...
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return dict({
+            "backend": self.backend,
+            "ttl": self.ttl,
+            "history_limit": self.history_limit,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }, **self._size())
+
+
+class MemorySessionStore(SessionStore):
+    """Per-process LRU with TTL; conversations are lost on restart and not shared between workers."""
+    backend = "memory"
+
+    def __init__(self, max_entries: int = SESSION_MAX_ENTRIES, **kwargs):
+        super().__init__(**kwargs)
+        self.max_entries = max_entries
+        self._sessions = OrderedDict()  # id -> (expires_at, json)
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> Optional[dict]:
+        now = time.time()
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is not None and entry[0] < now:
+                del self._sessions[session_id]
+                entry = None
+            if entry is not None:
+                self._sessions[session_id] = (now + self.ttl, entry[1])
+                self._sessions.move_to_end(session_id)
+        return self._decode(entry[1] if entry else None)
+
+    def save(self, session_id: str, data: dict):
+        blob = self._encode(data)
+        now = time.time()
+        evicted = 0
+        with self._lock:
+            self._sessions[session_id] = (now + self.ttl, blob)
+            self._sessions.move_to_end(session_id)
+            # Every access renews the same TTL, so LRU order is also expiry order
+            while self._sessions and next(iter(self._sessions.values()))[0] < now:
+                self._sessions.popitem(last=False)
+            while len(self._sessions) > self.max_entries:
+                self._sessions.popitem(last=False)
+                evicted += 1
+        if evicted:
+            self._count("evictions", evicted)
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def _size(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._sessions),
+                "max_entries": self.max_entries,
+                "bytes": sum(len(blob) for _, blob in self._sessions.values())
+            }
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Sessions in a SQLite file (WAL mode), shared by all workers on a host
+    and kept across restarts. Rows past their TTL are treated as missing
+    and cleaned up on save, together with LRU eviction beyond max_entries.
+    """
+    backend = "sqlite"
+
+    def __init__(self, path: Path = SESSION_SQLITE_PATH, max_entries: int = SESSION_MAX_ENTRIES, **kwargs):
+        super().__init__(**kwargs)
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self._local = threading.local()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS sessions (
+                    id TEXT PRIMARY KEY,
+                    data TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_expires_at ON sessions (expires_at)")
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections are not shared between threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, session_id: str) -> Optional[dict]:
+        now = time.time()
+        conn = self._connection()
+        with conn:
+            row = conn.execute("SELECT data FROM sessions WHERE id = ? AND expires_at >= ?",
+                               (session_id, now)).fetchone()
+            if row is not None:
+                conn.execute("UPDATE sessions SET expires_at = ? WHERE id = ?", (now + self.ttl, session_id))
+        return self._decode(row[0] if row else None)
+
+    def save(self, session_id: str, data: dict):
+        now = time.time()
+        conn = self._connection()
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO sessions (id, data, expires_at) VALUES (?, ?, ?)",
+                         (session_id, self._encode(data), now + self.ttl))
+            conn.execute("DELETE FROM sessions WHERE expires_at < ?", (now,))
+            # With a sliding TTL the soonest-expiring rows are the least recently used
+            excess = conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0] - self.max_entries
+            if excess > 0:
+                conn.execute("DELETE FROM sessions WHERE id IN "
+                             "(SELECT id FROM sessions ORDER BY expires_at LIMIT ?)", (excess,))
+                self._count("evictions", excess)
+
+    def delete(self, session_id: str):
+        with self._connection() as conn:
+            conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+
+    def _size(self) -> dict:
+        entries, size = self._connection().execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(data)), 0) FROM sessions WHERE expires_at >= ?",
+            (time.time(),)).fetchone()
+        return {
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "bytes": size,
+            "file_bytes": self.path.stat().st_size if self.path.exists() else 0
+        }
+
+
+class RedisSessionStore(SessionStore):
+    """
+    Sessions in Redis (or anything speaking its protocol), shared by every
+    worker and host. Expiry uses Redis TTLs; bound total size with the
+    server's maxmemory and an LRU eviction policy.
+    """
+    backend = "redis"
+
+    def __init__(self, client=None, url: str = SESSION_REDIS_URL, prefix: str = SESSION_REDIS_PREFIX, **kwargs):
+        super().__init__(**kwargs)
+        if client is None:
+            import redis
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.prefix = prefix
+
+    def _key(self, session_id: str) -> str:
+        return self.prefix + session_id
+
+    def get(self, session_id: str) -> Optional[dict]:
+        # GETEX renews the TTL in the same round trip
+        return self._decode(self.client.getex(self._key(session_id), ex=int(self.ttl)))
+
+    def save(self, session_id: str, data: dict):
+        self.client.set(self._key(session_id), self._encode(data), ex=int(self.ttl))
+
+    def delete(self, session_id: str):
+        self.client.delete(self._key(session_id))
+
+    def _size(self) -> dict:
+        # One SCAN pass, then STRLEN pipelined per batch instead of a round trip per key
+        keys = list(self.client.scan_iter(match=self.prefix + "*", count=REDIS_STATS_BATCH))
+        size = 0
+        for start in range(0, len(keys), REDIS_STATS_BATCH):
+            pipe = self.client.pipeline(transaction=False)
+            for key in keys[start:start + REDIS_STATS_BATCH]:
+                pipe.strlen(key)
+            size += sum(pipe.execute())
+        return {"entries": len(keys), "bytes": size}
+
+
+def create_session_store(backend: str = SESSION_BACKEND) -> SessionStore:
+    if backend == "memory":
+        return MemorySessionStore()
+    if backend == "sqlite":
+        return SQLiteSessionStore()
+    if backend == "redis":
+        return RedisSessionStore()
+    raise ValueError(f"SESSION_BACKEND must be 'memory', 'sqlite' or 'redis', got {backend!r}")
+
+
+registry.register("session_store", create_session_store)
+
+
+def get_session_store() -> SessionStore:
+    return registry.get("session_store")
@@ -1,51 +1,343 @@
 # tools/vector_store.py
 import os
+import json
+import time
+import shutil
+import hashlib
+from contextlib import contextmanager
 from pathlib import Path
-from langchain_community.vectorstores import Chroma
-from langchain_huggingface.embeddings import HuggingFaceEmbeddings
-from .pdf_loader import load_pdf_documents
+from typing import Dict
+from core.resources import registry
+from .pdf_loader import iter_pdf_chunks, CHUNK_SIZE, CHUNK_OVERLAP, SEPARATORS
+from .embedding_cache import CachedEmbeddings, QUERY_EMBEDDING_CACHE_SIZE
 
 PROJECT_ROOT = Path(__file__).parent.parent.resolve()
 
 DATA_DIR = PROJECT_ROOT / "data"
 VECTOR_DB_DIR = PROJECT_ROOT / "medical_db"
-PDF_PATH = DATA_DIR / "medical_book.pdf"
+MANIFEST_PATH = VECTOR_DB_DIR / "manifest.json"
+# Held while a worker rebuilds or syncs the index, so concurrent workers don't ingest twice
+LOCK_PATH = VECTOR_DB_DIR / ".lock"
 
-_embeddings = HuggingFaceEmbeddings(
-    model_name="sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
-)
+EMBEDDING_MODEL_NAME = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+# torch: sentence-transformers on PyTorch; onnx: exported model on ONNX Runtime (see tools/onnx_embeddings.py)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+# chroma: Chroma collection; flat: memory-mapped exact-search index (see tools/flat_index.py)
+VECTOR_STORE_BACKEND = os.getenv("VECTOR_STORE_BACKEND", "chroma")
 
-_vectorstore = None
+# Chunks sent to the embedding model per call during ingestion
+EMBED_BATCH_SIZE = 512
 
-def initialize_vectorstore():
-    global _vectorstore
-    if _vectorstore is None:
-        os.makedirs(DATA_DIR, exist_ok=True)
-        os.makedirs(VECTOR_DB_DIR, exist_ok=True)
+# Documents handed to the prompt per question
+RETRIEVAL_K = int(os.getenv("RETRIEVAL_K", "3"))
+
+
+def file_sha256(path: Path) -> str:
+    """Hash a file in 1 MB blocks so large books are not read into memory at once."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def chunk_id(source: str, text: str) -> str:
+    """Stable vector id for a chunk: unchanged text in the same file keeps its id."""
+    return hashlib.sha256(f"{source}\x00{text}".encode("utf-8")).hexdigest()
+
+
+def list_pdf_files(data_dir: Path = DATA_DIR) -> Dict[str, Path]:
+    """Map each PDF under data_dir (by relative posix path) to its location."""
+    return {
+        path.relative_to(data_dir).as_posix(): path
+        for path in sorted(data_dir.rglob("*.pdf"))
+    }
+
+
+def index_params() -> dict:
+    """Settings that invalidate every stored vector when they change."""
+    params = {
+        "embedding_model": EMBEDDING_MODEL_NAME,
+        "chunk_size": CHUNK_SIZE,
+        "chunk_overlap": CHUNK_OVERLAP,
+        "separators": SEPARATORS,
+    }
+    if EMBEDDING_BACKEND != "torch":
+        # Quantized vectors differ slightly; documents and queries must come from one backend
+        from .onnx_embeddings import ONNX_QUANTIZED
+        params["embedding_backend"] = f"{EMBEDDING_BACKEND}-{'int8' if ONNX_QUANTIZED else 'fp32'}"
+    if VECTOR_STORE_BACKEND != "chroma":
+        # The manifest describes one store; switching backends or vector formats rebuilds it
+        from .flat_index import FLAT_INDEX_DTYPE, FLAT_INDEX_DIMS
+        params["vector_store"] = f"{VECTOR_STORE_BACKEND}-{FLAT_INDEX_DTYPE}-{FLAT_INDEX_DIMS or 'full'}"
+    return params
+
+
+def read_manifest():
+    """Return the manifest of the persisted index, or None if missing/unreadable."""
+    try:
+        with open(MANIFEST_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_manifest(manifest: dict):
+    tmp_path = MANIFEST_PATH.with_suffix(".json.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, MANIFEST_PATH)
+
+
+@contextmanager
+def index_lock():
+    """Exclusive inter-process lock on the vector DB directory (blocks until free)."""
+    try:
+        import fcntl
+    except ImportError:  # no flock on Windows: single-worker deployments only
+        yield
+        return
+    os.makedirs(VECTOR_DB_DIR, exist_ok=True)
+    with open(LOCK_PATH, "a") as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def _clear_vector_db():
+    # The lock file stays: removing it would let another worker lock a fresh one
+    for path in VECTOR_DB_DIR.iterdir():
+        if path == LOCK_PATH:
+            continue
+        if path.is_dir():
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            path.unlink(missing_ok=True)
+
+
+def create_embeddings(backend: str = EMBEDDING_BACKEND):
+    """Uncached embedding model for the given backend."""
+    if backend == "onnx":
+        from .onnx_embeddings import OnnxEmbeddings
+        return OnnxEmbeddings()
+    if backend != "torch":
+        raise ValueError(f"EMBEDDING_BACKEND must be 'torch' or 'onnx', got {backend!r}")
+
+    # Imported here so the model (and torch) only load on first use
+    from langchain_huggingface.embeddings import HuggingFaceEmbeddings
+    return HuggingFaceEmbeddings(
+        model_name=EMBEDDING_MODEL_NAME
+    )
+
+
+def _create_embeddings():
+    embeddings = create_embeddings()
+    if QUERY_EMBEDDING_CACHE_SIZE > 0:
+        return CachedEmbeddings(embeddings, EMBEDDING_MODEL_NAME)
+    return embeddings
+
+
+def get_embeddings():
+    return registry.get("embeddings")
+
+
+def _open_vectorstore():
+    if VECTOR_STORE_BACKEND == "flat":
+        from .flat_index import FlatVectorStore
+        return FlatVectorStore(VECTOR_DB_DIR / "flat", get_embeddings())
+    if VECTOR_STORE_BACKEND != "chroma":
+        raise ValueError(f"VECTOR_STORE_BACKEND must be 'chroma' or 'flat', got {VECTOR_STORE_BACKEND!r}")
+    from langchain_community.vectorstores import Chroma
+    return Chroma(
+        persist_directory=str(VECTOR_DB_DIR),
+        embedding_function=get_embeddings()
+    )
+
+
+class IngestionProgress:
+    """Running page/chunk counters with a throughput report."""
+
+    def __init__(self, name: str, report_every: float = 5.0):
+        self.name = name
+        self.report_every = report_every
+        self.started = time.perf_counter()
+        self.last_report = self.started
+        self.pages = 0
+        self.chunks = 0
+        self.embedded = 0
 
-        if not PDF_PATH.exists():
-            raise FileNotFoundError(f"PDF file not found at {PDF_PATH}")
+    def report(self, force: bool = False):
+        now = time.perf_counter()
+        if not force and now - self.last_report < self.report_every:
+            return
+        self.last_report = now
+        elapsed = max(now - self.started, 1e-9)
+        print(f"[{self.name}] {self.pages} pages, {self.chunks} chunks, {self.embedded} embedded "
+              f"in {elapsed:.1f}s ({self.pages / elapsed:.1f} pages/s, "
+              f"{self.embedded / elapsed:.1f} chunks/s embedded)")
 
-        # Load documents
-        doc_splits = load_pdf_documents(str(PDF_PATH))
 
-        if len(doc_splits) == 0:
-            raise Exception("No documents after splitting. Cannot create vector DB.")
+class EmbeddingBatcher:
+    """
+    Buffer chunks and add them to the vector store in large batches.
+    Each batch is sorted by text length so the model pads similar-length
+    inputs together.
+    """
 
-        print("Creating Chroma DB with documents:", len(doc_splits))
+    def __init__(self, vectorstore, progress: IngestionProgress, batch_size: int = EMBED_BATCH_SIZE):
+        self.vectorstore = vectorstore
+        self.progress = progress
+        self.batch_size = batch_size
+        self.ids = []
+        self.docs = []
 
-        _vectorstore = Chroma.from_documents(
-            documents=doc_splits,
-            embedding=_embeddings,
-            persist_directory=str(VECTOR_DB_DIR)
+    def add(self, cid: str, doc):
+        self.ids.append(cid)
+        self.docs.append(doc)
+        if len(self.docs) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.docs:
+            return
+        order = sorted(range(len(self.docs)), key=lambda i: len(self.docs[i].page_content))
+        self.vectorstore.add_documents(
+            [self.docs[i] for i in order],
+            ids=[self.ids[i] for i in order]
         )
+        self.progress.embedded += len(order)
+        self.ids, self.docs = [], []
+        self.progress.report()
+
+
+def _ingest_file(vectorstore, name: str, path: Path, old_ids: set):
+    """
+    Stream one PDF through extraction, splitting and embedding.
+    Only chunks not already in old_ids are embedded; returns all chunk ids
+    of the file in document order.
+    """
+    progress = IngestionProgress(name)
+    batcher = EmbeddingBatcher(vectorstore, progress)
+    chunk_ids = []
+    seen = set()
+
+    for start, end, chunks in iter_pdf_chunks(str(path)):
+        progress.pages += end - start
+        progress.chunks += len(chunks)
+        for doc in chunks:
+            cid = chunk_id(name, doc.page_content)
+            if cid in seen:
+                continue  # identical text twice in one file adds nothing to retrieval
+            seen.add(cid)
+            chunk_ids.append(cid)
+            if cid in old_ids:
+                continue
+            doc.metadata["source_file"] = name
+            doc.metadata["chunk_id"] = cid
+            batcher.add(cid, doc)
+        progress.report()
+
+    batcher.flush()
+    progress.report(force=True)
+    return chunk_ids
+
+
+def _commit(vectorstore):
+    # Chroma writes through; the flat index publishes changes as a new generation
+    commit = getattr(vectorstore, "commit", None)
+    if commit is not None:
+        commit()
+
+
+def sync_vectorstore(vectorstore, manifest: dict, pdf_files: Dict[str, Path]) -> dict:
+    """
+    Bring the collection in line with pdf_files.
+    Unchanged files are skipped by hash; changed files only embed chunks whose
+    text is new and delete the ones that disappeared; removed files are purged.
+    """
+    indexed = manifest.setdefault("files", {})
+
+    for name in sorted(set(indexed) - set(pdf_files)):
+        print("Removing deleted file from vector DB:", name)
+        stale_ids = indexed.pop(name)["chunks"]
+        if stale_ids:
+            vectorstore.delete(ids=stale_ids)
+        _commit(vectorstore)
+        write_manifest(manifest)
+
+    for name, path in pdf_files.items():
+        digest = file_sha256(path)
+        entry = indexed.get(name)
+        if entry and entry["sha256"] == digest:
+            continue
+
+        old_ids = set(entry["chunks"]) if entry else set()
+        chunk_ids = _ingest_file(vectorstore, name, path, old_ids)
+        stale_ids = list(old_ids.difference(chunk_ids))
+
+        print(f"Updated {name}: {len(set(chunk_ids) - old_ids)} new chunks, "
+              f"{len(stale_ids)} removed, {len(old_ids) - len(stale_ids)} unchanged")
+
+        if stale_ids:
+            vectorstore.delete(ids=stale_ids)
+        _commit(vectorstore)
+
+        indexed[name] = {"sha256": digest, "chunks": chunk_ids}
+        # Saved per file so an interrupted run resumes instead of starting over
+        write_manifest(manifest)
+
+    return manifest
+
+
+def _create_vectorstore():
+    os.makedirs(DATA_DIR, exist_ok=True)
+    os.makedirs(VECTOR_DB_DIR, exist_ok=True)
+
+    pdf_files = list_pdf_files()
+    if not pdf_files:
+        raise FileNotFoundError(f"No PDF files found in {DATA_DIR}")
+
+    # Workers starting together wait here; the later ones find the manifest current and skip ingestion
+    with index_lock():
+        manifest = read_manifest()
+        if manifest is None or manifest.get("params") != index_params() or "files" not in manifest:
+            # Model or splitter changed (or no usable manifest): every vector is stale
+            print("Vector DB missing or built with different settings, rebuilding.")
+            _clear_vector_db()
+            manifest = {"params": index_params(), "files": {}}
+
+        print(f"Opening {VECTOR_STORE_BACKEND} vector DB from:", VECTOR_DB_DIR)
+        vectorstore = _open_vectorstore()
+        sync_vectorstore(vectorstore, manifest, pdf_files)
+
+    print("Vector DB ready with files:", len(manifest["files"]))
+    return vectorstore
+
+
+registry.register("embeddings", _create_embeddings)
+registry.register("vectorstore", _create_vectorstore)
+
+
+def initialize_vectorstore():
+    return registry.get("vectorstore")
+
+
+def _create_retriever():
+    from .hybrid_retriever import HYBRID_RETRIEVAL, create_hybrid_retriever, VectorRetriever
+    from .reranker import RERANK_ENABLED, RERANK_CANDIDATES, CrossEncoderReranker, RerankingRetriever
+    # With reranking the first stage returns a larger pool for the cross-encoder to cut down
+    k = RERANK_CANDIDATES if RERANK_ENABLED else RETRIEVAL_K
+    if HYBRID_RETRIEVAL:
+        retriever = create_hybrid_retriever(k)
+    else:
+        retriever = VectorRetriever(initialize_vectorstore(), k)
+    return RerankingRetriever(retriever, CrossEncoderReranker()) if RERANK_ENABLED else retriever
 
-        print("Vector DB created successfully!")
 
-    return _vectorstore
+registry.register("retriever", _create_retriever)
 
 
 def get_retriever():
-    if _vectorstore is None:
-        initialize_vectorstore()
-    return _vectorstore.as_retriever(search_kwargs={"k": 3})
+    return registry.get("retriever")